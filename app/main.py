@@ -2,10 +2,13 @@
 DB2Doc - 数据库文档生成器主应用
 """
 
-from flask import Flask
+from flask import Flask, request, g
 import os
+import sys
+import time
 from .routes import main_bp, api_bp
 from .config import config
+from .utils.metrics import HTTP_REQUESTS, HTTP_LATENCY
 
 
 def create_app():
@@ -17,14 +20,54 @@ def create_app():
     # 注册蓝图
     app.register_blueprint(main_bp)
     app.register_blueprint(api_bp)
+
+    # 记录 /api 路由的请求数与延迟（按路由规则聚合，避免路径参数导致标签膨胀）
+    @app.before_request
+    def _start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.pop('request_start', None)
+        if start is not None and request.path.startswith('/api'):
+            endpoint = request.url_rule.rule if request.url_rule else 'unmatched'
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method, endpoint=endpoint)
+            HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        return response
     
     return app
 
 
+def _serve_production(host, port, workers, threads):
+    """生产模式：优先使用 gunicorn（多进程 + 线程），不可用时（如 Windows）回退到 waitress（单进程多线程）"""
+    try:
+        if os.name == 'nt':
+            raise ImportError
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        from waitress import serve
+        if workers > 1:
+            print(f"未安装 gunicorn 或当前平台不支持，使用 waitress 单进程 {threads} 线程运行（忽略 workers={workers}）")
+        serve(create_app(), host=host, port=port, threads=threads)
+        return
+
+    class _GunicornApp(BaseApplication):
+        def load_config(self):
+            self.cfg.set('bind', f"{host}:{port}")
+            self.cfg.set('workers', workers)
+            self.cfg.set('threads', threads)
+            self.cfg.set('worker_class', 'gthread')
+            # SSE 日志流与长时间任务不应被 worker 超时中断
+            self.cfg.set('timeout', 0)
+
+        def load(self):
+            return create_app()
+
+    _GunicornApp().run()
+
+
 def run_app():
     """运行应用"""
-    app = create_app()
-    
     # 从配置文件获取运行参数
     app_config = config.get('app', {})
     host = app_config.get('host', '0.0.0.0')
@@ -33,10 +76,23 @@ def run_app():
     # 允许通过环境变量强制开启调试模式（开发脚本使用）
     if os.getenv('DB2DOC_DEBUG') in ('1', 'true', 'True'):
         debug = True
-    
+
+    # 生产模式：DB2DOC_MODE=production 或命令行参数 --production
+    mode = os.getenv('DB2DOC_MODE', app_config.get('mode', 'development'))
+    if '--production' in sys.argv:
+        mode = 'production'
+
     print(f"启动DB2Doc应用...")
     print(f"访问地址: http://{host}:{port}")
-    
+
+    if mode == 'production':
+        workers = int(os.getenv('DB2DOC_WORKERS', app_config.get('workers', (os.cpu_count() or 1) * 2 + 1)))
+        threads = int(os.getenv('DB2DOC_THREADS', app_config.get('threads', 8)))
+        print(f"生产模式: workers={workers}, threads={threads}")
+        _serve_production(host, port, workers, threads)
+        return
+
+    app = create_app()
     app.run(debug=debug, host=host, port=port)
 
 
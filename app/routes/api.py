@@ -5,7 +5,7 @@ API路由模块
 from flask import Blueprint, request, jsonify, Response, send_file
 import os
 import json
-import queue
+import time
 from datetime import datetime
 import threading
 from datetime import datetime
@@ -19,7 +19,10 @@ from ..utils import (
     connect_db,
     get_tables_and_views,
     get_tables_with_missing_stats,
+    get_table_comment,
+    get_table_comments,
     get_columns_info,
+    get_columns_info_batch,
     get_foreign_keys,
     get_all_columns,
     infer_chinese_meaning,
@@ -27,21 +30,76 @@ from ..utils import (
     get_databases,
     update_table_comment,
     update_column_comment,
+    get_query_stats,
 )
 from ..utils.ai_helper import get_openai_client
+from ..utils.timing import StageTimer
+from ..utils.metrics import metered_chat_completion, track_job
+from ..utils.job_store import get_job_store, bind_job, current_job_id, JOB_COMPLETE, JOB_ERROR
+from ..utils.snapshot import export_snapshot, save_snapshot, snapshot_display_name
 from ..config import config
 from .api_graph_mermaid import graph_mermaid
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
-# 全局日志队列
-log_queue = queue.Queue()
+# SSE 心跳间隔（秒）
+LOG_HEARTBEAT_SECONDS = 1
+
+
+def publish_event(message, job_id=None):
+    """
+    写入任务事件（共享任务存储，任意 worker 均可读取）
+
+    未指定 job_id 时使用当前线程绑定的任务；GENERATION_COMPLETE / GENERATION_ERROR 同时结束任务
+    """
+    job_id = job_id or current_job_id()
+    if job_id is None:
+        print(message)
+        return None
+    store = get_job_store()
+    event_id = store.append_event(job_id, message)
+    if message.startswith("GENERATION_COMPLETE:"):
+        store.finish_job(job_id, JOB_COMPLETE, {"file_path": message.split(":", 1)[1]})
+    elif message.startswith("GENERATION_ERROR:"):
+        store.finish_job(job_id, JOB_ERROR, {"message": message.split(":", 1)[1]})
+    return event_id
 
 
 def log_message(message):
     """记录日志消息"""
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    log_queue.put(f"[{timestamp}] {message}")
+    publish_event(f"[{timestamp}] {message}")
+
+
+def write_generation_report(output_file_path, report):
+    """推送耗时汇总（TIMING 事件）并在输出文档旁写入 <文档>.report.json，返回报告路径"""
+    timing = report.get("timing") or {}
+    publish_event("TIMING:" + json.dumps({"scope": "summary", **timing}, ensure_ascii=False))
+
+    report_path = os.path.splitext(output_file_path)[0] + '.report.json'
+    try:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({
+                "output": output_file_path,
+                "generated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                **report,
+            }, f, ensure_ascii=False, indent=2)
+        log_message(f"生成报告已保存到: {report_path}")
+    except OSError as e:
+        log_message(f"生成报告保存失败: {str(e)}")
+        return None
+    return report_path
+
+
+def report_query_stats(connection):
+    """将连接上的查询统计推送到日志流（QUERY_STATS 事件），返回统计字典"""
+    stats = get_query_stats(connection)
+    if stats is None:
+        return None
+    report = stats.to_dict()
+    log_message(f"数据库查询统计: {report['statements']} 条语句，读取 {report['rows']} 行，耗时 {report['seconds']:.3f}s")
+    publish_event("QUERY_STATS:" + json.dumps(report, ensure_ascii=False))
+    return report
 
 
 @api_bp.route('/test_connection', methods=['POST'])
@@ -138,63 +196,21 @@ def get_table_detail():
 
         connection = connect_db(host, user, password, port, database, db_type)
         columns_info = get_columns_info(connection, table_name, database, db_type)
-        connection.close()
-
         # 处理表注释
-        table_comment = ''
-        if db_type == 'mysql':
-            # 单独查询表注释
-            connection = connect_db(host, user, password, port, database, db_type)
-            cursor = connection.cursor()
-            query = """
-            SELECT table_comment 
-            FROM information_schema.tables 
-            WHERE table_schema = %s AND table_name = %s
-            """
-            cursor.execute(query, (database, table_name))
-            table_comment_result = cursor.fetchone()
-            if table_comment_result:
-                table_comment = table_comment_result[0]
-            cursor.close()
-            connection.close()
-        elif db_type == 'sqlserver':
-            # 单独查询表注释
-            connection = connect_db(host, user, password, port, database, db_type)
-            cursor = connection.cursor()
-            query = """
-            SELECT ISNULL(CAST(ep.value AS NVARCHAR(MAX)), '') as table_comment
-            FROM sys.tables t
-            LEFT JOIN sys.extended_properties ep ON ep.major_id = t.object_id AND ep.minor_id = 0 AND ep.name = 'MS_Description'
-            WHERE t.name = ?
-            """
-            cursor.execute(query, (table_name,))
-            table_comment_result = cursor.fetchone()
-            if table_comment_result:
-                table_comment = table_comment_result[0]
-            cursor.close()
-            connection.close()
+        table_comment = get_table_comment(connection, table_name, database, db_type)
+        connection.close()
 
         # 格式化列信息
         fields = []
         for column in columns_info:
-            if db_type == 'mysql':
-                # MySQL格式: (column_name, data_type, is_nullable, column_default, column_comment, character_maximum_length, numeric_precision, numeric_scale)
-                field = {
-                    'name': column[0],
-                    'type': column[1],
-                    'nullable': column[2] == 'YES',
-                    'default': column[3],
-                    'comment': column[4]
-                }
-            elif db_type == 'sqlserver':
-                # SQL Server格式: (column_name, data_type, is_nullable, column_default, column_comment, character_maximum_length, numeric_precision, numeric_scale)
-                field = {
-                    'name': column[0],
-                    'type': column[1],
-                    'nullable': column[2] == 'YES',
-                    'default': column[3],
-                    'comment': column[4]
-                }
+            # MySQL / SQL Server / 快照格式一致: (column_name, data_type, is_nullable, column_default, column_comment, character_maximum_length, numeric_precision, numeric_scale)
+            field = {
+                'name': column[0],
+                'type': column[1],
+                'nullable': column[2] == 'YES',
+                'default': column[3],
+                'comment': column[4]
+            }
             fields.append(field)
 
         return jsonify({"success": True, "table_info": {"comment": table_comment}, "fields": fields})
@@ -316,7 +332,8 @@ def generate_table_description():
 
         prompt = f"""请给出表 {table_name_str} 的中文说明，要求说明表的功能、用途和主要业务场景，不超过100个字符。\n\n表结构信息：\n{columns_text}{db_context}"""
 
-        response = client.chat.completions.create(
+        response = metered_chat_completion(
+            client, 'table_description',
             model=model,
             messages=[
                 {"role": "system", "content": "你是一个数据库专家，擅长根据表结构和业务场景推断表的功能和用途。"},
@@ -369,10 +386,23 @@ def save_table_comment():
 
 
 @api_bp.route('/generate_all_tables_description', methods=['POST'])
+@track_job('describe_all')
 def generate_all_tables_description():
-    """一键生成所有表和字段的描述并更新到数据库"""
+    """一键生成所有表和字段的描述并更新到数据库（进度事件写入 job_id 对应的任务，可由客户端预先生成）"""
+    data = request.get_json() or {}
+    store = get_job_store()
+    job_id = store.create_job('describe_all', data.get('job_id'))
+    with bind_job(job_id):
+        result = _describe_all_tables(data)
+    result["job_id"] = job_id
+    store.finish_job(job_id, JOB_COMPLETE if result.get("success") else JOB_ERROR,
+                     {k: v for k, v in result.items() if k != "failed_table_details"})
+    return jsonify(result)
+
+
+def _describe_all_tables(data):
+    """一键生成的实际处理，返回结果字典"""
     try:
-        data = request.get_json()
         host = data.get('host')
         user = data.get('user')
         password = data.get('password')
@@ -407,6 +437,9 @@ def generate_all_tables_description():
                 "failed_table_details": []
             }
             
+            # 批量预取列信息，避免逐表重复查询
+            columns_by_table = get_columns_info_batch(connection, database, db_type, tables=tables_list)
+
             # 遍历所有表，生成描述并保存
             total_tables = len(tables_list)
             for index, table_name in enumerate(tables_list, 1):
@@ -419,14 +452,16 @@ def generate_all_tables_description():
                     
                     # 推送进度信息
                     progress_percent = int((index / total_tables) * 100)
-                    log_queue.put(f"PROGRESS:{index}:{total_tables}:{table_name}")
+                    publish_event(f"PROGRESS:{index}:{total_tables}:{table_name}")
                     
                     # 1. 生成表说明
-                    table_gen_response = generate_table_description_internal(connection, table_name, database, db_type, db_description)
+                    columns_info = columns_by_table.get(table_name, [])
+                    table_gen_response = generate_table_description_internal(
+                        connection, table_name, database, db_type, db_description, columns_info=columns_info
+                    )
                     table_description = table_gen_response["table_description"]
                     
                     # 2. 生成所有字段说明
-                    columns_info = get_columns_info(connection, table_name, database, db_type)
                     field_meanings = infer_chinese_meaning(columns_info, table_name, db_description)
                     
                     # 3. 保存到数据库
@@ -446,18 +481,20 @@ def generate_all_tables_description():
                     log_message(f"处理表 {table_name} 时出错: {str(e)}")
                     continue
             
+            result["query_stats"] = report_query_stats(connection)
             connection.close()
-            return jsonify(result)
+            return result
         except Exception as e:
             connection.close()
-            return jsonify({"success": False, "message": f"批量生成失败: {str(e)}"})
+            return {"success": False, "message": f"批量生成失败: {str(e)}"}
     except Exception as e:
-        return jsonify({"success": False, "message": f"数据库连接失败: {str(e)}"})
+        return {"success": False, "message": f"数据库连接失败: {str(e)}"}
 
 
-def generate_table_description_internal(connection, table_name, database, db_type, db_description):
-    """内部函数：生成表说明"""
-    columns_info = get_columns_info(connection, table_name, database, db_type)
+def generate_table_description_internal(connection, table_name, database, db_type, db_description, columns_info=None):
+    """内部函数：生成表说明（columns_info 已预取时不再查询）"""
+    if columns_info is None:
+        columns_info = get_columns_info(connection, table_name, database, db_type)
     
     client = get_openai_client()
     if not client:
@@ -483,7 +520,8 @@ def generate_table_description_internal(connection, table_name, database, db_typ
 
     prompt = f"""请给出表 {table_name_str} 的中文说明，要求说明表的功能、用途和主要业务场景，不超过100个字符。\n\n表结构信息：\n{columns_text}{db_context}"""
 
-    response = client.chat.completions.create(
+    response = metered_chat_completion(
+        client, 'table_description',
         model=model,
         messages=[
             {"role": "system", "content": "你是一个数据库专家，擅长根据表结构和业务场景推断表的功能和用途。"},
@@ -557,7 +595,8 @@ def generate_docs():
         db_type = data.get('db_type', 'mysql')
         selected_tables = data.get('tables', [])
         output_path = data.get('output_path', '')
-        file_name = data.get('file_name', f'{database}_文档_{datetime.now().strftime("%Y%m%d_%H%M%S")}.md')
+        doc_name = snapshot_display_name(database) if db_type == 'snapshot' else database
+        file_name = data.get('file_name', f'{doc_name}_文档_{datetime.now().strftime("%Y%m%d_%H%M%S")}.md')
 
         incremental_mode = data.get('incremental_mode', False)
         existing_doc_path = data.get('existing_doc_path', '')
@@ -565,17 +604,21 @@ def generate_docs():
         existing_tables = data.get('existing_tables', [])
         db_description = data.get('db_description', '')
         
+        job_id = get_job_store().create_job('generate_docs')
+
         # 调试日志
         if incremental_mode:
-            log_message(f"增量模式调试 - existing_doc_path: {existing_doc_path}")
-            log_message(f"增量模式调试 - existing_doc_content长度: {len(existing_doc_content) if existing_doc_content else 0}")
-            log_message(f"增量模式调试 - existing_tables: {existing_tables}")
-
-        # 清空日志队列
-        while not log_queue.empty():
-            log_queue.get()
+            with bind_job(job_id):
+                log_message(f"增量模式调试 - existing_doc_path: {existing_doc_path}")
+                log_message(f"增量模式调试 - existing_doc_content长度: {len(existing_doc_content) if existing_doc_content else 0}")
+                log_message(f"增量模式调试 - existing_tables: {existing_tables}")
 
+        @track_job('generate_docs')
         def generate_in_background():
+            with bind_job(job_id):
+                _generate_docs_job()
+
+        def _generate_docs_job():
             try:
                 connection = connect_db(host, user, password, port, database, db_type)
 
@@ -672,9 +715,18 @@ def generate_docs():
                         log_message("没有需要生成的新表格")
                     output_file.close()
                     connection.close()
-                    log_queue.put("GENERATION_COMPLETE:" + output_file_path)
+                    publish_event("GENERATION_COMPLETE:" + output_file_path)
                     return
 
+                # 分阶段计时（catalog / llm / render / write）
+                timer = StageTimer()
+
+                # 批量预取列信息与表注释，避免逐表查询（N+1）
+                selected_names = [t[0] if isinstance(t, (list, tuple)) else t for t in selected_tables_final]
+                with timer.stage('catalog'):
+                    columns_by_table = get_columns_info_batch(connection, database, db_type, tables=selected_names)
+                    table_comments = get_table_comments(connection, database, db_type, tables=selected_names)
+
                 for i in range(len(selected_tables_final)):
                     table_info = selected_tables_final[i]
                     table_index = i + 1
@@ -689,37 +741,12 @@ def generate_docs():
                         print(f"开始处理表: {table_name}")
                         
                         # 获取列信息，包含字段注释
-                        columns_info = get_columns_info(connection, table_name, database, db_type)
+                        with timer.stage('catalog', table_name):
+                            columns_info = columns_by_table.get(table_name, [])
+                            # 表注释（已批量预取）
+                            table_comment = table_comments.get(table_name, '')
                         print(f"获取到表 {table_name} 的 {len(columns_info)} 个列信息")
                         
-                        # 直接从数据库读取表注释
-                        table_comment = ''
-                        if db_type == 'mysql':
-                            query = """
-                            SELECT table_comment 
-                            FROM information_schema.tables 
-                            WHERE table_schema = %s AND table_name = %s
-                            """
-                            cursor = connection.cursor()
-                            cursor.execute(query, (database, table_name))
-                            table_comment_result = cursor.fetchone()
-                            if table_comment_result:
-                                table_comment = table_comment_result[0]
-                            cursor.close()
-                        elif db_type == 'sqlserver':
-                            query = """
-                            SELECT ISNULL(CAST(ep.value AS NVARCHAR(MAX)), '') as table_comment
-                            FROM sys.tables t
-                            LEFT JOIN sys.extended_properties ep ON ep.major_id = t.object_id AND ep.minor_id = 0 AND ep.name = 'MS_Description'
-                            WHERE t.name = ?
-                            """
-                            cursor = connection.cursor()
-                            cursor.execute(query, (table_name,))
-                            table_comment_result = cursor.fetchone()
-                            if table_comment_result:
-                                table_comment = table_comment_result[0]
-                            cursor.close()
-                        
                         # 提取字段注释作为含义
                         meanings = {}
                         for col in columns_info:
@@ -734,7 +761,8 @@ def generate_docs():
                             missing_columns = [str(col[0]) for col in columns_info if str(col[0]) not in meanings or not meanings[str(col[0])]]
                             if missing_columns:
                                 print(f"表 {table_name} 缺少 {len(missing_columns)} 个字段注释，使用AI推断补充")
-                                ai_meanings = infer_chinese_meaning(columns_info, table_name, db_description)
+                                with timer.stage('llm', table_name):
+                                    ai_meanings = infer_chinese_meaning(columns_info, table_name, db_description)
                                 # 合并数据库注释和AI推断结果，优先使用数据库注释
                                 for col in columns_info:
                                     column_name = str(col[0]) if col[0] is not None else ''
@@ -742,19 +770,21 @@ def generate_docs():
                                         if column_name in ai_meanings:
                                             meanings[column_name] = ai_meanings[column_name]
                         
-                        markdown = generate_markdown(columns_info, meanings)
+                        with timer.stage('render', table_name):
+                            markdown = generate_markdown(columns_info, meanings)
                         print(f"Markdown生成完成，表 {table_name}")
                         
                         # 写入表说明和Markdown
-                        if table_comment:
-                            output_file.write(f"表: {table_name} - {table_comment}\n{markdown}\n")
-                        else:
-                            output_file.write(f"表: {table_name}\n{markdown}\n")
-                            
-                        output_file.flush()
+                        with timer.stage('write', table_name):
+                            if table_comment:
+                                output_file.write(f"表: {table_name} - {table_comment}\n{markdown}\n")
+                            else:
+                                output_file.write(f"表: {table_name}\n{markdown}\n")
+                            output_file.flush()
                         completed_tables += 1
                         log_message(f"表 {table_name} 整理完成 ({completed_tables}/{total_tables})")
-                        log_queue.put(f"PROGRESS:{completed_tables}:{total_tables}:{table_name}")
+                        publish_event("TIMING:" + json.dumps({"scope": "table", **timer.table_summary(table_name)}, ensure_ascii=False))
+                        publish_event(f"PROGRESS:{completed_tables}:{total_tables}:{table_name}")
                         print(f"表 {table_name} 处理完成")
                         
                     except Exception as table_error:
@@ -767,48 +797,123 @@ def generate_docs():
                         continue
 
                 output_file.close()
+                query_stats = report_query_stats(connection)
                 connection.close()
+                write_generation_report(output_file_path, {
+                    "database": doc_name,
+                    "db_type": db_type,
+                    "total_tables": total_tables,
+                    "completed_tables": completed_tables,
+                    "timing": timer.summary(),
+                    "query_stats": query_stats,
+                })
                 log_message("所有表格整理完成，文档生成成功！")
-                log_queue.put("GENERATION_COMPLETE:" + output_file_path)
+                publish_event("GENERATION_COMPLETE:" + output_file_path)
             except Exception as e:
                 log_message(f"生成过程中出错: {str(e)}")
-                log_queue.put("GENERATION_ERROR:" + str(e))
+                publish_event("GENERATION_ERROR:" + str(e))
 
         thread = threading.Thread(target=generate_in_background)
         thread.daemon = True
         thread.start()
-        return jsonify({"success": True, "message": "开始生成文档，请查看日志进度"})
+        return jsonify({"success": True, "message": "开始生成文档，请查看日志进度", "job_id": job_id})
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)})
+
+
+@api_bp.route('/export_snapshot', methods=['POST'])
+@track_job('export_snapshot')
+def api_export_snapshot():
+    """导出离线 Schema 快照（表、列、注释、外键、索引），供后续无连接地生成文档/关系图"""
+    try:
+        data = request.get_json()
+        host = data.get('host')
+        user = data.get('user')
+        password = data.get('password')
+        port = int(data.get('port', 3306 if data.get('db_type', 'mysql') == 'mysql' else 1433))
+        database = data.get('database')
+        db_type = data.get('db_type', 'mysql')
+        selected_tables = data.get('tables') or None
+        output_path = data.get('output_path', '')
+        file_name = data.get('file_name', f'{database}_snapshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}')
+
+        if output_path:
+            output_dir = os.path.abspath(output_path)
+        else:
+            output_dir = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'data', 'snapshots')
+
+        connection = connect_db(host, user, password, port, database, db_type)
+        try:
+            snapshot_data = export_snapshot(connection, database, db_type, tables=selected_tables)
+        finally:
+            connection.close()
+
+        file_path = save_snapshot(snapshot_data, os.path.join(output_dir, file_name))
+        return jsonify({
+            "success": True,
+            "file_path": file_path,
+            "tables_count": len(snapshot_data["tables"]),
+        })
     except Exception as e:
         return jsonify({"success": False, "message": str(e)})
 
 
+def _log_event_payload(message):
+    """将任务事件转换为 SSE 数据，返回 (payload, 是否为终止事件)"""
+    if message.startswith("GENERATION_COMPLETE:"):
+        return {'type': 'complete', 'file_path': message.split(":", 1)[1]}, True
+    if message.startswith("GENERATION_ERROR:"):
+        return {'type': 'error', 'message': message.split(":", 1)[1]}, True
+    if message.startswith("TIMING:"):
+        return {'type': 'timing', **json.loads(message.split(":", 1)[1])}, False
+    if message.startswith("QUERY_STATS:"):
+        return {'type': 'query_stats', 'stats': json.loads(message.split(":", 1)[1])}, False
+    if message.startswith("PROGRESS:"):
+        parts = message.split(":", 3)
+        if len(parts) >= 4:
+            return {'type': 'progress', 'completed': int(parts[1]), 'total': int(parts[2]), 'current_table': parts[3]}, False
+        return None, False
+    return {'type': 'log', 'message': message}, False
+
+
 @api_bp.route('/logs')
 def logs():
-    """获取日志流"""
+    """
+    获取日志流
+
+    job_id: 任务 ID（generate_docs 响应中返回，或由客户端为一键生成预先生成）；
+    未指定时跟随本次连接之后启动（或仍在运行）的最新任务。
+    事件带 SSE id，断线重连时根据 Last-Event-ID 续传。
+    """
+    job_id = request.args.get('job_id')
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or '0'
+    after_id = int(last_event_id) if last_event_id.isdigit() else 0
+    store = get_job_store()
+    opened_at = time.time()
+
     def generate_logs():
-        while True:
-            try:
-                message = log_queue.get(timeout=1)
-                if message.startswith("GENERATION_COMPLETE:"):
-                    file_path = message.split(":", 1)[1]
-                    yield f"data: {json.dumps({'type': 'complete', 'file_path': file_path})}\n\n"
-                    break
-                elif message.startswith("GENERATION_ERROR:"):
-                    error_msg = message.split(":", 1)[1]
-                    yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
-                    break
-                elif message.startswith("PROGRESS:"):
-                    parts = message.split(":", 3)
-                    if len(parts) >= 4:
-                        completed = int(parts[1])
-                        total = int(parts[2])
-                        current_table = parts[3]
-                        yield f"data: {json.dumps({'type': 'progress', 'completed': completed, 'total': total, 'current_table': current_table})}\n\n"
-                else:
-                    yield f"data: {json.dumps({'type': 'log', 'message': message})}\n\n"
-            except queue.Empty:
-                yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+        nonlocal job_id
+        heartbeat = f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
+        while job_id is None:
+            job = store.latest_job(since=opened_at)
+            if job is not None:
+                job_id = job["id"]
+                break
+            yield heartbeat
+            time.sleep(LOG_HEARTBEAT_SECONDS)
+
+        for event in store.iter_events(job_id, after_id, timeout=LOG_HEARTBEAT_SECONDS):
+            if event is None:
+                yield heartbeat
                 continue
+            event_id, message = event
+            payload, terminal = _log_event_payload(message)
+            if payload is not None:
+                yield f"id: {event_id}\ndata: {json.dumps(payload)}\n\n"
+            if terminal:
+                return
+        # 任务已结束（如一键生成）：通知客户端关闭连接，避免 EventSource 自动重连
+        yield f"data: {json.dumps({'type': 'end', 'job_id': job_id})}\n\n"
     return Response(generate_logs(), mimetype='text/event-stream')
 
 
@@ -4,11 +4,14 @@
 from flask import request, jsonify
 from ..utils import connect_db, get_tables_and_views
 from ..utils.database import get_foreign_keys, get_all_columns
-from ..utils.relationship_inference import infer_relationships
+from ..utils.relationship_inference import cached_infer_relationships, get_incremental_engine
+from ..utils.job_store import get_job_store
+from ..utils.inclusion_probe import InclusionProbe, ProbeBudget, PROBE_DB_TYPES
+from ..utils.value_sketch import SketchEvidence
 
 
 def graph_mermaid():
-    """返回用于关系图渲染的 Mermaid ER 图 DSL（第一版：MySQL）"""
+    """返回用于关系图渲染的 Mermaid ER 图 DSL（第一版：MySQL，支持离线快照）"""
     try:
         data = request.get_json() or {}
         host = data.get('host')
@@ -22,11 +25,26 @@ def graph_mermaid():
         include_fk = bool(options.get('include_fk', True))
         include_inferred = bool(options.get('include_inferred', False))
         use_llm = bool(options.get('use_llm', False))  # 是否使用 LLM 复核推断
+        # LLM 复核：默认复核全部候选，分批并发请求
+        llm_max_candidates = int(options['llm_max_candidates']) if options.get('llm_max_candidates') else None
+        llm_concurrency = int(options['llm_concurrency']) if options.get('llm_concurrency') else None
         threshold = float(options.get('threshold', 0.6))
+        # 候选下限：推断按下限返回全部候选，前端在下限之上调整阈值时本地过滤，无需再次请求
+        candidate_floor = min(threshold, float(options.get('candidate_floor', 0.3)))
         selected_tables = options.get('tables') or None
+        # 数据证据（抽样包含依赖检查）：默认关闭，开启后受语句数/耗时预算约束
+        data_evidence = bool(options.get('data_evidence', False)) and db_type in PROBE_DB_TYPES
+        data_discover = bool(options.get('data_discover', False))
+        # probe：逐对抽样查询；sketch：每列扫描一次样本构建 MinHash/HLL 草图，内存中估计包含率
+        evidence_method = options.get('evidence_method', 'probe')
+        # 推断结果按 Schema 指纹缓存；refresh_inference 强制重新推断
+        inference_cache = bool(options.get('inference_cache', True))
+        refresh_inference = bool(options.get('refresh_inference', False))
+        # 增量规则推断：同一数据库复用倒排索引与上次结果，只重算变化的表
+        incremental_inference = bool(options.get('incremental_inference', True))
 
-        if db_type != 'mysql':
-            return jsonify({"success": False, "message": "当前版本仅支持 MySQL"})
+        if db_type not in ('mysql', 'sqlite', 'snapshot'):
+            return jsonify({"success": False, "message": "当前版本仅支持 MySQL、SQLite 或离线快照"})
 
         connection = connect_db(host, user, password, port, database, db_type)
 
@@ -79,181 +97,116 @@ def graph_mermaid():
 
             # 推断关系（规则 + 可选 LLM）
             inferred_edges_raw = []
+            evidence_budget = None
+            cache_info = None
             if include_inferred:
-                inferred_edges_raw = infer_relationships(
-                    cols_by_table=cols_by_table,
-                    table_names=set(table_names),
-                    tables_data=tables_data,
-                    fk_pairs=fk_pairs,
-                    threshold=threshold,
-                    use_llm=use_llm,
-                    llm_max_candidates=20
-                )
+                data_probe = None
+                if data_evidence and evidence_method == 'sketch':
+                    data_probe = SketchEvidence(
+                        connection,
+                        db_type,
+                        scope=f"{db_type}:{host}:{port}:{database}",
+                        sample_rows=int(options.get('evidence_sample_rows', 20000)),
+                        max_columns=int(options.get('evidence_max_columns', 2000)),
+                    )
+                elif data_evidence:
+                    data_probe = InclusionProbe(
+                        lambda: connect_db(host, user, password, port, database, db_type),
+                        db_type,
+                        sample_size=int(options.get('evidence_sample_size', 50)),
+                        max_workers=int(options.get('evidence_workers', 4)),
+                        query_timeout=float(options.get('evidence_timeout', 2.0)),
+                        budget=ProbeBudget(
+                            max_queries=int(options.get('evidence_max_queries', 200)),
+                            max_seconds=float(options.get('evidence_max_seconds', 30.0)),
+                        ),
+                    )
+                # 数据证据依赖实际数据：缓存键需包含数据库标识与证据选项
+                scope = None
+                if data_probe is not None:
+                    evidence_options = {k: v for k, v in options.items() if k.startswith('evidence_')}
+                    scope = f"{db_type}:{host}:{port}:{database}:{sorted(evidence_options.items())}"
+                try:
+                    inferred_edges_raw, cache_info = cached_infer_relationships(
+                        get_job_store() if inference_cache else None,
+                        cols_by_table=cols_by_table,
+                        table_names=table_names,
+                        tables_data=tables_data,
+                        fk_pairs=fk_pairs,
+                        threshold=candidate_floor,
+                        use_llm=use_llm,
+                        llm_max_candidates=llm_max_candidates,
+                        llm_concurrency=llm_concurrency,
+                        data_probe=data_probe,
+                        data_discover=data_discover,
+                        scope=scope,
+                        refresh=refresh_inference,
+                        rule_engine=(
+                            get_incremental_engine(f"{db_type}:{host}:{port}:{database}")
+                            if incremental_inference else None
+                        )
+                    )
+                finally:
+                    if data_probe is not None:
+                        evidence_budget = data_probe.report()
+                        data_probe.close()
 
             connection.close()
 
-            # ========== 先收集所有关系，用于计算关系数 ==========
-            relationships = []
-            
-            if include_fk:
-                for e in fk_edges_raw:
-                    from_table = e.get("from_table")
-                    to_table = e.get("to_table")
-                    if from_table not in table_names or to_table not in table_names:
-                        continue
-                    relationships.append({
-                        "source": from_table,
-                        "target": to_table,
-                        "kind": "fk",
-                        "constraint": e.get("constraint_name", "")
-                    })
-
-            if include_inferred:
-                for e in inferred_edges_raw:
-                    src = e.get('source')
-                    tgt = e.get('target')
-                    conf = e.get('confidence', 0)
-                    reason = e.get('reason', '')
-                    if src not in table_names or tgt not in table_names:
-                        continue
-                    if conf < threshold:
-                        continue
-                    relationships.append({
-                        "source": src,
-                        "target": tgt,
-                        "kind": "infer",
-                        "confidence": conf,
-                        "reason": reason
-                    })
+            # ========== 收集所有关系，用于计算关系数 ==========
+            relationships = build_relationships(
+                table_names, fk_edges_raw, inferred_edges_raw,
+                include_fk=include_fk, include_inferred=include_inferred, threshold=threshold
+            )
+            candidates = build_relationships(
+                table_names, [], inferred_edges_raw,
+                include_fk=False, include_inferred=include_inferred, threshold=candidate_floor
+            )
 
             # ========== 计算关系数，识别核心表和孤立表 ==========
-            in_degree = {t: 0 for t in table_names}
-            out_degree = {t: 0 for t in table_names}
-            for rel in relationships:
-                src, tgt = rel.get("source"), rel.get("target")
-                if src in out_degree:
-                    out_degree[src] += 1
-                if tgt in in_degree:
-                    in_degree[tgt] += 1
-            
-            relation_counts = {t: in_degree[t] + out_degree[t] for t in table_names}
-            max_relations = max(relation_counts.values()) if relation_counts else 0
-            core_threshold = max(3, max_relations * 0.5)
-            
-            def extract_prefix(name):
-                parts = name.split('_')
-                if len(parts) >= 2:
-                    return parts[0]
-                return 'other'
-            
-            # 分类表
-            core_tables = []
-            normal_tables = []
-            isolated_tables = []
-            
-            for t in table_names:
-                rel_count = relation_counts.get(t, 0)
-                if rel_count >= core_threshold:
-                    core_tables.append(t)
-                elif rel_count == 0:
-                    isolated_tables.append(t)
-                else:
-                    normal_tables.append(t)
-            
-            # 核心表按关系数降序排列
-            core_tables.sort(key=lambda t: -relation_counts.get(t, 0))
-            # 普通表按关系数降序排列
-            normal_tables.sort(key=lambda t: -relation_counts.get(t, 0))
-            # 孤立表按名称排序
-            isolated_tables.sort()
-            
-            # ========== 按优化顺序排列表：核心表 → 普通表 → 孤立表 ==========
-            sorted_table_names = core_tables + normal_tables + isolated_tables
+            grouping = classify_tables(table_names, relationships)
+            core_tables = grouping["core_tables"]
+            isolated_tables = grouping["isolated_tables"]
             
-            print(f"[布局优化] 核心表: {len(core_tables)}, 普通表: {len(normal_tables)}, 孤立表: {len(isolated_tables)}")
+            print(f"[布局优化] 核心表: {len(core_tables)}, 普通表: {len(grouping['normal_tables'])}, 孤立表: {len(isolated_tables)}")
             if core_tables:
                 print(f"[布局优化] 核心表顺序: {core_tables[:5]}...")
 
             # ========== 构造 Mermaid ER 图 DSL ==========
-            mermaid_lines = ["erDiagram"]
             preview_limit = int(options.get('columns_preview_limit', 8) or 8)
-            
-            # 按优化后的顺序定义表
-            for table_name in sorted_table_names:
-                cols = cols_by_table.get(table_name, [])
-                safe_table_name = table_name.replace('-', '_').replace('.', '_').replace(' ', '_')
-                mermaid_lines.append(f"    {safe_table_name} {{")
-                
-                preview_cols = cols[:preview_limit]
-                for c, dt in preview_cols:
-                    c = str(c or '').strip()
-                    dt = str(dt or '').strip()
-                    if not c:
-                        continue
-                    safe_col = c.replace('-', '_').replace('.', '_').replace(' ', '_')
-                    mermaid_lines.append(f"        {dt} {safe_col}")
-                
-                if len(cols) > preview_limit:
-                    remaining = len(cols) - preview_limit
-                    mermaid_lines.append(f"        string more \"...({remaining} more)\"")
-                
-                mermaid_lines.append("    }")
-
-            # 添加关系（也按核心表优先的顺序）
-            # 先添加涉及核心表的关系
-            core_set = set(core_tables)
-            core_rels = [r for r in relationships if r["source"] in core_set or r["target"] in core_set]
-            other_rels = [r for r in relationships if r["source"] not in core_set and r["target"] not in core_set]
-            sorted_relationships = core_rels + other_rels
-            
-            for rel in sorted_relationships:
-                src = rel["source"]
-                tgt = rel["target"]
-                kind = rel["kind"]
-                
-                safe_src = src.replace('-', '_').replace('.', '_').replace(' ', '_')
-                safe_tgt = tgt.replace('-', '_').replace('.', '_').replace(' ', '_')
-                
-                if kind == "fk":
-                    mermaid_lines.append(f"    {safe_src} ||--o{{ {safe_tgt} : \"FK\"")
-                else:
-                    conf = rel.get("confidence", 0)
-                    label = f"inferred({conf:.2f})"
-                    mermaid_lines.append(f"    {safe_src} }}o..o{{ {safe_tgt} : \"{label}\"")
-
-            mermaid_dsl = "\n".join(mermaid_lines)
+            mermaid_dsl = build_mermaid_dsl(
+                grouping["sorted_table_names"], cols_by_table, relationships, core_tables, preview_limit
+            )
 
             # ========== 更新 tables_data ==========
-            prefix_groups = {}
-            for t in table_names:
-                prefix = extract_prefix(t)
-                prefix_groups.setdefault(prefix, []).append(t)
-            
-            for t in table_names:
-                rel_count = relation_counts.get(t, 0)
-                tables_data[t]["in_degree"] = in_degree.get(t, 0)
-                tables_data[t]["out_degree"] = out_degree.get(t, 0)
-                tables_data[t]["relation_count"] = rel_count
-                tables_data[t]["prefix"] = extract_prefix(t)
-                tables_data[t]["is_isolated"] = rel_count == 0
-                tables_data[t]["is_core"] = rel_count >= core_threshold
+            apply_grouping(tables_data, table_names, grouping)
 
             return jsonify({
                 "success": True,
                 "mermaid": mermaid_dsl,
                 "tables": tables_data,
                 "relationships": relationships,
+                # 供前端本地按阈值重新过滤与渲染
+                "table_names": table_names,
+                "candidates": candidates,
+                "candidate_floor": candidate_floor,
+                "columns_preview_limit": preview_limit,
                 "stats": {
                     "tables_count": len(table_names),
                     "relationships_count": len(relationships),
                     "isolated_count": len(isolated_tables),
-                    "core_count": len(core_tables)
+                    "core_count": len(core_tables),
+                    "evidence_budget": evidence_budget,
+                    "inference_cache": (
+                        None if cache_info is None or cache_info["key"] is None else ('hit' if cache_info["hit"] else 'miss')
+                    ),
+                    "llm_review": cache_info["llm_review"] if cache_info else None
                 },
                 "insights": {
                     "core_tables": core_tables,
                     "isolated_tables": isolated_tables,
-                    "prefix_groups": prefix_groups,
-                    "max_relations": max_relations
+                    "prefix_groups": grouping["prefix_groups"],
+                    "max_relations": grouping["max_relations"]
                 }
             })
 
@@ -264,3 +217,162 @@ def graph_mermaid():
     except Exception as e:
         return jsonify({"success": False, "message": str(e)})
 
+
+def _safe_name(name):
+    """Mermaid 实体名不允许 - . 空格"""
+    return name.replace('-', '_').replace('.', '_').replace(' ', '_')
+
+
+def extract_prefix(name):
+    """表名前缀（第一个下划线之前），无前缀时归为 other"""
+    parts = name.split('_')
+    if len(parts) >= 2:
+        return parts[0]
+    return 'other'
+
+
+def build_relationships(table_names, fk_edges_raw, inferred_edges_raw,
+                        include_fk=True, include_inferred=False, threshold=0.6):
+    """合并外键与推断关系，过滤不在所选表内或低于阈值的边"""
+    table_set = set(table_names)
+    relationships = []
+
+    if include_fk:
+        for e in fk_edges_raw or []:
+            from_table = e.get("from_table")
+            to_table = e.get("to_table")
+            if from_table not in table_set or to_table not in table_set:
+                continue
+            relationships.append({
+                "source": from_table,
+                "target": to_table,
+                "kind": "fk",
+                "constraint": e.get("constraint_name", "")
+            })
+
+    if include_inferred:
+        for e in inferred_edges_raw or []:
+            src = e.get('source')
+            tgt = e.get('target')
+            conf = e.get('confidence', 0)
+            reason = e.get('reason', '')
+            if src not in table_set or tgt not in table_set:
+                continue
+            if conf < threshold:
+                continue
+            relationships.append({
+                "source": src,
+                "target": tgt,
+                "kind": "infer",
+                "confidence": conf,
+                "reason": reason
+            })
+
+    return relationships
+
+
+def classify_tables(table_names, relationships):
+    """
+    按关系数将表分为核心表 / 普通表 / 孤立表，并按前缀分组。
+
+    返回 dict：in_degree, out_degree, relation_counts, max_relations, core_threshold,
+    core_tables, normal_tables, isolated_tables, sorted_table_names, prefix_groups
+    """
+    in_degree = {t: 0 for t in table_names}
+    out_degree = {t: 0 for t in table_names}
+    for rel in relationships:
+        src, tgt = rel.get("source"), rel.get("target")
+        if src in out_degree:
+            out_degree[src] += 1
+        if tgt in in_degree:
+            in_degree[tgt] += 1
+
+    relation_counts = {t: in_degree[t] + out_degree[t] for t in table_names}
+    max_relations = max(relation_counts.values()) if relation_counts else 0
+    core_threshold = max(3, max_relations * 0.5)
+
+    core_tables = []
+    normal_tables = []
+    isolated_tables = []
+    for t in table_names:
+        rel_count = relation_counts.get(t, 0)
+        if rel_count >= core_threshold:
+            core_tables.append(t)
+        elif rel_count == 0:
+            isolated_tables.append(t)
+        else:
+            normal_tables.append(t)
+
+    # 核心表、普通表按关系数降序，孤立表按名称排序
+    core_tables.sort(key=lambda t: -relation_counts.get(t, 0))
+    normal_tables.sort(key=lambda t: -relation_counts.get(t, 0))
+    isolated_tables.sort()
+
+    prefix_groups = {}
+    for t in table_names:
+        prefix_groups.setdefault(extract_prefix(t), []).append(t)
+
+    return {
+        "in_degree": in_degree,
+        "out_degree": out_degree,
+        "relation_counts": relation_counts,
+        "max_relations": max_relations,
+        "core_threshold": core_threshold,
+        "core_tables": core_tables,
+        "normal_tables": normal_tables,
+        "isolated_tables": isolated_tables,
+        # 按优化顺序排列表：核心表 → 普通表 → 孤立表
+        "sorted_table_names": core_tables + normal_tables + isolated_tables,
+        "prefix_groups": prefix_groups,
+    }
+
+
+def apply_grouping(tables_data, table_names, grouping):
+    """将关系数、前缀、核心/孤立标记写回 tables_data"""
+    relation_counts = grouping["relation_counts"]
+    for t in table_names:
+        rel_count = relation_counts.get(t, 0)
+        tables_data[t]["in_degree"] = grouping["in_degree"].get(t, 0)
+        tables_data[t]["out_degree"] = grouping["out_degree"].get(t, 0)
+        tables_data[t]["relation_count"] = rel_count
+        tables_data[t]["prefix"] = extract_prefix(t)
+        tables_data[t]["is_isolated"] = rel_count == 0
+        tables_data[t]["is_core"] = rel_count >= grouping["core_threshold"]
+
+
+def build_mermaid_dsl(sorted_table_names, cols_by_table, relationships, core_tables, preview_limit=8):
+    """构造 Mermaid erDiagram DSL：表按给定顺序定义，涉及核心表的关系优先"""
+    mermaid_lines = ["erDiagram"]
+
+    for table_name in sorted_table_names:
+        cols = cols_by_table.get(table_name, [])
+        mermaid_lines.append(f"    {_safe_name(table_name)} {{")
+
+        for c, dt in cols[:preview_limit]:
+            c = str(c or '').strip()
+            dt = str(dt or '').strip()
+            if not c:
+                continue
+            mermaid_lines.append(f"        {dt} {_safe_name(c)}")
+
+        if len(cols) > preview_limit:
+            remaining = len(cols) - preview_limit
+            mermaid_lines.append(f"        string more \"...({remaining} more)\"")
+
+        mermaid_lines.append("    }")
+
+    core_set = set(core_tables)
+    core_rels = [r for r in relationships if r["source"] in core_set or r["target"] in core_set]
+    other_rels = [r for r in relationships if r["source"] not in core_set and r["target"] not in core_set]
+
+    for rel in core_rels + other_rels:
+        safe_src = _safe_name(rel["source"])
+        safe_tgt = _safe_name(rel["target"])
+        if rel["kind"] == "fk":
+            mermaid_lines.append(f"    {safe_src} ||--o{{ {safe_tgt} : \"FK\"")
+        else:
+            conf = rel.get("confidence", 0)
+            label = f"inferred({conf:.2f})"
+            mermaid_lines.append(f"    {safe_src} }}o..o{{ {safe_tgt} : \"{label}\"")
+
+    return "\n".join(mermaid_lines)
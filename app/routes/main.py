@@ -2,7 +2,9 @@
 主页面路由
 """
 
-from flask import Blueprint, render_template
+from flask import Blueprint, Response, render_template
+
+from ..utils.metrics import REGISTRY, CONTENT_TYPE
 
 main_bp = Blueprint('main', __name__)
 
@@ -22,4 +24,10 @@ def connections():
 @main_bp.route('/diagram')
 def diagram():
     """数据库关系图页面"""
-    return render_template('diagram.html')
\ No newline at end of file
+    return render_template('diagram.html')
+
+
+@main_bp.route('/metrics')
+def metrics():
+    """Prometheus 格式的应用内部指标"""
+    return Response(REGISTRY.render(), content_type=CONTENT_TYPE)
@@ -6,12 +6,17 @@ from .database import (
     connect_db,
     get_tables_and_views,
     get_tables_with_missing_stats,
+    get_table_comment,
+    get_table_comments,
     get_columns_info,
+    get_columns_info_batch,
     get_foreign_keys,
     get_all_columns,
+    get_indexes,
     get_databases,
     update_table_comment,
     update_column_comment,
+    get_query_stats,
 )
 from .ai_helper import infer_chinese_meaning, generate_markdown, get_openai_client
 
@@ -19,13 +24,18 @@ __all__ = [
     'connect_db',
     'get_tables_and_views',
     'get_tables_with_missing_stats',
+    'get_table_comment',
+    'get_table_comments',
     'get_columns_info',
+    'get_columns_info_batch',
     'get_foreign_keys',
     'get_all_columns',
+    'get_indexes',
     'infer_chinese_meaning',
     'generate_markdown',
     'get_openai_client',
     'get_databases',
     'update_table_comment',
-    'update_column_comment'
+    'update_column_comment',
+    'get_query_stats'
 ]
\ No newline at end of file
@@ -6,6 +6,7 @@ import json
 import re
 from openai import OpenAI
 from ..config import config
+from .metrics import metered_chat_completion
 
 
 def get_openai_client():
@@ -89,7 +90,8 @@ def infer_chinese_meaning(columns, table_name, db_description=""):
         
         print(f"正在调用AI推断表 {table_name_str} 的列含义...")
         
-        response = client.chat.completions.create(
+        response = metered_chat_completion(
+            client, 'field_meaning',
             model=model,
             messages=[
                 {"role": "system", "content": system_content},
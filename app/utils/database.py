@@ -2,12 +2,223 @@
 数据库连接和操作工具
 """
 
+import functools
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
 import mysql.connector
 import pyodbc
 
+from .metrics import DB_CONNECTIONS_OPEN, DB_STATEMENTS
+
+# SQLite 没有原生的表/字段注释，使用旁路表保存（column_name 为空字符串表示表注释）
+SQLITE_COMMENTS_TABLE = '_db2doc_comments'
+
+
+def _ensure_sqlite_comments_table(connection):
+    """确保 SQLite 注释旁路表存在"""
+    connection.execute(f"""
+    CREATE TABLE IF NOT EXISTS {SQLITE_COMMENTS_TABLE} (
+        table_name TEXT NOT NULL,
+        column_name TEXT NOT NULL DEFAULT '',
+        comment TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (table_name, column_name)
+    )
+    """)
+    connection.commit()
+
+
+def _split_sqlite_type(declared_type):
+    """
+    将 SQLite 声明类型拆分为 (data_type, character_maximum_length, numeric_precision, numeric_scale)，
+    与 information_schema.columns 的形状保持一致，如 VARCHAR(64) -> ('varchar', 64, None, None)
+    """
+    declared = (declared_type or '').strip().lower()
+    match = re.match(r'^([a-z ]+?)\s*\(\s*(\d+)\s*(?:,\s*(\d+)\s*)?\)', declared)
+    if not match:
+        return declared, None, None, None
+    base, first, second = match.group(1).strip(), int(match.group(2)), match.group(3)
+    if any(t in base for t in ('char', 'text', 'clob', 'binary')):
+        return base, first, None, None
+    return base, None, first, int(second) if second is not None else None
+
+
+# 列出 SQLite 用户表/视图（排除内部表与注释旁路表）
+_SQLITE_USER_OBJECTS = f"""
+    m.type IN ('table', 'view')
+    AND m.name NOT LIKE 'sqlite_%'
+    AND m.name != '{SQLITE_COMMENTS_TABLE}'
+"""
+
+
+class QueryStats:
+    """
+    查询统计：按逻辑操作（如 get_columns_info）记录调用次数、SQL 语句数、读取行数与耗时。
+
+    由 InstrumentedConnection 持有，经 track_operation 装饰的读取函数自动归类；
+    未归类的语句记入 'other'。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.operations = {}
+
+    def _entry(self, name):
+        entry = self.operations.get(name)
+        if entry is None:
+            entry = self.operations[name] = {"calls": 0, "statements": 0, "rows": 0, "seconds": 0.0}
+        return entry
+
+    @property
+    def current_operation(self):
+        stack = getattr(self._local, 'stack', None)
+        return stack[-1] if stack else 'other'
+
+    @contextmanager
+    def operation(self, name):
+        """将期间执行的语句归入指定逻辑操作（可嵌套，归入最内层）"""
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(name)
+        with self._lock:
+            self._entry(name)["calls"] += 1
+        try:
+            yield
+        finally:
+            stack.pop()
+
+    def record(self, statements=0, rows=0, seconds=0.0):
+        operation = self.current_operation
+        if statements:
+            DB_STATEMENTS.inc(statements, operation=operation)
+        with self._lock:
+            entry = self._entry(operation)
+            entry["statements"] += statements
+            entry["rows"] += rows
+            entry["seconds"] += seconds
+
+    @property
+    def statements(self):
+        return sum(e["statements"] for e in self.operations.values())
+
+    @property
+    def rows(self):
+        return sum(e["rows"] for e in self.operations.values())
+
+    def reset(self):
+        with self._lock:
+            self.operations = {}
+
+    def to_dict(self):
+        """导出为可序列化的报告"""
+        with self._lock:
+            operations = {
+                name: {**entry, "seconds": round(entry["seconds"], 4)}
+                for name, entry in sorted(self.operations.items())
+            }
+        return {
+            "statements": sum(e["statements"] for e in operations.values()),
+            "rows": sum(e["rows"] for e in operations.values()),
+            "seconds": round(sum(e["seconds"] for e in operations.values()), 4),
+            "operations": operations,
+        }
+
+
+class InstrumentedCursor:
+    """游标包装：统计 execute 语句数、fetch 行数与耗时，其余属性透传"""
+
+    def __init__(self, cursor, stats):
+        self._cursor = cursor
+        self._stats = stats
+
+    def execute(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.execute(*args, **kwargs)
+        finally:
+            self._stats.record(statements=1, seconds=time.perf_counter() - start)
+
+    def executemany(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._cursor.executemany(*args, **kwargs)
+        finally:
+            self._stats.record(statements=1, seconds=time.perf_counter() - start)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        result = getattr(self._cursor, method)(*args)
+        if method == 'fetchone':
+            rows = 1 if result is not None else 0
+        else:
+            rows = len(result)
+        self._stats.record(rows=rows, seconds=time.perf_counter() - start)
+        return result
+
+    def fetchone(self):
+        return self._fetch('fetchone')
+
+    def fetchmany(self, *args):
+        return self._fetch('fetchmany', *args)
+
+    def fetchall(self):
+        return self._fetch('fetchall')
+
+    def __iter__(self):
+        return iter(self.fetchall())
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class InstrumentedConnection:
+    """连接包装：cursor() 返回 InstrumentedCursor，统计结果见 query_stats"""
+
+    def __init__(self, connection, stats=None, db_type='unknown'):
+        self._connection = connection
+        self.query_stats = stats or QueryStats()
+        self.db_type = db_type
+        self._closed = False
+        DB_CONNECTIONS_OPEN.inc(db_type=db_type)
+
+    def cursor(self, *args, **kwargs):
+        return InstrumentedCursor(self._connection.cursor(*args, **kwargs), self.query_stats)
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            DB_CONNECTIONS_OPEN.dec(db_type=self.db_type)
+        return self._connection.close()
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+def get_query_stats(connection):
+    """获取连接上的查询统计（离线快照等未包装的连接返回 None）"""
+    return getattr(connection, 'query_stats', None)
+
+
+def track_operation(func):
+    """将读取函数内执行的语句归入以函数名命名的逻辑操作（第一个参数为连接）"""
+    @functools.wraps(func)
+    def wrapper(connection, *args, **kwargs):
+        stats = get_query_stats(connection)
+        if stats is None:
+            return func(connection, *args, **kwargs)
+        with stats.operation(func.__name__):
+            return func(connection, *args, **kwargs)
+    return wrapper
+
 
 def connect_db(host, user, password, port, database, db_type='mysql'):
-    """连接数据库"""
+    """连接数据库（除离线快照外均返回带查询统计的 InstrumentedConnection）"""
     try:
         if db_type == 'mysql':
             connection = mysql.connector.connect(
@@ -39,16 +250,28 @@ def connect_db(host, user, password, port, database, db_type='mysql'):
             connection.setdecoding(pyodbc.SQL_CHAR, encoding='utf-8')
             connection.setdecoding(pyodbc.SQL_WCHAR, encoding='utf-8')
             connection.setencoding(encoding='utf-8')
+        elif db_type == 'sqlite':
+            # SQLite：database 参数为数据库文件路径（用于本地测试与基准测试）
+            connection = sqlite3.connect(database, check_same_thread=False)
+            _ensure_sqlite_comments_table(connection)
+        elif db_type == 'snapshot':
+            # 离线快照：database 参数为快照文件路径，不访问任何数据库
+            from .snapshot import load_snapshot
+            return load_snapshot(database)
         else:
             raise ValueError(f"不支持的数据库类型: {db_type}")
         
-        return connection
+        return InstrumentedConnection(connection, db_type=db_type)
     except Exception as e:
         raise Exception(f"数据库连接失败: {str(e)}")
 
 
+@track_operation
 def get_tables_and_views(connection, database_name, db_type='mysql'):
     """获取数据库中的表和视图"""
+    if db_type == 'snapshot':
+        return connection.get_tables_and_views()
+
     cursor = connection.cursor()
     
     if db_type == 'mysql':
@@ -70,6 +293,17 @@ def get_tables_and_views(connection, database_name, db_type='mysql'):
         ORDER BY t.name
         """
         cursor.execute(query)
+    elif db_type == 'sqlite':
+        query = f"""
+        SELECT m.name AS table_name,
+               CASE WHEN m.type = 'table' THEN 'BASE TABLE' ELSE 'VIEW' END AS table_type,
+               IFNULL(c.comment, '') AS table_comment
+        FROM sqlite_master m
+        LEFT JOIN {SQLITE_COMMENTS_TABLE} c ON c.table_name = m.name AND c.column_name = ''
+        WHERE {_SQLITE_USER_OBJECTS}
+        ORDER BY m.name
+        """
+        cursor.execute(query)
     
     # 将Row对象转换为可序列化的列表
     results = cursor.fetchall()
@@ -80,6 +314,41 @@ def get_tables_and_views(connection, database_name, db_type='mysql'):
         return results
 
 
+@track_operation
+def get_table_comment(connection, table_name, database_name, db_type='mysql'):
+    """获取单张表的注释（不存在时返回空字符串）"""
+    if db_type == 'snapshot':
+        return connection.get_table_comment(table_name)
+
+    cursor = connection.cursor()
+    if db_type == 'mysql':
+        query = """
+        SELECT table_comment 
+        FROM information_schema.tables 
+        WHERE table_schema = %s AND table_name = %s
+        """
+        cursor.execute(query, (database_name, table_name))
+    elif db_type == 'sqlserver':
+        query = """
+        SELECT ISNULL(CAST(ep.value AS NVARCHAR(MAX)), '') as table_comment
+        FROM sys.tables t
+        LEFT JOIN sys.extended_properties ep ON ep.major_id = t.object_id AND ep.minor_id = 0 AND ep.name = 'MS_Description'
+        WHERE t.name = ?
+        """
+        cursor.execute(query, (table_name,))
+    elif db_type == 'sqlite':
+        query = f"SELECT comment FROM {SQLITE_COMMENTS_TABLE} WHERE table_name = ? AND column_name = ''"
+        cursor.execute(query, (table_name,))
+    else:
+        cursor.close()
+        raise ValueError(f"不支持的数据库类型: {db_type}")
+
+    row = cursor.fetchone()
+    cursor.close()
+    return (row[0] or '') if row else ''
+
+
+@track_operation
 def get_tables_with_missing_stats(connection, database_name, db_type='mysql'):
     """
     获取数据库表/视图列表，并聚合返回“注释缺失”统计（用于主界面表列表一次性渲染，避免逐表请求）。
@@ -92,6 +361,9 @@ def get_tables_with_missing_stats(connection, database_name, db_type='mysql'):
     - missing_columns_count: int
     - missing_total: int
     """
+    if db_type == 'snapshot':
+        return connection.get_tables_with_missing_stats()
+
     cursor = connection.cursor()
 
     if db_type == 'mysql':
@@ -171,6 +443,39 @@ def get_tables_with_missing_stats(connection, database_name, db_type='mysql'):
             })
         return result
 
+    if db_type == 'sqlite':
+        # SQLite：pragma_table_info 表值函数 + 注释旁路表，一次聚合
+        query = f"""
+        SELECT
+            m.name AS table_name,
+            CASE WHEN m.type = 'table' THEN 'BASE TABLE' ELSE 'VIEW' END AS table_type,
+            IFNULL(tc.comment, '') AS table_comment,
+            SUM(CASE WHEN IFNULL(cc.comment, '') = '' THEN 1 ELSE 0 END) AS missing_columns_count
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        LEFT JOIN {SQLITE_COMMENTS_TABLE} tc ON tc.table_name = m.name AND tc.column_name = ''
+        LEFT JOIN {SQLITE_COMMENTS_TABLE} cc ON cc.table_name = m.name AND cc.column_name = p.name
+        WHERE {_SQLITE_USER_OBJECTS}
+        GROUP BY m.name, m.type, tc.comment
+        ORDER BY m.name
+        """
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        cursor.close()
+        result = []
+        for table_name, table_type, table_comment, missing_columns_count in rows:
+            missing_columns_count = int(missing_columns_count or 0)
+            missing_table_comment = (not (table_comment or '').strip())
+            result.append({
+                "table_name": table_name,
+                "table_type": table_type,
+                "table_comment": table_comment or '',
+                "missing_table_comment": missing_table_comment,
+                "missing_columns_count": missing_columns_count,
+                "missing_total": (1 if missing_table_comment else 0) + missing_columns_count,
+            })
+        return result
+
     raise ValueError(f"不支持的数据库类型: {db_type}")
 
 
@@ -222,28 +527,21 @@ def get_databases(host, user, password, port, db_type='mysql'):
             cursor.close()
             connection.close()
             return databases
+        elif db_type == 'sqlite':
+            # SQLite：host 视为数据库文件所在目录，列出其中的数据库文件
+            directory = host or '.'
+            return sorted(
+                os.path.join(directory, name) for name in os.listdir(directory)
+                if name.lower().endswith(('.db', '.sqlite', '.sqlite3'))
+            )
         else:
             raise ValueError(f"不支持的数据库类型: {db_type}")
     except Exception as e:
         raise Exception(f"获取数据库列表失败: {str(e)}")
 
 
-def get_columns_info(connection, table_name, database_name, db_type='mysql'):
-    """获取表的列信息"""
-    cursor = connection.cursor()
-    
-    if db_type == 'mysql':
-        query = """
-        SELECT column_name, data_type, is_nullable, column_default, 
-               column_comment, character_maximum_length, numeric_precision, numeric_scale
-        FROM information_schema.columns 
-        WHERE table_schema = %s AND table_name = %s 
-        ORDER BY ordinal_position
-        """
-        cursor.execute(query, (database_name, table_name))
-    elif db_type == 'sqlserver':
-        query = """
-        SELECT c.name as column_name,
+# SQL Server 列信息查询（字段顺序与 information_schema.columns 一致）
+_SQLSERVER_COLUMNS_SELECT = """c.name as column_name,
                t.name as data_type,
                CASE WHEN c.is_nullable = 1 THEN 'YES' ELSE 'NO' END as is_nullable,
                ISNULL(CAST(dc.definition AS NVARCHAR(MAX)), '') as column_default,
@@ -265,11 +563,50 @@ def get_columns_info(connection, table_name, database_name, db_type='mysql'):
         INNER JOIN sys.tables tb ON c.object_id = tb.object_id
         LEFT JOIN sys.default_constraints dc ON c.default_object_id = dc.object_id
         LEFT JOIN sys.extended_properties ep ON ep.major_id = c.object_id AND ep.minor_id = c.column_id AND ep.name = 'MS_Description'
+"""
+
+
+@track_operation
+def get_columns_info(connection, table_name, database_name, db_type='mysql'):
+    """获取表的列信息"""
+    if db_type == 'snapshot':
+        return connection.get_columns_info(table_name)
+
+    cursor = connection.cursor()
+    
+    if db_type == 'mysql':
+        query = """
+        SELECT column_name, data_type, is_nullable, column_default, 
+               column_comment, character_maximum_length, numeric_precision, numeric_scale
+        FROM information_schema.columns 
+        WHERE table_schema = %s AND table_name = %s 
+        ORDER BY ordinal_position
+        """
+        cursor.execute(query, (database_name, table_name))
+    elif db_type == 'sqlserver':
+        query = f"""
+        SELECT {_SQLSERVER_COLUMNS_SELECT}
         WHERE tb.name = ? 
         AND t.name NOT IN ('sql_variant', 'xml', 'geometry', 'geography', 'hierarchyid')
         ORDER BY c.column_id
         """
         cursor.execute(query, (table_name,))
+    elif db_type == 'sqlite':
+        query = f"""
+        SELECT p.name, p.type, p."notnull", p.dflt_value, IFNULL(c.comment, '')
+        FROM pragma_table_info(?) p
+        LEFT JOIN {SQLITE_COMMENTS_TABLE} c ON c.table_name = ? AND c.column_name = p.name
+        ORDER BY p.cid
+        """
+        cursor.execute(query, (table_name, table_name))
+        results = []
+        for name, declared_type, notnull, default, comment in cursor.fetchall():
+            data_type, char_len, precision, scale = _split_sqlite_type(declared_type)
+            results.append((
+                name, data_type, 'NO' if notnull else 'YES', default, comment, char_len, precision, scale
+            ))
+        cursor.close()
+        return results
     
     # 将Row对象转换为可序列化的列表
     results = cursor.fetchall()
@@ -280,8 +617,91 @@ def get_columns_info(connection, table_name, database_name, db_type='mysql'):
         return results
 
 
+# 批量读取时 IN 子句每批的表数量
+_BATCH_TABLES = 500
+
+
+@track_operation
+def get_columns_info_batch(connection, database_name, db_type='mysql', tables=None):
+    """
+    批量获取多张表的列信息（避免逐表查询的 N+1）。
+
+    返回 dict: {table_name: [与 get_columns_info 相同形状的列元组]}；
+    tables 为空时返回全部表。
+    """
+    if db_type == 'snapshot':
+        names = tables or [t[0] for t in connection.get_tables_and_views()]
+        return {t: connection.get_columns_info(t) for t in names}
+
+    table_list = [t for t in (tables or []) if t]
+    # 按批拼接 IN 子句；未指定表时单次读取整个 schema
+    batches = [table_list[i:i + _BATCH_TABLES] for i in range(0, len(table_list), _BATCH_TABLES)] or [None]
+
+    result = {t: [] for t in table_list}
+    cursor = connection.cursor()
+    if db_type == 'mysql':
+        for batch in batches:
+            table_clause = f"AND table_name IN ({', '.join(['%s'] * len(batch))})" if batch else ''
+            cursor.execute(f"""
+            SELECT table_name, column_name, data_type, is_nullable, column_default,
+                   column_comment, character_maximum_length, numeric_precision, numeric_scale
+            FROM information_schema.columns
+            WHERE table_schema = %s {table_clause}
+            ORDER BY table_name, ordinal_position
+            """, (database_name, *(batch or [])))
+            for row in cursor.fetchall():
+                result.setdefault(row[0], []).append(tuple(row[1:]))
+    elif db_type == 'sqlserver':
+        for batch in batches:
+            table_clause = f"AND tb.name IN ({', '.join(['?'] * len(batch))})" if batch else ''
+            cursor.execute(f"""
+            SELECT tb.name as table_name, {_SQLSERVER_COLUMNS_SELECT}
+            WHERE t.name NOT IN ('sql_variant', 'xml', 'geometry', 'geography', 'hierarchyid')
+            {table_clause}
+            ORDER BY tb.name, c.column_id
+            """, tuple(batch or []))
+            for row in cursor.fetchall():
+                result.setdefault(row[0], []).append(tuple(row[1:]))
+    elif db_type == 'sqlite':
+        cursor.execute(f"""
+        SELECT m.name, p.name, p.type, p."notnull", p.dflt_value, IFNULL(c.comment, '')
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        LEFT JOIN {SQLITE_COMMENTS_TABLE} c ON c.table_name = m.name AND c.column_name = p.name
+        WHERE {_SQLITE_USER_OBJECTS}
+        ORDER BY m.name, p.cid
+        """)
+        table_filter = set(table_list)
+        for table_name, name, declared_type, notnull, default, comment in cursor.fetchall():
+            if table_filter and table_name not in table_filter:
+                continue
+            data_type, char_len, precision, scale = _split_sqlite_type(declared_type)
+            result.setdefault(table_name, []).append((
+                name, data_type, 'NO' if notnull else 'YES', default, comment, char_len, precision, scale
+            ))
+    else:
+        cursor.close()
+        raise ValueError(f"不支持的数据库类型: {db_type}")
+    cursor.close()
+    return result
+
+
+def get_table_comments(connection, database_name, db_type='mysql', tables=None):
+    """批量获取表注释（单次读取表列表），返回 {table_name: comment}"""
+    table_filter = set(t for t in (tables or []) if t)
+    return {
+        row[0]: (row[2] if len(row) > 2 else '') or ''
+        for row in get_tables_and_views(connection, database_name, db_type)
+        if not table_filter or row[0] in table_filter
+    }
+
+
+@track_operation
 def update_table_comment(connection, table_name, database_name, comment, db_type='mysql'):
     """更新表注释"""
+    if db_type == 'snapshot':
+        raise ValueError("离线快照为只读，无法写入注释")
+
     cursor = connection.cursor()
     
     if db_type == 'mysql':
@@ -316,13 +736,20 @@ def update_table_comment(connection, table_name, database_name, comment, db_type
                 @level1type = N'TABLE', @level1name = ?;
             """
         cursor.execute(update_query, (comment, table_name))
+    elif db_type == 'sqlite':
+        query = f"INSERT OR REPLACE INTO {SQLITE_COMMENTS_TABLE} (table_name, column_name, comment) VALUES (?, '', ?)"
+        cursor.execute(query, (table_name, comment))
     
     connection.commit()
     cursor.close()
 
 
+@track_operation
 def update_column_comment(connection, table_name, database_name, column_name, comment, db_type='mysql'):
     """更新字段注释"""
+    if db_type == 'snapshot':
+        raise ValueError("离线快照为只读，无法写入注释")
+
     cursor = connection.cursor()
     
     if db_type == 'mysql':
@@ -371,14 +798,18 @@ def update_column_comment(connection, table_name, database_name, column_name, co
                 @level2type = N'COLUMN', @level2name = ?;
             """
         cursor.execute(update_query, (comment, table_name, column_name))
+    elif db_type == 'sqlite':
+        query = f"INSERT OR REPLACE INTO {SQLITE_COMMENTS_TABLE} (table_name, column_name, comment) VALUES (?, ?, ?)"
+        cursor.execute(query, (table_name, column_name, comment))
     
     connection.commit()
     cursor.close()
 
 
+@track_operation
 def get_foreign_keys(connection, database_name, db_type='mysql', tables=None):
     """
-    获取外键关系（目前第一版仅实现 MySQL）。
+    获取外键关系（目前实现 MySQL 与 SQLite）。
 
     返回 list[dict]:
     - from_table: str
@@ -386,25 +817,44 @@ def get_foreign_keys(connection, database_name, db_type='mysql', tables=None):
     - constraint_name: str
     - columns: list[dict] { from_column, to_column, ordinal_position }
     """
-    if db_type != 'mysql':
+    if db_type == 'snapshot':
+        return connection.get_foreign_keys(tables)
+    if db_type not in ('mysql', 'sqlite'):
         raise ValueError(f"暂不支持的数据库类型: {db_type}")
 
     cursor = connection.cursor()
-    # information_schema.KEY_COLUMN_USAGE 仅在存在外键时 REFERENCED_* 不为空
-    query = """
-    SELECT
-        kcu.TABLE_NAME,
-        kcu.REFERENCED_TABLE_NAME,
-        kcu.CONSTRAINT_NAME,
-        kcu.COLUMN_NAME,
-        kcu.REFERENCED_COLUMN_NAME,
-        kcu.ORDINAL_POSITION
-    FROM information_schema.KEY_COLUMN_USAGE kcu
-    WHERE kcu.CONSTRAINT_SCHEMA = %s
-      AND kcu.REFERENCED_TABLE_NAME IS NOT NULL
-    ORDER BY kcu.TABLE_NAME, kcu.CONSTRAINT_NAME, kcu.ORDINAL_POSITION
-    """
-    cursor.execute(query, (database_name,))
+    if db_type == 'mysql':
+        # information_schema.KEY_COLUMN_USAGE 仅在存在外键时 REFERENCED_* 不为空
+        query = """
+        SELECT
+            kcu.TABLE_NAME,
+            kcu.REFERENCED_TABLE_NAME,
+            kcu.CONSTRAINT_NAME,
+            kcu.COLUMN_NAME,
+            kcu.REFERENCED_COLUMN_NAME,
+            kcu.ORDINAL_POSITION
+        FROM information_schema.KEY_COLUMN_USAGE kcu
+        WHERE kcu.CONSTRAINT_SCHEMA = %s
+          AND kcu.REFERENCED_TABLE_NAME IS NOT NULL
+        ORDER BY kcu.TABLE_NAME, kcu.CONSTRAINT_NAME, kcu.ORDINAL_POSITION
+        """
+        cursor.execute(query, (database_name,))
+    else:
+        # SQLite：外键未指定目标列时引用目标表主键
+        query = f"""
+        SELECT
+            m.name,
+            f."table",
+            'fk_' || m.name || '_' || f.id,
+            f."from",
+            IFNULL(f."to", (SELECT p.name FROM pragma_table_info(f."table") p WHERE p.pk = f.seq + 1)),
+            f.seq + 1
+        FROM sqlite_master m
+        JOIN pragma_foreign_key_list(m.name) f
+        WHERE {_SQLITE_USER_OBJECTS}
+        ORDER BY m.name, f.id, f.seq
+        """
+        cursor.execute(query)
     rows = cursor.fetchall()
     cursor.close()
 
@@ -432,6 +882,7 @@ def get_foreign_keys(connection, database_name, db_type='mysql', tables=None):
     return list(grouped.values())
 
 
+@track_operation
 def get_all_columns(connection, database_name, db_type='mysql', tables=None):
     """
     获取 schema 下所有表的列信息（用于关系推断，避免逐表查询）。
@@ -439,22 +890,124 @@ def get_all_columns(connection, database_name, db_type='mysql', tables=None):
     返回 list[tuple]:
     (table_name, column_name, data_type, column_comment)
     """
-    if db_type != 'mysql':
+    if db_type == 'snapshot':
+        return connection.get_all_columns(tables)
+    if db_type not in ('mysql', 'sqlite'):
         raise ValueError(f"暂不支持的数据库类型: {db_type}")
 
     cursor = connection.cursor()
-    query = """
-    SELECT table_name, column_name, data_type, IFNULL(column_comment, '')
-    FROM information_schema.columns
-    WHERE table_schema = %s
-    ORDER BY table_name, ordinal_position
-    """
-    cursor.execute(query, (database_name,))
-    rows = cursor.fetchall()
+    if db_type == 'mysql':
+        query = """
+        SELECT table_name, column_name, data_type, IFNULL(column_comment, '')
+        FROM information_schema.columns
+        WHERE table_schema = %s
+        ORDER BY table_name, ordinal_position
+        """
+        cursor.execute(query, (database_name,))
+        rows = cursor.fetchall()
+    else:
+        query = f"""
+        SELECT m.name, p.name, p.type, IFNULL(c.comment, '')
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        LEFT JOIN {SQLITE_COMMENTS_TABLE} c ON c.table_name = m.name AND c.column_name = p.name
+        WHERE {_SQLITE_USER_OBJECTS}
+        ORDER BY m.name, p.cid
+        """
+        cursor.execute(query)
+        rows = [(t, c, _split_sqlite_type(dt)[0], comment) for t, c, dt, comment in cursor.fetchall()]
     cursor.close()
 
     if not tables:
         return rows
 
     table_filter = set([t for t in tables if t])
-    return [r for r in rows if r[0] in table_filter]
\ No newline at end of file
+    return [r for r in rows if r[0] in table_filter]
+
+@track_operation
+def get_indexes(connection, database_name, db_type='mysql', tables=None):
+    """
+    获取 schema 下所有表的索引信息（含主键、唯一索引），单次查询。
+
+    返回 list[dict]:
+    - table_name: str
+    - index_name: str
+    - is_primary: bool
+    - is_unique: bool
+    - columns: list[str]（按索引内顺序）
+    """
+    if db_type == 'snapshot':
+        return connection.get_indexes(tables)
+
+    cursor = connection.cursor()
+    if db_type == 'mysql':
+        query = """
+        SELECT TABLE_NAME, INDEX_NAME, NON_UNIQUE, COLUMN_NAME, SEQ_IN_INDEX
+        FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s
+        ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+        """
+        cursor.execute(query, (database_name,))
+        rows = [
+            (r[0], r[1], r[1] == 'PRIMARY', not int(r[2] or 0), r[3])
+            for r in cursor.fetchall()
+        ]
+    elif db_type == 'sqlserver':
+        query = """
+        SELECT t.name, i.name, i.is_primary_key, i.is_unique, c.name
+        FROM sys.indexes i
+        INNER JOIN sys.tables t ON t.object_id = i.object_id
+        INNER JOIN sys.index_columns ic ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        INNER JOIN sys.columns c ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE t.is_ms_shipped = 0 AND i.type > 0 AND ic.is_included_column = 0
+        ORDER BY t.name, i.name, ic.key_ordinal
+        """
+        cursor.execute(query)
+        rows = [(r[0], r[1], bool(r[2]), bool(r[3]), r[4]) for r in cursor.fetchall()]
+    elif db_type == 'sqlite':
+        # 显式索引（含 origin='pk' 的主键自动索引）
+        query = f"""
+        SELECT m.name, il.name, il.origin = 'pk', il."unique", ii.name
+        FROM sqlite_master m
+        JOIN pragma_index_list(m.name) il
+        JOIN pragma_index_info(il.name) ii
+        WHERE m.type = 'table' AND {_SQLITE_USER_OBJECTS}
+        ORDER BY m.name, il.name, ii.seqno
+        """
+        cursor.execute(query)
+        rows = [(r[0], r[1], bool(r[2]), bool(r[3]), r[4]) for r in cursor.fetchall()]
+        # INTEGER PRIMARY KEY（rowid 别名）没有独立索引，从 pragma_table_info 补齐
+        tables_with_pk_index = {r[0] for r in rows if r[2]}
+        cursor.execute(f"""
+        SELECT m.name, p.name
+        FROM sqlite_master m
+        JOIN pragma_table_info(m.name) p
+        WHERE m.type = 'table' AND p.pk > 0 AND {_SQLITE_USER_OBJECTS}
+        ORDER BY m.name, p.pk
+        """)
+        for table_name, column_name in cursor.fetchall():
+            if table_name not in tables_with_pk_index:
+                rows.append((table_name, 'PRIMARY', True, True, column_name))
+    else:
+        cursor.close()
+        raise ValueError(f"不支持的数据库类型: {db_type}")
+    cursor.close()
+
+    table_filter = set([t for t in (tables or []) if t]) if tables else None
+
+    grouped = {}
+    for table_name, index_name, is_primary, is_unique, column_name in rows:
+        if table_filter is not None and table_name not in table_filter:
+            continue
+        key = (table_name, index_name)
+        if key not in grouped:
+            grouped[key] = {
+                "table_name": table_name,
+                "index_name": index_name,
+                "is_primary": bool(is_primary),
+                "is_unique": bool(is_unique or is_primary),
+                "columns": []
+            }
+        grouped[key]["columns"].append(column_name)
+
+    return list(grouped.values())
@@ -0,0 +1,366 @@
+"""
+数据证据层：抽样包含依赖检查（可选，成本有上限）
+
+对候选外键 child.col -> parent.key：
+1. 从子表列抽样若干 distinct 值（每个子列只抽样一次）
+2. 以参数化 IN 查询探测父表键列，计算包含率（命中的 distinct 值 / 抽样值）
+3. 按包含率更新候选置信度；可选地为命名规则未覆盖的 ID 类列发现新关系（如 buyer -> user.id）
+
+探测在连接池上并行执行，每条语句有超时，整个阶段受全局预算（语句数 / 累计耗时）约束。
+离线快照没有数据，不支持该阶段。
+"""
+
+import threading
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from .database import track_operation
+
+# 支持数据探测的数据库类型
+PROBE_DB_TYPES = ('mysql', 'sqlserver', 'sqlite')
+
+_INT_TYPES = ('int', 'integer', 'bigint', 'smallint', 'tinyint', 'mediumint', 'number', 'numeric', 'decimal')
+_STR_TYPES = ('char', 'varchar', 'nvarchar', 'nchar', 'text', 'uuid', 'uniqueidentifier')
+
+
+class ProbeBudget:
+    """全局数据库负载预算：最多执行的语句数与累计查询耗时（秒），线程安全"""
+
+    def __init__(self, max_queries=200, max_seconds=30.0):
+        self.max_queries = max_queries
+        self.max_seconds = max_seconds
+        self._lock = threading.Lock()
+        self.queries = 0
+        self.seconds = 0.0
+        self.timeouts = 0
+        self.errors = 0
+
+    def acquire(self):
+        """预留一次查询额度，预算耗尽时返回 False"""
+        with self._lock:
+            if self.queries >= self.max_queries or self.seconds >= self.max_seconds:
+                return False
+            self.queries += 1
+            return True
+
+    def spend(self, seconds, timed_out=False, failed=False):
+        with self._lock:
+            self.seconds += seconds
+            self.timeouts += 1 if timed_out else 0
+            self.errors += 1 if failed and not timed_out else 0
+
+    @property
+    def exhausted(self):
+        with self._lock:
+            return self.queries >= self.max_queries or self.seconds >= self.max_seconds
+
+    def to_dict(self):
+        with self._lock:
+            return {
+                "queries": self.queries,
+                "max_queries": self.max_queries,
+                "seconds": round(self.seconds, 4),
+                "max_seconds": self.max_seconds,
+                "timeouts": self.timeouts,
+                "errors": self.errors,
+            }
+
+
+class ConnectionPool:
+    """简单连接池：按需通过 factory 创建，最多 size 个连接"""
+
+    def __init__(self, factory, size=4):
+        self.factory = factory
+        self.size = size
+        self._idle = queue.Queue()
+        self._created = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def connection(self):
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                conn = self.factory() if len(self._created) < self.size else None
+                if conn is not None:
+                    self._created.append(conn)
+            if conn is None:
+                conn = self._idle.get()
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def close_all(self):
+        with self._lock:
+            connections, self._created = self._created, []
+        for conn in connections:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+
+def quote_identifier(name, db_type):
+    """按数据库类型引用标识符"""
+    if db_type == 'mysql':
+        return '`' + str(name).replace('`', '``') + '`'
+    if db_type == 'sqlserver':
+        return '[' + str(name).replace(']', ']]') + ']'
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def type_family(data_type):
+    """数据类型族：int / str / None（不适合作为键）"""
+    dt = (data_type or '').lower()
+    if any(t in dt for t in _STR_TYPES):
+        return 'str'
+    if any(t in dt for t in _INT_TYPES):
+        return 'int'
+    return None
+
+
+def _raw_connection(connection):
+    return getattr(connection, '_connection', connection)
+
+
+@contextmanager
+def statement_timeout(connection, db_type, seconds):
+    """单条语句超时：SQLite 通过进度回调中断，MySQL 使用 MAX_EXECUTION_TIME，SQL Server 使用连接超时"""
+    raw = _raw_connection(connection)
+    if not seconds:
+        yield
+        return
+    if db_type == 'sqlite':
+        deadline = time.perf_counter() + seconds
+        raw.set_progress_handler(lambda: 1 if time.perf_counter() > deadline else 0, 1000)
+        try:
+            yield
+        finally:
+            raw.set_progress_handler(None, 1000)
+    elif db_type == 'mysql':
+        cursor = raw.cursor()
+        cursor.execute(f"SET SESSION MAX_EXECUTION_TIME = {int(seconds * 1000)}")
+        cursor.close()
+        yield
+    elif db_type == 'sqlserver':
+        raw.timeout = max(1, int(seconds))
+        yield
+    else:
+        yield
+
+
+@track_operation
+def sample_distinct_values(connection, db_type, table, column, limit=50):
+    """抽样子表列的 distinct 非空值"""
+    col = quote_identifier(column, db_type)
+    tbl = quote_identifier(table, db_type)
+    if db_type == 'sqlserver':
+        query = f"SELECT DISTINCT TOP {int(limit)} {col} FROM {tbl} WHERE {col} IS NOT NULL"
+    else:
+        query = f"SELECT DISTINCT {col} FROM {tbl} WHERE {col} IS NOT NULL LIMIT {int(limit)}"
+    cursor = connection.cursor()
+    cursor.execute(query)
+    return [r[0] for r in cursor.fetchall()]
+
+
+@track_operation
+def probe_containment(connection, db_type, table, column, values):
+    """参数化 IN 探测：返回 values 中存在于 table.column 的 distinct 值个数"""
+    if not values:
+        return 0
+    placeholder = '%s' if db_type == 'mysql' else '?'
+    col = quote_identifier(column, db_type)
+    query = (
+        f"SELECT COUNT(DISTINCT {col}) FROM {quote_identifier(table, db_type)} "
+        f"WHERE {col} IN ({', '.join([placeholder] * len(values))})"
+    )
+    cursor = connection.cursor()
+    cursor.execute(query, tuple(values))
+    row = cursor.fetchone()
+    return int(row[0] or 0) if row else 0
+
+
+def apply_evidence(candidate, ev):
+    """按包含率证据更新候选：置信度 = 规则分 40% + 包含率 60%"""
+    candidate["evidence"] = ev
+    candidate["confidence"] = round(candidate["confidence"] * 0.4 + ev["containment"] * 0.6, 2)
+    target = f"{candidate['target']}.{candidate['to_column']}"
+    if ev.get("method") == 'sketch':
+        detail = f"值草图估计 {target} 包含约 {ev['containment']:.0%} 的取值"
+    else:
+        detail = f"抽样 {ev['sampled']} 个值，{ev['matched']} 个存在于 {target}（包含率 {ev['containment']:.0%}）"
+    candidate["reason"] = f"{candidate['reason']}；{detail}"
+    candidate["infer_type"] = candidate.get("infer_type", "rule") + "+data"
+    return candidate
+
+
+def discovery_pairs(cols_by_table, candidates):
+    """
+    按数据发现关系的候选对 (child_table, child_column, parent_table, parent_column)
+
+    父表为存在 id 列的表；子列为命名规则未覆盖、与父表 id 类型同族的列
+    """
+    covered = {(c["source"], c.get("from_column")) for c in candidates}
+    parents = {}
+    for table, cols in cols_by_table.items():
+        for col, dt in cols:
+            if (col or '').lower() == 'id' and type_family(dt):
+                parents[table] = (col, type_family(dt))
+
+    for table, cols in cols_by_table.items():
+        for col, dt in cols:
+            family = type_family(dt)
+            if not family or (col or '').lower() == 'id' or (table, col) in covered:
+                continue
+            for parent, (parent_col, parent_family) in parents.items():
+                if parent != table and parent_family == family:
+                    yield (table, col, parent, parent_col)
+
+
+def edges_from_evidence(evidence, min_containment=0.95):
+    """
+    由 {(child_table, child_column, parent_table, parent_column): ev} 生成数据发现的关系
+
+    多个父表都满足包含率时视为证据不足：唯一 0.7，2~3 个 0.55，更多则放弃
+    """
+    matches = {}
+    for (table, col, parent, parent_col), ev in evidence.items():
+        if ev is not None and ev["containment"] >= min_containment:
+            matches.setdefault((table, col), []).append((parent, parent_col, ev))
+
+    discovered = []
+    for (table, col), found in matches.items():
+        if len(found) > 3:
+            continue
+        confidence = 0.7 if len(found) == 1 else 0.55
+        for parent, parent_col, ev in found:
+            if ev.get("method") == 'sketch':
+                detail = f"字段 {col} 的取值草图与 {parent}.{parent_col} 高度包含（约 {ev['containment']:.0%}）"
+            else:
+                detail = f"字段 {col} 的抽样值（{ev['matched']}/{ev['sampled']}）均存在于 {parent}.{parent_col}"
+            discovered.append({
+                "source": table,
+                "target": parent,
+                "confidence": confidence,
+                "reason": detail + (f"；存在 {len(found)} 个候选表" if len(found) > 1 else ""),
+                "from_column": col,
+                "to_column": parent_col,
+                "infer_type": "data",
+                "evidence": ev,
+            })
+    return discovered
+
+
+class InclusionProbe:
+    """
+    抽样包含依赖检查
+
+    connect: 无参函数，返回新的数据库连接（如 lambda: connect_db(...)）
+    """
+
+    def __init__(self, connect, db_type, sample_size=50, max_workers=4, query_timeout=2.0,
+                 budget=None, min_sample=5, max_candidates=200):
+        if db_type not in PROBE_DB_TYPES:
+            raise ValueError(f"数据探测不支持的数据库类型: {db_type}")
+        self.db_type = db_type
+        self.pool = ConnectionPool(connect, max_workers)
+        self.max_workers = max_workers
+        self.sample_size = sample_size
+        self.query_timeout = query_timeout
+        self.budget = budget or ProbeBudget()
+        self.min_sample = min_sample
+        self.max_candidates = max_candidates
+        self._samples = {}
+        self._samples_lock = threading.Lock()
+
+    def _run(self, func, *args):
+        """在池化连接上执行一次受预算与超时约束的查询，预算耗尽或失败时返回 None"""
+        if not self.budget.acquire():
+            return None
+        start = time.perf_counter()
+        timed_out = failed = False
+        try:
+            with self.pool.connection() as conn, statement_timeout(conn, self.db_type, self.query_timeout):
+                return func(conn, self.db_type, *args)
+        except Exception as e:
+            failed = True
+            timed_out = 'interrupt' in str(e).lower() or 'timeout' in str(e).lower() or 'max_execution_time' in str(e).lower()
+            print(f"[数据探测] {func.__name__}{args[:2]} 失败: {e}")
+            return None
+        finally:
+            self.budget.spend(time.perf_counter() - start, timed_out=timed_out, failed=failed)
+
+    def sample(self, table, column):
+        key = (table, column)
+        with self._samples_lock:
+            if key in self._samples:
+                return self._samples[key]
+        values = self._run(sample_distinct_values, table, column, self.sample_size)
+        with self._samples_lock:
+            self._samples[key] = values
+        return values
+
+    def containment(self, child_table, child_column, parent_table, parent_column):
+        """包含率证据：{sampled, matched, containment}，样本不足或查询失败时返回 None"""
+        values = self.sample(child_table, child_column)
+        if not values or len(values) < self.min_sample:
+            return None
+        matched = self._run(probe_containment, parent_table, parent_column, values)
+        if matched is None:
+            return None
+        return {
+            "sampled": len(values),
+            "matched": matched,
+            "containment": round(matched / len(values), 4),
+        }
+
+    def _collect(self, pairs):
+        """并行收集 [(child_table, child_column, parent_table, parent_column)] 的证据"""
+        pairs = list(dict.fromkeys(pairs))
+        # 先并行抽样所有子列，再并行探测
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda key: self.sample(*key), dict.fromkeys((p[0], p[1]) for p in pairs)))
+            results = list(executor.map(lambda p: self.containment(*p), pairs))
+        return dict(zip(pairs, results))
+
+    def score(self, candidates):
+        """
+        按包含率更新候选置信度（规则分 40% + 包含率 60%），返回重新排序的候选列表
+
+        仅处理前 max_candidates 个有目标键列的候选；证据写入候选的 evidence 字段
+        """
+        to_probe = [c for c in candidates if c.get("to_column") and c.get("from_column")][:self.max_candidates]
+        evidence = self._collect((c["source"], c["from_column"], c["target"], c["to_column"]) for c in to_probe)
+        for c in to_probe:
+            ev = evidence.get((c["source"], c["from_column"], c["target"], c["to_column"]))
+            if ev is not None:
+                apply_evidence(c, ev)
+        result = list(candidates)
+        result.sort(key=lambda x: -x["confidence"])
+        return result
+
+    def discover(self, cols_by_table, candidates, max_pairs=200, min_containment=0.95):
+        """
+        为命名规则未覆盖的 ID 类列发现关系（如 buyer -> user.id）
+
+        父表为存在 id 列的表，子列需与父表 id 类型同族；最多探测 max_pairs 对。
+        多个父表都满足包含率时视为证据不足：唯一 0.7，2~3 个 0.55，更多则放弃。
+        """
+        pairs = []
+        for pair in discovery_pairs(cols_by_table, candidates):
+            pairs.append(pair)
+            if len(pairs) >= max_pairs:
+                break
+        evidence = self._collect(pairs)
+        return edges_from_evidence(evidence, min_containment)
+
+    def report(self):
+        """本次探测的资源消耗"""
+        return self.budget.to_dict()
+
+    def close(self):
+        self.pool.close_all()
@@ -0,0 +1,218 @@
+"""
+共享任务存储（SQLite）
+
+多 worker 部署时，任务状态、进度事件与缓存保存在本地 SQLite 文件中，
+任意 worker 都可以为其他 worker 启动的任务提供 /api/logs 事件流。
+
+- jobs: 任务（kind、status、result）
+- job_events: 任务事件（日志行、PROGRESS、TIMING 等，自增 id 即 SSE 事件 id）
+- kv_cache: 通用键值缓存（按 namespace 划分，可设置过期时间）
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+
+# 默认存储位置（可通过环境变量 DB2DOC_JOB_STORE 指定）
+DEFAULT_JOB_STORE_PATH = Path(__file__).resolve().parents[2] / 'data' / 'runtime' / 'jobs.db'
+
+JOB_RUNNING = 'running'
+JOB_COMPLETE = 'complete'
+JOB_ERROR = 'error'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS job_events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job_id TEXT NOT NULL,
+    message TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_job_events_job ON job_events (job_id, id);
+CREATE TABLE IF NOT EXISTS kv_cache (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    expires_at REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+
+class JobStore:
+    """基于 SQLite 的任务/事件/缓存存储，可跨进程共享（WAL 模式）"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        if self.path != ':memory:':
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        # 每个进程、每个线程各自持有连接（fork 后不复用父进程的连接）
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.execute('PRAGMA busy_timeout=30000')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    # ========== 任务 ==========
+    def create_job(self, kind, job_id=None):
+        """创建任务并返回任务 ID（可由客户端预先生成）"""
+        job_id = job_id or uuid.uuid4().hex
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO jobs (id, kind, status, result, created_at, updated_at) VALUES (?, ?, ?, NULL, ?, ?)",
+            (job_id, kind, JOB_RUNNING, now, now)
+        )
+        return job_id
+
+    def finish_job(self, job_id, status=JOB_COMPLETE, result=None):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, updated_at = ? WHERE id = ?",
+            (status, json.dumps(result, ensure_ascii=False) if result is not None else None, time.time(), job_id)
+        )
+
+    def get_job(self, job_id):
+        row = self._connect().execute(
+            "SELECT id, kind, status, result, created_at, updated_at FROM jobs WHERE id = ?", (job_id,)
+        ).fetchone()
+        return self._job_from_row(row)
+
+    def latest_job(self, since=None):
+        """最近创建的任务；指定 since 时仅返回运行中或 since 之后创建的任务"""
+        query = "SELECT id, kind, status, result, created_at, updated_at FROM jobs"
+        params = ()
+        if since is not None:
+            query += " WHERE status = ? OR created_at >= ?"
+            params = (JOB_RUNNING, since)
+        row = self._connect().execute(query + " ORDER BY created_at DESC LIMIT 1", params).fetchone()
+        return self._job_from_row(row)
+
+    @staticmethod
+    def _job_from_row(row):
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "kind": row[1],
+            "status": row[2],
+            "result": json.loads(row[3]) if row[3] else None,
+            "created_at": row[4],
+            "updated_at": row[5],
+        }
+
+    # ========== 事件 ==========
+    def append_event(self, job_id, message):
+        cursor = self._connect().execute(
+            "INSERT INTO job_events (job_id, message, created_at) VALUES (?, ?, ?)",
+            (job_id, message, time.time())
+        )
+        return cursor.lastrowid
+
+    def read_events(self, job_id, after_id=0, limit=500):
+        """读取 after_id 之后的事件，返回 [(event_id, message)]"""
+        return self._connect().execute(
+            "SELECT id, message FROM job_events WHERE job_id = ? AND id > ? ORDER BY id LIMIT ?",
+            (job_id, after_id, limit)
+        ).fetchall()
+
+    def iter_events(self, job_id, after_id=0, poll_interval=0.2, timeout=None):
+        """
+        持续读取任务事件直到任务结束且事件读完；timeout 秒内无新事件时产出 None（用于心跳）
+        """
+        last_activity = time.time()
+        while True:
+            events = self.read_events(job_id, after_id)
+            for event_id, message in events:
+                after_id = event_id
+                yield event_id, message
+            if events:
+                last_activity = time.time()
+                continue
+            job = self.get_job(job_id)
+            if job is not None and job["status"] != JOB_RUNNING and not self.read_events(job_id, after_id, 1):
+                return
+            if timeout is not None and time.time() - last_activity >= timeout:
+                last_activity = time.time()
+                yield None
+            time.sleep(poll_interval)
+
+    def purge(self, older_than_seconds=7 * 24 * 3600):
+        """清理过期任务、事件与缓存"""
+        cutoff = time.time() - older_than_seconds
+        conn = self._connect()
+        conn.execute("DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE updated_at < ?)", (cutoff,))
+        conn.execute("DELETE FROM jobs WHERE updated_at < ?", (cutoff,))
+        conn.execute("DELETE FROM kv_cache WHERE expires_at IS NOT NULL AND expires_at < ?", (time.time(),))
+
+    # ========== 缓存 ==========
+    def cache_get(self, namespace, key, default=None):
+        row = self._connect().execute(
+            "SELECT value, expires_at FROM kv_cache WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return default
+        return json.loads(row[0])
+
+    def cache_set(self, namespace, key, value, ttl=None):
+        now = time.time()
+        self._connect().execute(
+            "INSERT OR REPLACE INTO kv_cache (namespace, key, value, expires_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+            (namespace, key, json.dumps(value, ensure_ascii=False), now + ttl if ttl else None, now)
+        )
+
+    def cache_delete(self, namespace, key=None):
+        if key is None:
+            self._connect().execute("DELETE FROM kv_cache WHERE namespace = ?", (namespace,))
+        else:
+            self._connect().execute("DELETE FROM kv_cache WHERE namespace = ? AND key = ?", (namespace, key))
+
+
+_store = None
+_store_lock = threading.Lock()
+_job_context = threading.local()
+
+
+def get_job_store():
+    """进程内共享的 JobStore（路径取自环境变量 DB2DOC_JOB_STORE）"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = JobStore(os.getenv('DB2DOC_JOB_STORE') or DEFAULT_JOB_STORE_PATH)
+    return _store
+
+
+@contextmanager
+def bind_job(job_id):
+    """将当前线程的日志事件归属到指定任务"""
+    previous = getattr(_job_context, 'job_id', None)
+    _job_context.job_id = job_id
+    try:
+        yield job_id
+    finally:
+        _job_context.job_id = previous
+
+
+def current_job_id():
+    return getattr(_job_context, 'job_id', None)
@@ -0,0 +1,317 @@
+"""
+应用内部指标（Prometheus 文本格式，无第三方依赖）
+
+- HTTP：/api 路由的请求数与延迟直方图
+- 任务：进行中的后台任务数
+- 数据库：当前打开的连接数、按逻辑操作的语句数
+- LLM：进行中的请求数、延迟直方图、请求数与 token 计数
+- 缓存：命中/未命中计数
+"""
+
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# 延迟直方图默认分桶（秒）
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = 'untyped'
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"指标 {self.name} 需要标签 {self.labelnames}，实际为 {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def clear(self):
+        with self._lock:
+            self._values = {}
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Counter(_Metric):
+    """单调递增计数器"""
+    type_name = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """可增可减的瞬时值"""
+    type_name = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """累计分桶直方图（输出 _bucket / _sum / _count）"""
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = {"counts": [0] * len(self.buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry["counts"][i] += 1
+                    break
+            entry["sum"] += value
+            entry["count"] += 1
+
+    def count(self, **labels):
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            return entry["count"] if entry else 0
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        with self._lock:
+            items = sorted((k, {"counts": list(v["counts"]), "sum": v["sum"], "count": v["count"]})
+                           for k, v in self._values.items())
+        for key, entry in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, entry["counts"]):
+                cumulative += count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(entry['sum'])}")
+            lines.append(f"{self.name}_count{labels} {entry['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"指标已注册: {metric.name}")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        """输出 Prometheus 文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def parse_metrics(text):
+    """
+    解析 Prometheus 文本格式（供 monitor.py 使用）
+
+    返回 {metric_name: [(labels_dict, value), ...]}
+    """
+    result = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        name_part, _, value_part = line.rpartition(' ')
+        labels = {}
+        if '{' in name_part:
+            name, _, label_text = name_part.partition('{')
+            label_text = label_text.rstrip('}')
+            for pair in _split_labels(label_text):
+                key, _, value = pair.partition('=')
+                labels[key] = value.strip('"').replace('\\"', '"').replace('\\n', '\n').replace('\\\\', '\\')
+        else:
+            name = name_part
+        try:
+            value = float(value_part.replace('+Inf', 'inf'))
+        except ValueError:
+            continue
+        result.setdefault(name, []).append((labels, value))
+    return result
+
+
+def _split_labels(text):
+    parts, current, in_quotes, escaped = [], '', False, False
+    for ch in text:
+        if escaped:
+            current += ch
+            escaped = False
+        elif ch == '\\':
+            current += ch
+            escaped = True
+        elif ch == '"':
+            current += ch
+            in_quotes = not in_quotes
+        elif ch == ',' and not in_quotes:
+            parts.append(current)
+            current = ''
+        else:
+            current += ch
+    if current:
+        parts.append(current)
+    return parts
+
+
+# ========== 全局注册表与应用指标 ==========
+REGISTRY = MetricsRegistry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'db2doc_http_requests_total', 'API 请求数', ('method', 'endpoint', 'status'))
+HTTP_LATENCY = REGISTRY.histogram(
+    'db2doc_http_request_duration_seconds', 'API 请求延迟（秒）', ('method', 'endpoint'))
+
+ACTIVE_JOBS = REGISTRY.gauge(
+    'db2doc_active_jobs', '进行中的后台任务数', ('kind',))
+
+DB_CONNECTIONS_OPEN = REGISTRY.gauge(
+    'db2doc_db_connections_open', '当前打开的数据库连接数', ('db_type',))
+DB_STATEMENTS = REGISTRY.counter(
+    'db2doc_db_statements_total', '执行的数据库语句数', ('operation',))
+
+LLM_IN_FLIGHT = REGISTRY.gauge(
+    'db2doc_llm_requests_in_flight', '进行中的 LLM 请求数')
+LLM_REQUESTS = REGISTRY.counter(
+    'db2doc_llm_requests_total', 'LLM 请求数', ('operation', 'outcome'))
+LLM_LATENCY = REGISTRY.histogram(
+    'db2doc_llm_request_duration_seconds', 'LLM 请求延迟（秒）', ('operation',))
+LLM_TOKENS = REGISTRY.counter(
+    'db2doc_llm_tokens_total', 'LLM token 用量', ('operation', 'type'))
+
+CACHE_REQUESTS = REGISTRY.counter(
+    'db2doc_cache_requests_total', '缓存查询次数', ('cache', 'result'))
+
+
+def record_cache(cache, hit):
+    """记录一次缓存查询（命中 / 未命中）"""
+    CACHE_REQUESTS.inc(cache=cache, result='hit' if hit else 'miss')
+
+
+def track_job(kind):
+    """装饰器：函数运行期间计入进行中的任务数（如 generate_docs）"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with ACTIVE_JOBS.track_inprogress(kind=kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def metered_chat_completion(client, operation, **kwargs):
+    """
+    调用 client.chat.completions.create 并记录 LLM 指标
+
+    operation: 调用场景（field_meaning / table_description / relationship_review）
+    """
+    LLM_IN_FLIGHT.inc()
+    start = time.perf_counter()
+    outcome = 'error'
+    try:
+        response = client.chat.completions.create(**kwargs)
+        outcome = 'success'
+    finally:
+        LLM_IN_FLIGHT.dec()
+        LLM_LATENCY.observe(time.perf_counter() - start, operation=operation)
+        LLM_REQUESTS.inc(operation=operation, outcome=outcome)
+
+    usage = getattr(response, 'usage', None)
+    for token_type in ('prompt_tokens', 'completion_tokens'):
+        value = getattr(usage, token_type, None)
+        if isinstance(value, int):
+            LLM_TOKENS.inc(value, operation=operation, type=token_type.split('_')[0])
+    return response
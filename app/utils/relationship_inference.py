@@ -2,30 +2,70 @@
 关系推断模块 - 多层推断体系
 第一层：纯结构规则（最快、最稳）
 第二层：字段注释/表注释增强
+数据证据（可选）：抽样包含依赖检查（见 inclusion_probe）
 第三层：LLM 复核/重排
 """
 
+import collections
+import functools
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
 import json
+import threading
 from .ai_helper import get_openai_client
+from .metrics import metered_chat_completion, record_cache
 from ..config import config
 
+# 推断结果缓存（按 Schema 指纹）与 LLM 按候选复核缓存，均存放于任务存储的 kv 缓存
+INFERENCE_CACHE_NAMESPACE = 'inference'
+LLM_REVIEW_NAMESPACE = 'llm_review'
+INFERENCE_CACHE_TTL = 7 * 24 * 3600
+LLM_REVIEW_TTL = 30 * 24 * 3600
 
+# LLM 复核分批与并发（可由配置 ai.openai.review_batch_tokens / review_concurrency 覆盖）
+LLM_BATCH_TOKENS = 3000
+LLM_MAX_BATCH_SIZE = 40
+LLM_REVIEW_CONCURRENCY = 4
+
+
+# 实体名提取规则（按顺序匹配，预编译）
+_ENTITY_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'^(.+)_id$',       # xxx_id -> xxx
+    r'^(.+?)(Id|ID)$',  # xxxId / xxxID -> xxx
+    r'^id_(.+)$',       # id_xxx -> xxx
+    r'^(.+)_code$',     # xxx_code -> xxx
+    r'^(.+?)Code$',     # xxxCode -> xxx
+    r'^(.+)_no$',       # xxx_no -> xxx
+    r'^(.+?)No$',       # xxxNo -> xxx
+    r'^(.+)_key$',      # xxx_key -> xxx
+    r'^fk_(.+)$',       # fk_xxx -> xxx
+))
+
+_ID_TYPES = ('int', 'bigint', 'smallint', 'tinyint', 'uuid', 'char', 'varchar')
+
+# 表名精确匹配 / 包含实体名
+_NAME_EXACT = 2
+_NAME_PART = 1
+
+
+@functools.lru_cache(maxsize=65536)
 def _normalize_name(name):
     """标准化名称：去除下划线、转小写"""
     return (name or '').lower().replace('_', '').replace('-', '').replace('.', '')
 
 
+@functools.lru_cache(maxsize=4096)
 def _is_id_like_type(data_type):
     """判断数据类型是否适合作为外键"""
     if not data_type:
         return False
     dt = data_type.lower()
     # 整数类型、UUID、常见字符串ID类型
-    id_types = ['int', 'bigint', 'smallint', 'tinyint', 'uuid', 'char', 'varchar']
-    return any(t in dt for t in id_types)
+    return any(t in dt for t in _ID_TYPES)
 
 
+@functools.lru_cache(maxsize=65536)
 def _extract_entity_name(column_name):
     """
     从列名中提取可能的实体名
@@ -34,240 +74,403 @@ def _extract_entity_name(column_name):
     col = (column_name or '').strip()
     if not col:
         return None
-    
-    lower = col.lower()
-    
+
     # 跳过纯 id / code / no
-    if lower in ('id', 'code', 'no', 'number', 'num'):
+    if col.lower() in ('id', 'code', 'no', 'number', 'num'):
         return None
-    
-    patterns = [
-        # xxx_id -> xxx
-        (r'^(.+)_id$', 1),
-        # xxxId / xxxID -> xxx
-        (r'^(.+?)(Id|ID)$', 1),
-        # id_xxx -> xxx
-        (r'^id_(.+)$', 1),
-        # xxx_code -> xxx
-        (r'^(.+)_code$', 1),
-        # xxxCode -> xxx
-        (r'^(.+?)Code$', 1),
-        # xxx_no -> xxx
-        (r'^(.+)_no$', 1),
-        # xxxNo -> xxx  
-        (r'^(.+?)No$', 1),
-        # xxx_key -> xxx
-        (r'^(.+)_key$', 1),
-        # fk_xxx -> xxx
-        (r'^fk_(.+)$', 1),
-    ]
-    
-    for pattern, group in patterns:
-        match = re.match(pattern, col, re.IGNORECASE)
+
+    for pattern in _ENTITY_PATTERNS:
+        match = pattern.match(col)
         if match:
-            return match.group(group)
-    
+            return match.group(1)
+
     return None
 
 
-def infer_relationships_by_rules(cols_by_table, table_names, fk_pairs=None, threshold=0.5):
+def _index_keys(table_name):
+    """表名在倒排索引中的键：完整名称、单复数兜底、末段与末两段"""
+    norm = _normalize_name(table_name)
+    keys = [norm]
+    # 单复数兜底
+    if norm.endswith('s') and len(norm) > 1:
+        keys.append(norm[:-1])
+    if norm.endswith('es') and len(norm) > 2:
+        keys.append(norm[:-2])
+
+    # 提取表名的各个部分（按下划线分割），支持 sys_role -> role, data_device -> device
+    parts = table_name.lower().split('_')
+    if len(parts) > 1:
+        # 最后一个部分（如 sys_role -> role）
+        last_part = _normalize_name(parts[-1])
+        if last_part and len(last_part) > 2:
+            keys.append(last_part)
+            if last_part.endswith('s') and len(last_part) > 1:
+                keys.append(last_part[:-1])
+
+        # 最后两个部分（如 sys_user_role -> userrole, user_role）
+        if len(parts) > 2:
+            last_two = _normalize_name('_'.join(parts[-2:]))
+            if last_two and len(last_two) > 3:
+                keys.append(last_two)
+    return keys
+
+
+class RuleInferenceEngine:
     """
-    第一层 + 第二层：基于命名规则和类型兼容性推断关系
-    
-    Args:
-        cols_by_table: {table_name: [(col_name, data_type), ...]}
-        table_names: 表名集合
-        fk_pairs: 已有的外键对集合 {(from_table, to_table), ...}
-        threshold: 置信度阈值
-    
-    Returns:
-        list of {source, target, confidence, reason, from_column, to_column}
+    预编译的规则推断引擎（第一层 + 第二层）
+
+    构建时一次性完成：
+    - 表名倒排索引（标准化名称/末段 -> 候选表，已去重）
+    - 每张表中可提取实体名的列（列名、类型是否适合作为外键、实体名）
+    - 存在 id 列的表集合
+    同一实体名的候选打分按实体缓存，infer 只做查表与计分。
     """
-    table_set = set(table_names or [])
-    fk_pairs = fk_pairs or set()
-    
-    # 构建表名映射（标准化名称 -> 原始表名列表）
-    # 支持多种匹配方式：完整表名、去前缀后的表名
-    norm_to_tables = {}
-    for t in table_set:
-        # 完整标准化名称
-        norm = _normalize_name(t)
-        norm_to_tables.setdefault(norm, []).append(t)
-        
-        # 单复数兜底
-        if norm.endswith('s') and len(norm) > 1:
-            norm_to_tables.setdefault(norm[:-1], []).append(t)
-        if norm.endswith('es') and len(norm) > 2:
-            norm_to_tables.setdefault(norm[:-2], []).append(t)
-        
-        # 提取表名的各个部分（按下划线分割），支持 sys_role -> role, data_device -> device
-        parts = t.lower().split('_')
-        if len(parts) > 1:
-            # 最后一个部分（如 sys_role -> role）
-            last_part = _normalize_name(parts[-1])
-            if last_part and len(last_part) > 2:
-                norm_to_tables.setdefault(last_part, []).append(t)
-                # 单复数
-                if last_part.endswith('s') and len(last_part) > 1:
-                    norm_to_tables.setdefault(last_part[:-1], []).append(t)
-            
-            # 最后两个部分（如 sys_user_role -> userrole, user_role）
-            if len(parts) > 2:
-                last_two = _normalize_name('_'.join(parts[-2:]))
-                if last_two and len(last_two) > 3:
-                    norm_to_tables.setdefault(last_two, []).append(t)
-    
-    # 构建表列集合（用于检查目标表是否有 id 列）
-    table_cols_map = {}
-    for table_name, cols in cols_by_table.items():
-        table_cols_map[table_name] = {(c or '').lower(): dt for c, dt in cols}
-    
-    inferred = []
-    seen_pairs = set()  # 避免重复
-    
-    for table_name, cols in cols_by_table.items():
-        if table_name not in table_set:
-            continue
-        
-        for col_name, data_type in cols:
-            # 提取可能的实体名
-            entity = _extract_entity_name(col_name)
-            if not entity:
-                continue
-            
-            entity_norm = _normalize_name(entity)
-            if not entity_norm:
-                continue
-            
-            # 查找候选目标表
-            candidates = norm_to_tables.get(entity_norm, [])
-            candidates = [c for c in candidates if c != table_name]
-            
-            # 去重
-            seen = set()
-            candidates = [c for c in candidates if not (c in seen or seen.add(c))]
-            
-            if not candidates:
-                continue
-            
-            # 计算置信度
-            for target in candidates:
-                pair = (table_name, target)
-                if pair in fk_pairs or pair in seen_pairs:
+
+    def __init__(self, cols_by_table, table_names):
+        # 倒排索引按传入的表名顺序构建（候选顺序因此确定，增量引擎与全量构建一致）
+        table_order = tuple(dict.fromkeys(table_names or ()))
+        self.table_set = set(table_order)
+
+        index = {}
+        for t in table_order:
+            for key in _index_keys(t):
+                index.setdefault(key, []).append(t)
+        # 去重保持顺序
+        self.index = {k: tuple(dict.fromkeys(v)) for k, v in index.items()}
+
+        self.tables_with_id = set()
+        self.rule_columns = {}
+        for table_name, cols in cols_by_table.items():
+            entries = []
+            for col_name, data_type in cols:
+                if (col_name or '').lower() == 'id':
+                    self.tables_with_id.add(table_name)
+                entity = _extract_entity_name(col_name)
+                if not entity:
                     continue
-                
-                confidence = 0.5  # 基础置信度
-                reasons = [f"字段 {col_name} 匹配表名 {target}"]
-                
-                # 类型兼容性加分
-                if _is_id_like_type(data_type):
-                    confidence += 0.1
-                    reasons.append("数据类型适合作为外键")
-                
-                # 目标表有 id 列加分
-                target_cols = table_cols_map.get(target, {})
-                if 'id' in target_cols:
-                    confidence += 0.15
-                    reasons.append("目标表存在 id 列")
-                
-                # 表名精确匹配加分（如 role_id -> sys_role 比 role_id -> sys_user_role 更可能）
+                entity_norm = _normalize_name(entity)
+                if not entity_norm or entity_norm not in self.index:
+                    continue
+                entries.append((col_name, _is_id_like_type(data_type), entity))
+            self.rule_columns[table_name] = entries
+
+        self._targets_cache = {}
+        self._scored_cache = {}
+
+    def _targets(self, entity):
+        """实体名的候选目标：(候选表元组, {表: 表名匹配等级})"""
+        cached = self._targets_cache.get(entity)
+        if cached is None:
+            candidates = self.index.get(_normalize_name(entity), ())
+            entity_lower = entity.lower()
+            name_match = {}
+            for target in candidates:
                 target_lower = target.lower()
-                entity_lower = entity.lower()
                 if target_lower.endswith('_' + entity_lower) or target_lower == entity_lower:
-                    confidence += 0.15
-                    reasons.append("表名精确匹配字段实体名")
+                    name_match[target] = _NAME_EXACT
                 elif entity_lower in target_lower.split('_'):
-                    confidence += 0.1
-                    reasons.append("表名包含字段实体名")
-                
-                # 唯一候选加分
-                if len(candidates) == 1:
-                    confidence += 0.1
-                    reasons.append("唯一匹配的候选表")
-                elif len(candidates) <= 3:
-                    # 多候选但不太多，轻微降分
-                    confidence -= 0.05
-                    reasons.append(f"存在 {len(candidates)} 个候选表")
-                else:
-                    confidence -= 0.15  # 太多候选，大幅降分
-                    reasons.append(f"存在 {len(candidates)} 个候选表（较多）")
-                
-                # 限制置信度范围
-                confidence = max(0.1, min(1.0, confidence))
-                
+                    name_match[target] = _NAME_PART
+            cached = self._targets_cache[entity] = (candidates, name_match)
+        return cached
+
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _score(id_like, has_id, name_match, count):
+        """按特征组合计算置信度与理由（不含列名/表名部分），结果按组合缓存"""
+        confidence = 0.5  # 基础置信度
+        reasons = []
+
+        # 类型兼容性加分
+        if id_like:
+            confidence += 0.1
+            reasons.append("数据类型适合作为外键")
+
+        # 目标表有 id 列加分
+        if has_id:
+            confidence += 0.15
+            reasons.append("目标表存在 id 列")
+
+        # 表名精确匹配加分（如 role_id -> sys_role 比 role_id -> sys_user_role 更可能）
+        if name_match == _NAME_EXACT:
+            confidence += 0.15
+            reasons.append("表名精确匹配字段实体名")
+        elif name_match == _NAME_PART:
+            confidence += 0.1
+            reasons.append("表名包含字段实体名")
+
+        # 唯一候选加分
+        if count == 1:
+            confidence += 0.1
+            reasons.append("唯一匹配的候选表")
+        elif count <= 3:
+            # 多候选但不太多，轻微降分
+            confidence -= 0.05
+            reasons.append(f"存在 {count} 个候选表")
+        else:
+            confidence -= 0.15  # 太多候选，大幅降分
+            reasons.append(f"存在 {count} 个候选表（较多）")
+
+        # 限制置信度范围
+        confidence = max(0.1, min(1.0, confidence))
+        return confidence, round(confidence, 2), ''.join('；' + r for r in reasons)
+
+    def _scored_targets(self, entity, id_like, count, threshold):
+        """
+        实体名的已计分候选：[(目标表, 置信度, 理由后缀, to_column)]，仅保留达到阈值的候选
+        （按实体、类型、候选数缓存，同一实体在上千张表中重复出现时只计分一次）
+        """
+        key = (entity, id_like, count, threshold)
+        cached = self._scored_cache.get(key)
+        if cached is None:
+            candidates, name_match = self._targets(entity)
+            cached = []
+            for target in candidates:
+                has_id = target in self.tables_with_id
+                confidence, rounded, reason_tail = self._score(id_like, has_id, name_match.get(target), count)
                 if confidence >= threshold:
-                    seen_pairs.add(pair)
-                    inferred.append({
-                        "source": table_name,
-                        "target": target,
-                        "confidence": round(confidence, 2),
-                        "reason": "；".join(reasons),
-                        "from_column": col_name,
-                        "to_column": "id" if 'id' in target_cols else None,
-                        "infer_type": "rule"
-                    })
-    
-    # 按置信度降序排序
-    inferred.sort(key=lambda x: -x["confidence"])
+                    cached.append((target, rounded, f" 匹配表名 {target}{reason_tail}", "id" if has_id else None))
+            self._scored_cache[key] = cached
+        return cached
+
+    def infer(self, fk_pairs=None, threshold=0.5):
+        """推断关系，返回值与 infer_relationships_by_rules 相同"""
+        # 已有外键按源表分组，与自身、已推断的目标一起作为逐表的跳过集合
+        fk_targets = _fk_targets(fk_pairs)
+
+        # 按置信度分桶（等价于按置信度降序的稳定排序）
+        buckets = collections.defaultdict(list)
+        for table_name, entries in self.rule_columns.items():
+            if not entries or table_name not in self.table_set:
+                continue
+            for confidence, edge in self._infer_table(table_name, entries, fk_targets.get(table_name, ()), threshold):
+                buckets[confidence].append(edge)
+        return _flatten_buckets(buckets)
+
+    def _infer_table(self, table_name, entries, fk_targets, threshold):
+        """单表推断：[(置信度, 关系)]，跳过自身、已有外键目标与该表已推断的目标"""
+        targets = self._targets
+        scored_targets = self._scored_targets
+        skip = set(fk_targets)
+        skip.add(table_name)
+        edges = []
+        for col_name, id_like, entity in entries:
+            all_candidates = targets(entity)[0]
+            count = len(all_candidates) - (1 if table_name in all_candidates else 0)
+            if count == 0:
+                continue
+
+            prefix = "字段 " + col_name
+            for target, confidence, reason_suffix, to_column in scored_targets(entity, id_like, count, threshold):
+                if target in skip:
+                    continue
+                skip.add(target)
+                edges.append((confidence, {
+                    "source": table_name,
+                    "target": target,
+                    "confidence": confidence,
+                    "reason": prefix + reason_suffix,
+                    "from_column": col_name,
+                    "to_column": to_column,
+                    "infer_type": "rule"
+                }))
+        return edges
+
+
+def _flatten_buckets(buckets):
+    inferred = []
+    for confidence in sorted(buckets, reverse=True):
+        inferred.extend(buckets[confidence])
     return inferred
 
 
-def infer_relationships_by_llm(candidates, cols_by_table, tables_data, max_candidates=20):
+def _fk_targets(fk_pairs):
+    """已有外键按源表分组：{source: {target, ...}}"""
+    fk_targets = {}
+    for source, target in fk_pairs or ():
+        fk_targets.setdefault(source, set()).add(target)
+    return fk_targets
+
+
+class IncrementalRuleEngine(RuleInferenceEngine):
     """
-    第三层：LLM 复核候选关系，重新打分并给出理由
+    增量规则推断：保留倒排索引、逐表编译结果与上次推断出的边，按表指纹只重算受影响源表的边
+
+    受影响的源表 = 新增/删除/列变化的表 ∪ 列实体名落在这些表索引键上的表 ∪ 已有外键变化的表；
+    阈值变化时全部重算。以相同顺序的 table_names 调用时，合并后的输出（含顺序）与
+    infer_relationships_by_rules 完全一致。
+    """
+
+    def __init__(self):
+        super().__init__({}, ())
+        self.lock = threading.Lock()
+        self.fingerprints = {}
+        self.keys_by_table = {}
+        self.entity_columns = {}                              # 表 -> [(列名, 类型适合外键, 实体名, 标准化实体名)]
+        self.sources_by_key = collections.defaultdict(set)   # 标准化实体名 -> 含该实体列的表
+        self.edges_by_source = {}
+        self.fk_targets = {}
+        self.threshold = None
+        self.last_stats = {}
+
+    def _compile_table(self, table_name, cols):
+        for _, _, _, norm in self.entity_columns.pop(table_name, ()):
+            self.sources_by_key[norm].discard(table_name)
+        self.tables_with_id.discard(table_name)
+        if cols is None:
+            return
+        entries = []
+        for col_name, data_type in cols:
+            if (col_name or '').lower() == 'id':
+                self.tables_with_id.add(table_name)
+            entity = _extract_entity_name(col_name)
+            norm = _normalize_name(entity) if entity else ''
+            if norm:
+                entries.append((col_name, _is_id_like_type(data_type), entity, norm))
+                self.sources_by_key[norm].add(table_name)
+        self.entity_columns[table_name] = entries
+
+    def update(self, cols_by_table, table_names, fk_pairs=None, threshold=0.5):
+        """按当前 Schema 增量推断，返回值与 infer_relationships_by_rules 相同"""
+        with self.lock:
+            table_order = tuple(dict.fromkeys(table_names or ()))
+            new_set = set(table_order)
+            fingerprints = {t: hash(tuple(map(tuple, cols))) for t, cols in cols_by_table.items()}
+            changed = (self.table_set ^ new_set) | {
+                t for t in fingerprints.keys() | self.fingerprints.keys()
+                if fingerprints.get(t) != self.fingerprints.get(t)
+            }
+
+            # 倒排索引：只重建受影响的键（按传入的表名顺序，与全量构建一致）
+            for t in new_set - self.table_set:
+                self.keys_by_table[t] = _index_keys(t)
+            keys = {k for t in changed for k in (self.keys_by_table.get(t) or _index_keys(t))}
+            for t in self.table_set - new_set:
+                self.keys_by_table.pop(t, None)
+            self.table_set = new_set
+            rebuilt = {}
+            for t in table_order:
+                for k in self.keys_by_table[t]:
+                    if k in keys:
+                        rebuilt.setdefault(k, []).append(t)
+            for k in keys:
+                if k in rebuilt:
+                    self.index[k] = tuple(dict.fromkeys(rebuilt[k]))
+                else:
+                    self.index.pop(k, None)
+            self._targets_cache = {e: v for e, v in self._targets_cache.items() if _normalize_name(e) not in keys}
+            self._scored_cache = {e: v for e, v in self._scored_cache.items() if _normalize_name(e[0]) not in keys}
+
+            for t in changed:
+                self._compile_table(t, cols_by_table.get(t))
+            self.fingerprints = fingerprints
+
+            fk_targets = _fk_targets(fk_pairs)
+            if threshold != self.threshold:
+                affected = set(cols_by_table) | set(self.edges_by_source)
+            else:
+                affected = set(changed)
+                for k in keys:
+                    affected |= self.sources_by_key.get(k, set())
+                affected |= {t for t in fk_targets.keys() | self.fk_targets.keys()
+                             if fk_targets.get(t) != self.fk_targets.get(t)}
+            self.fk_targets = fk_targets
+            self.threshold = threshold
+
+            for t in affected:
+                entries = [e[:3] for e in self.entity_columns.get(t, ()) if e[3] in self.index]
+                self.rule_columns[t] = entries
+                if entries and t in self.table_set and t in cols_by_table:
+                    self.edges_by_source[t] = self._infer_table(t, entries, fk_targets.get(t, ()), threshold)
+                else:
+                    self.edges_by_source.pop(t, None)
+                    if t not in cols_by_table:
+                        self.rule_columns.pop(t, None)
+
+            buckets = collections.defaultdict(list)
+            for t in cols_by_table:
+                for confidence, edge in self.edges_by_source.get(t, ()):
+                    buckets[confidence].append(dict(edge))
+            self.last_stats = {"tables": len(cols_by_table), "changed": len(changed), "recomputed": len(affected)}
+            return _flatten_buckets(buckets)
+
+
+_incremental_engines = collections.OrderedDict()
+_incremental_lock = threading.Lock()
+INCREMENTAL_ENGINE_LIMIT = 8
+
+
+def get_incremental_engine(scope):
+    """按数据库标识复用的增量规则推断引擎（进程内保留最近使用的若干个）"""
+    with _incremental_lock:
+        engine = _incremental_engines.pop(scope, None) or IncrementalRuleEngine()
+        _incremental_engines[scope] = engine
+        while len(_incremental_engines) > INCREMENTAL_ENGINE_LIMIT:
+            _incremental_engines.popitem(last=False)
+        return engine
+
+
+def infer_relationships_by_rules(cols_by_table, table_names, fk_pairs=None, threshold=0.5):
+    """
+    第一层 + 第二层：基于命名规则和类型兼容性推断关系
     
     Args:
-        candidates: 规则推断的候选关系列表
         cols_by_table: {table_name: [(col_name, data_type), ...]}
-        tables_data: {table_name: {comment: str, ...}}
-        max_candidates: 最多复核的候选数量
+        table_names: 表名集合
+        fk_pairs: 已有的外键对集合 {(from_table, to_table), ...}
+        threshold: 置信度阈值
     
     Returns:
         list of {source, target, confidence, reason, from_column, to_column}
     """
-    if not candidates:
-        return []
-    
-    client = get_openai_client()
-    if not client:
-        print("LLM 客户端不可用，跳过 LLM 推断")
-        return candidates  # 返回原始候选
-    
-    ai_config = config.get('ai', {}).get('openai', {})
-    model = ai_config.get('model', 'google/gemma-3-1b')
-    
-    # 限制候选数量
-    to_review = candidates[:max_candidates]
-    
-    # 构建 prompt
-    prompt_parts = ["请评估以下数据库表之间的潜在关系，并为每个关系打分（0-1）。\n"]
-    prompt_parts.append("## 候选关系：\n")
-    
-    for i, c in enumerate(to_review, 1):
-        src = c["source"]
-        tgt = c["target"]
-        from_col = c.get("from_column", "?")
-        
-        # 获取表注释
-        src_comment = tables_data.get(src, {}).get("comment", "") or ""
-        tgt_comment = tables_data.get(tgt, {}).get("comment", "") or ""
-        
-        # 获取部分列信息
-        src_cols = cols_by_table.get(src, [])[:5]
-        tgt_cols = cols_by_table.get(tgt, [])[:5]
-        src_cols_str = ", ".join([f"{c}({dt})" for c, dt in src_cols])
-        tgt_cols_str = ", ".join([f"{c}({dt})" for c, dt in tgt_cols])
-        
-        prompt_parts.append(f"{i}. {src}.{from_col} -> {tgt}")
-        if src_comment:
-            prompt_parts.append(f"   {src} 表注释: {src_comment}")
-        if tgt_comment:
-            prompt_parts.append(f"   {tgt} 表注释: {tgt_comment}")
-        prompt_parts.append(f"   {src} 部分列: {src_cols_str}")
-        prompt_parts.append(f"   {tgt} 部分列: {tgt_cols_str}")
-        prompt_parts.append("")
-    
-    prompt_parts.append("""
+    return RuleInferenceEngine(cols_by_table, table_names).infer(fk_pairs, threshold)
+
+
+def _digest(payload):
+    return hashlib.sha256(
+        json.dumps(payload, ensure_ascii=False, sort_keys=True, default=sorted).encode('utf-8')
+    ).hexdigest()
+
+
+def schema_fingerprint(cols_by_table, table_names, fk_pairs=None, tables_data=None):
+    """
+    推断输入的 Schema 指纹：所选表的列名/类型（保持列顺序）、已有外键对，以及（提供时）表注释
+    """
+    tables = sorted(t for t in (table_names or []) if t)
+    payload = {
+        "tables": tables,
+        "columns": {t: [[c, dt] for c, dt in cols_by_table.get(t, [])] for t in tables},
+        "fk_pairs": sorted([list(p) for p in (fk_pairs or [])]),
+    }
+    if tables_data is not None:
+        payload["comments"] = {t: (tables_data.get(t, {}) or {}).get("comment", "") or "" for t in tables}
+    return _digest(payload)
+
+
+def _review_key(candidate, cols_by_table, tables_data, model):
+    """单个候选的 LLM 复核缓存键：由提示词中该候选涉及的全部信息决定"""
+    src = candidate["source"]
+    tgt = candidate["target"]
+    return _digest([
+        model, src, candidate.get("from_column"), tgt, candidate.get("to_column"),
+        tables_data.get(src, {}).get("comment", "") or "",
+        tables_data.get(tgt, {}).get("comment", "") or "",
+        [list(c) for c in cols_by_table.get(src, [])[:5]],
+        [list(c) for c in cols_by_table.get(tgt, [])[:5]],
+    ])
+
+
+def _apply_llm_review(candidate, review):
+    """融合规则分数和 LLM 分数（加权平均，LLM 权重更高）"""
+    rule_score = candidate["confidence"]
+    llm_score = float(review.get("score", 0.5))
+    candidate["confidence"] = round(rule_score * 0.3 + llm_score * 0.7, 2)
+    candidate["reason"] = review.get("reason") or candidate["reason"]
+    candidate["infer_type"] = "rule+llm"
+
+
+_REVIEW_SYSTEM_PROMPT = "你是数据库架构专家，擅长分析表之间的关联关系。请基于表名、列名、注释等信息判断表之间是否存在外键或业务关联。"
+
+_REVIEW_INSTRUCTIONS = """
 请以 JSON 格式返回评估结果，格式如下：
 {
   "results": [
@@ -283,55 +486,188 @@ def infer_relationships_by_llm(candidates, cols_by_table, tables_data, max_candi
 - 0.3-0.5: 不太确定
 - 0-0.3: 可能是误判
 
-只返回 JSON，不要其他解释。""")
-    
-    prompt = "\n".join(prompt_parts)
-    
+只返回 JSON，不要其他解释。"""
+
+
+def _estimate_tokens(text):
+    """粗略估计 token 数：ASCII 约 4 字符 1 token，其他字符（中文等）按 1 字符 1 token"""
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return ascii_chars // 4 + (len(text) - ascii_chars) + 1
+
+
+def _review_entry(candidate, cols_by_table, tables_data):
+    """单个候选在提示词中的描述（不含序号）"""
+    src = candidate["source"]
+    tgt = candidate["target"]
+    from_col = candidate.get("from_column", "?")
+
+    # 获取表注释
+    src_comment = tables_data.get(src, {}).get("comment", "") or ""
+    tgt_comment = tables_data.get(tgt, {}).get("comment", "") or ""
+
+    # 获取部分列信息
+    src_cols_str = ", ".join([f"{c}({dt})" for c, dt in cols_by_table.get(src, [])[:5]])
+    tgt_cols_str = ", ".join([f"{c}({dt})" for c, dt in cols_by_table.get(tgt, [])[:5]])
+
+    lines = [f"{src}.{from_col} -> {tgt}"]
+    if src_comment:
+        lines.append(f"   {src} 表注释: {src_comment}")
+    if tgt_comment:
+        lines.append(f"   {tgt} 表注释: {tgt_comment}")
+    lines.append(f"   {src} 部分列: {src_cols_str}")
+    lines.append(f"   {tgt} 部分列: {tgt_cols_str}")
+    lines.append("")
+    return "\n".join(lines)
+
+
+def batch_review_entries(entries, batch_tokens=LLM_BATCH_TOKENS, max_batch_size=LLM_MAX_BATCH_SIZE):
+    """
+    按 token 预算贪心分批
+
+    Args:
+        entries: [(item, entry_text), ...]
+    Returns:
+        [[(item, entry_text), ...], ...]，每批提示词估计不超过 batch_tokens（单个超限条目独占一批）
+    """
+    overhead = _estimate_tokens(_REVIEW_SYSTEM_PROMPT + _REVIEW_INSTRUCTIONS) + 30
+    batches = []
+    current = []
+    used = overhead
+    for item, text in entries:
+        cost = _estimate_tokens(text) + 4
+        if current and (used + cost > batch_tokens or len(current) >= max_batch_size):
+            batches.append(current)
+            current = []
+            used = overhead
+        current.append((item, text))
+        used += cost
+    if current:
+        batches.append(current)
+    return batches
+
+
+def _review_batch(client, model, batch):
+    """复核一批候选，返回 {批内序号: {"score", "reason"}}；请求或解析失败时抛出异常"""
+    prompt_parts = ["请评估以下数据库表之间的潜在关系，并为每个关系打分（0-1）。\n", "## 候选关系：\n"]
+    for i, (_, text) in enumerate(batch, 1):
+        prompt_parts.append(f"{i}. {text}")
+    prompt_parts.append(_REVIEW_INSTRUCTIONS)
+
+    response = metered_chat_completion(
+        client, 'relationship_review',
+        model=model,
+        messages=[
+            {"role": "system", "content": _REVIEW_SYSTEM_PROMPT},
+            {"role": "user", "content": "\n".join(prompt_parts)}
+        ],
+        # 每个候选约需 60 token 输出
+        max_tokens=min(4000, 200 + 60 * len(batch)),
+        temperature=0.3
+    )
+    result_text = response.choices[0].message.content.strip()
+
+    # 尝试提取 JSON
+    json_match = re.search(r'\{[\s\S]*\}', result_text)
+    if not json_match:
+        raise ValueError(f"LLM 返回中未找到 JSON: {result_text[:200]}")
     try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "你是数据库架构专家，擅长分析表之间的关联关系。请基于表名、列名、注释等信息判断表之间是否存在外键或业务关联。"},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=2000,
-            temperature=0.3
-        )
-        
-        result_text = response.choices[0].message.content.strip()
-        
-        # 解析 JSON
+        llm_results = json.loads(json_match.group()).get("results", [])
+    except json.JSONDecodeError as e:
+        raise ValueError(f"LLM 返回 JSON 解析失败: {e}，原始返回: {result_text[:200]}")
+
+    reviews = {}
+    for r in llm_results:
         try:
-            # 尝试提取 JSON
-            json_match = re.search(r'\{[\s\S]*\}', result_text)
-            if json_match:
-                result_json = json.loads(json_match.group())
-                llm_results = result_json.get("results", [])
-                
-                # 更新候选的置信度和理由
-                result_map = {r["index"]: r for r in llm_results}
-                
-                for i, c in enumerate(to_review, 1):
-                    if i in result_map:
-                        llm_r = result_map[i]
-                        # 融合规则分数和 LLM 分数（加权平均）
-                        rule_score = c["confidence"]
-                        llm_score = float(llm_r.get("score", 0.5))
-                        # LLM 权重更高
-                        c["confidence"] = round(rule_score * 0.3 + llm_score * 0.7, 2)
-                        c["reason"] = llm_r.get("reason", c["reason"])
-                        c["infer_type"] = "rule+llm"
-                
-                print(f"LLM 复核完成，处理了 {len(result_map)} 个候选关系")
-        except json.JSONDecodeError as e:
-            print(f"LLM 返回 JSON 解析失败: {e}")
-            print(f"原始返回: {result_text}")
+            index = int(r["index"])
+            reviews[index] = {"score": float(r.get("score", 0.5)), "reason": r.get("reason", "")}
+        except (KeyError, TypeError, ValueError):
+            continue
+    return reviews
+
+
+def infer_relationships_by_llm(candidates, cols_by_table, tables_data, max_candidates=None,
+                               review_store=None, review_stats=None, concurrency=None,
+                               batch_tokens=None):
+    """
+    第三层：LLM 复核候选关系，重新打分并给出理由
+
+    候选按 token 预算分批，多批并发请求（受 concurrency 限制），结果合并回候选；
+    每个候选的评分单独缓存，批次失败不影响其他批次
     
-    except Exception as e:
-        print(f"LLM 推断失败: {e}")
+    Args:
+        candidates: 规则推断的候选关系列表
+        cols_by_table: {table_name: [(col_name, data_type), ...]}
+        tables_data: {table_name: {comment: str, ...}}
+        max_candidates: 最多复核的候选数量（None 表示全部）
+        review_store: 提供时按候选缓存 LLM 评分（JobStore），未变化的候选跨会话复用
+        review_stats: 提供时写入 {reviewed, cached, batches, failed_batches, failed}
+        concurrency: 并发请求数（默认取配置 ai.openai.review_concurrency，否则 4）
+        batch_tokens: 每批提示词的 token 预算（默认取配置 ai.openai.review_batch_tokens，否则 3000）
+    
+    Returns:
+        list of {source, target, confidence, reason, from_column, to_column}
+    """
+    stats = review_stats if review_stats is not None else {}
+    stats.update({"reviewed": 0, "cached": 0, "batches": 0, "failed_batches": 0, "failed": False})
+    if not candidates:
+        return []
+    
+    ai_config = config.get('ai', {}).get('openai', {})
+    model = ai_config.get('model', 'google/gemma-3-1b')
+    concurrency = max(1, int(concurrency or ai_config.get('review_concurrency', LLM_REVIEW_CONCURRENCY)))
+    batch_tokens = int(batch_tokens or ai_config.get('review_batch_tokens', LLM_BATCH_TOKENS))
+    
+    # 限制候选数量
+    to_review = candidates if max_candidates is None else candidates[:max_candidates]
+
+    # 命中缓存的候选直接融合评分，其余进入提示词
+    pending = []
+    for c in to_review:
+        key = _review_key(c, cols_by_table, tables_data, model) if review_store is not None else None
+        cached = review_store.cache_get(LLM_REVIEW_NAMESPACE, key) if key else None
+        if key:
+            record_cache(LLM_REVIEW_NAMESPACE, cached is not None)
+        if cached is not None:
+            _apply_llm_review(c, cached)
+            stats["cached"] += 1
+        else:
+            pending.append(((c, key), _review_entry(c, cols_by_table, tables_data)))
+
+    if pending:
+        client = get_openai_client()
+        if not client:
+            print("LLM 客户端不可用，跳过 LLM 推断")
+            stats["failed"] = True
+        else:
+            batches = batch_review_entries(pending, batch_tokens)
+            stats["batches"] = len(batches)
+            print(f"LLM 复核 {len(pending)} 个候选关系，分 {len(batches)} 批，并发 {min(concurrency, len(batches))}")
+            with ThreadPoolExecutor(max_workers=min(concurrency, len(batches))) as executor:
+                futures = {executor.submit(_review_batch, client, model, batch): batch for batch in batches}
+                for future in as_completed(futures):
+                    batch = futures[future]
+                    try:
+                        reviews = future.result()
+                    except Exception as e:
+                        stats["failed_batches"] += 1
+                        print(f"LLM 推断失败（{len(batch)} 个候选）: {e}")
+                        continue
+                    # 合并回候选（在主线程中进行）
+                    for i, ((c, key), _) in enumerate(batch, 1):
+                        review = reviews.get(i)
+                        if review is None:
+                            continue
+                        _apply_llm_review(c, review)
+                        stats["reviewed"] += 1
+                        if key:
+                            review_store.cache_set(LLM_REVIEW_NAMESPACE, key, review, ttl=LLM_REVIEW_TTL)
+            stats["failed"] = stats["failed_batches"] > 0
+            print(f"LLM 复核完成，处理了 {stats['reviewed']} 个候选关系（失败批次 {stats['failed_batches']}）")
+    else:
+        print(f"LLM 复核全部命中缓存（{stats['cached']} 个候选关系）")
     
     # 返回所有候选（包括未被 LLM 处理的）
-    result = to_review + candidates[max_candidates:]
+    result = list(candidates)
     result.sort(key=lambda x: -x["confidence"])
     return result
 
@@ -343,7 +679,13 @@ def infer_relationships(
     fk_pairs=None, 
     threshold=0.5,
     use_llm=False,
-    llm_max_candidates=20
+    llm_max_candidates=None,
+    data_probe=None,
+    data_discover=False,
+    review_store=None,
+    review_stats=None,
+    llm_concurrency=None,
+    rule_engine=None
 ):
     """
     综合推断关系（规则 + 可选 LLM）
@@ -355,18 +697,35 @@ def infer_relationships(
         fk_pairs: 已有的外键对集合
         threshold: 置信度阈值
         use_llm: 是否使用 LLM 复核
-        llm_max_candidates: LLM 复核的最大候选数
+        llm_max_candidates: LLM 复核的最大候选数（None 表示全部候选）
+        data_probe: 数据证据（InclusionProbe 抽样检查或 SketchEvidence 值草图），提供时按包含率更新候选置信度
+        data_discover: 是否用数据探测发现命名规则未覆盖的关系（需 data_probe）
+        review_store: LLM 复核的按候选缓存（JobStore）
+        review_stats: 提供时写入 LLM 复核统计
+        llm_concurrency: LLM 复核的并发批次数
+        rule_engine: IncrementalRuleEngine，提供时规则推断只重算变化的表
     
     Returns:
         list of {source, target, confidence, reason, from_column, to_column, infer_type}
     """
     print(f"[关系推断] 开始推断，表数量: {len(table_names or [])}, 阈值: {threshold}, 使用LLM: {use_llm}")
     
-    # 第一层 + 第二层：规则推断
-    candidates = infer_relationships_by_rules(
-        cols_by_table, table_names, fk_pairs, threshold=0.3  # 先用低阈值获取更多候选
-    )
+    # 第一层 + 第二层：规则推断（先用低阈值获取更多候选）
+    if rule_engine is not None:
+        candidates = rule_engine.update(cols_by_table, table_names, fk_pairs, threshold=0.3)
+        print(f"[关系推断] 增量规则推断: {rule_engine.last_stats}")
+    else:
+        candidates = infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, threshold=0.3)
     print(f"[关系推断] 规则推断得到 {len(candidates)} 个候选关系")
+
+    # 数据证据：抽样包含依赖检查
+    if data_probe is not None:
+        candidates = data_probe.score(candidates)
+        if data_discover:
+            discovered = data_probe.discover(cols_by_table, candidates)
+            candidates = sorted(candidates + discovered, key=lambda x: -x["confidence"])
+            print(f"[关系推断] 数据探测发现 {len(discovered)} 个新关系")
+        print(f"[关系推断] 数据证据开销: {data_probe.report()}")
     
     # 第三层：LLM 复核
     if use_llm and candidates:
@@ -374,7 +733,10 @@ def infer_relationships(
             candidates, 
             cols_by_table, 
             tables_data or {},
-            max_candidates=llm_max_candidates
+            max_candidates=llm_max_candidates,
+            review_store=review_store,
+            review_stats=review_stats,
+            concurrency=llm_concurrency
         )
         print(f"[关系推断] LLM 复核后 {len(candidates)} 个候选关系")
     
@@ -388,3 +750,44 @@ def infer_relationships(
     
     return result
 
+
+def cached_infer_relationships(store, cols_by_table, table_names, tables_data=None, fk_pairs=None,
+                               threshold=0.5, use_llm=False, llm_max_candidates=None, data_probe=None,
+                               data_discover=False, scope=None, refresh=False, ttl=INFERENCE_CACHE_TTL,
+                               llm_concurrency=None, rule_engine=None):
+    """
+    按 Schema 指纹缓存的 infer_relationships
+
+    缓存键 = Schema 指纹（启用 LLM 时包含表注释）+ 推断选项 + scope（数据证据依赖实际数据，
+    调用方应传入数据库标识与证据选项）。LLM 复核失败的结果不写入缓存；store 为 None 时不使用缓存。
+
+    Returns:
+        (result, cache_info)，cache_info = {"hit": bool, "key": str, "llm_review": {...} | None}
+    """
+    key = None
+    if store is not None:
+        key = _digest({
+            "schema": schema_fingerprint(cols_by_table, table_names, fk_pairs, tables_data if use_llm else None),
+            "threshold": threshold,
+            "use_llm": use_llm,
+            "llm_max_candidates": llm_max_candidates if use_llm else None,
+            "data_discover": data_discover if data_probe is not None else None,
+            "scope": scope,
+        })
+    if key is not None and not refresh:
+        cached = store.cache_get(INFERENCE_CACHE_NAMESPACE, key)
+        record_cache(INFERENCE_CACHE_NAMESPACE, cached is not None)
+        if cached is not None:
+            print(f"[关系推断] 命中推断缓存（{len(cached)} 个关系）")
+            return cached, {"hit": True, "key": key, "llm_review": None}
+
+    review_stats = {}
+    result = infer_relationships(
+        cols_by_table, table_names, tables_data=tables_data, fk_pairs=fk_pairs, threshold=threshold,
+        use_llm=use_llm, llm_max_candidates=llm_max_candidates, data_probe=data_probe,
+        data_discover=data_discover, review_store=store, review_stats=review_stats,
+        llm_concurrency=llm_concurrency, rule_engine=rule_engine
+    )
+    if key is not None and not review_stats.get("failed"):
+        store.cache_set(INFERENCE_CACHE_NAMESPACE, key, result, ttl=ttl)
+    return result, {"hit": False, "key": key, "llm_review": review_stats or None}
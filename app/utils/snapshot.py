@@ -0,0 +1,211 @@
+"""
+离线 Schema 快照
+
+将数据库的表、列、注释、外键、索引一次性导出为带版本号的压缩 JSON 文件（*.json.gz），
+之后文档生成、关系图与关系推断可直接基于快照运行，无需数据库连接。
+
+使用方式：连接参数中 db_type='snapshot'，database 填写快照文件路径，
+其余 database.py 的读取函数会自动转发到 SchemaSnapshot。
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+from decimal import Decimal
+
+from .database import (
+    get_tables_and_views,
+    get_columns_info,
+    get_foreign_keys,
+    get_indexes,
+)
+
+SNAPSHOT_FORMAT = "db2doc-snapshot"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_SUFFIX = ".json.gz"
+
+
+def _jsonable(value):
+    """将驱动返回的值转换为可 JSON 序列化的基础类型"""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (bytes, bytearray)):
+        return bytes(value).decode('utf-8', errors='replace')
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() else float(value)
+    return str(value)
+
+
+def _jsonable_row(row):
+    return [_jsonable(v) for v in row]
+
+
+class SchemaSnapshot:
+    """
+    只读的 Schema 快照，提供与 database.py 读取函数同形状的返回值。
+
+    close() 为空操作，便于替代数据库连接对象使用。
+    """
+
+    def __init__(self, data, path=None):
+        if data.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError("不是有效的 DB2Doc 快照文件")
+        version = int(data.get("version", 0))
+        if version > SNAPSHOT_VERSION:
+            raise ValueError(f"快照版本 {version} 高于当前支持的版本 {SNAPSHOT_VERSION}")
+
+        self.path = path
+        self.data = data
+        self.source = data.get("source", {}) or {}
+        self.tables = [tuple(t) for t in data.get("tables", [])]
+        self.columns = {t: [tuple(c) for c in cols] for t, cols in (data.get("columns", {}) or {}).items()}
+        self.foreign_keys = data.get("foreign_keys", []) or []
+        self.indexes = data.get("indexes", []) or []
+        self._comments = {t[0]: (t[2] if len(t) > 2 else '') or '' for t in self.tables}
+
+    @property
+    def database(self):
+        return self.source.get("database", '')
+
+    def close(self):
+        pass
+
+    def get_tables_and_views(self):
+        return list(self.tables)
+
+    def get_table_comment(self, table_name):
+        return self._comments.get(table_name, '')
+
+    def get_columns_info(self, table_name):
+        return list(self.columns.get(table_name, []))
+
+    def get_tables_with_missing_stats(self):
+        result = []
+        for table_name, table_type, table_comment in self.tables:
+            table_comment = table_comment or ''
+            missing_columns_count = sum(
+                1 for c in self.columns.get(table_name, [])
+                if not str(c[4] if len(c) > 4 and c[4] is not None else '').strip()
+            )
+            missing_table_comment = (not table_comment.strip())
+            result.append({
+                "table_name": table_name,
+                "table_type": table_type,
+                "table_comment": table_comment,
+                "missing_table_comment": missing_table_comment,
+                "missing_columns_count": missing_columns_count,
+                "missing_total": (1 if missing_table_comment else 0) + missing_columns_count,
+            })
+        return result
+
+    def get_all_columns(self, tables=None):
+        table_filter = set([t for t in tables if t]) if tables else None
+        rows = []
+        for table_name, _, _ in self.tables:
+            if table_filter is not None and table_name not in table_filter:
+                continue
+            for c in self.columns.get(table_name, []):
+                rows.append((table_name, c[0], c[1], c[4] if len(c) > 4 and c[4] is not None else ''))
+        return rows
+
+    def get_foreign_keys(self, tables=None):
+        table_filter = set([t for t in tables if t]) if tables else None
+        return [
+            e for e in self.foreign_keys
+            if table_filter is None or e.get("from_table") in table_filter or e.get("to_table") in table_filter
+        ]
+
+    def get_indexes(self, tables=None):
+        table_filter = set([t for t in tables if t]) if tables else None
+        return [i for i in self.indexes if table_filter is None or i.get("table_name") in table_filter]
+
+
+def export_snapshot(connection, database_name, db_type='mysql', tables=None):
+    """
+    从数据库连接采集快照数据（dict），可用 save_snapshot 写入文件。
+
+    tables 为空时采集全部表；外键/索引在当前数据库类型不支持时记为空列表。
+    """
+    table_filter = set([t for t in (tables or []) if t]) if tables else None
+
+    table_rows = []
+    for row in get_tables_and_views(connection, database_name, db_type):
+        table_name = row[0]
+        if table_filter is not None and table_name not in table_filter:
+            continue
+        table_type = row[1] if len(row) > 1 else ''
+        table_comment = row[2] if len(row) > 2 else ''
+        table_rows.append(_jsonable_row([table_name, table_type, table_comment or '']))
+
+    table_names = [t[0] for t in table_rows]
+    columns = {}
+    for table_name in table_names:
+        columns[table_name] = [
+            _jsonable_row(c) for c in get_columns_info(connection, table_name, database_name, db_type)
+        ]
+
+    try:
+        foreign_keys = get_foreign_keys(connection, database_name, db_type, tables=table_names)
+    except ValueError:
+        foreign_keys = []
+    try:
+        indexes = get_indexes(connection, database_name, db_type, tables=table_names)
+    except ValueError:
+        indexes = []
+
+    return {
+        "format": SNAPSHOT_FORMAT,
+        "version": SNAPSHOT_VERSION,
+        "created_at": datetime.now().isoformat(timespec='seconds'),
+        "source": {
+            "db_type": db_type,
+            "database": database_name,
+        },
+        "tables": table_rows,
+        "columns": columns,
+        "foreign_keys": [
+            {
+                "from_table": e.get("from_table"),
+                "to_table": e.get("to_table"),
+                "constraint_name": e.get("constraint_name"),
+                "columns": [
+                    {k: _jsonable(v) for k, v in col.items()} for col in e.get("columns", [])
+                ],
+            }
+            for e in foreign_keys
+        ],
+        "indexes": [{k: _jsonable(v) if k != "columns" else list(v) for k, v in i.items()} for i in indexes],
+    }
+
+
+def save_snapshot(snapshot_data, path):
+    """写入压缩快照文件，返回实际写入路径"""
+    path = str(path)
+    if not path.endswith(SNAPSHOT_SUFFIX):
+        path += SNAPSHOT_SUFFIX
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    with gzip.open(path, 'wt', encoding='utf-8') as f:
+        json.dump(snapshot_data, f, ensure_ascii=False, separators=(',', ':'))
+    return path
+
+
+def load_snapshot(path):
+    """读取快照文件并返回 SchemaSnapshot（兼容未压缩的 .json）"""
+    path = str(path or '')
+    if not path or not os.path.exists(path):
+        raise ValueError(f"快照文件不存在: {path}")
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'rt', encoding='utf-8') as f:
+        data = json.load(f)
+    return SchemaSnapshot(data, path=path)
+
+
+def snapshot_display_name(path):
+    """快照文件对应的展示名称（用于默认文档文件名）"""
+    name = os.path.basename(str(path or ''))
+    for suffix in (SNAPSHOT_SUFFIX, '.json'):
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name or 'snapshot'
@@ -0,0 +1,93 @@
+"""
+分阶段计时工具（文档生成的 catalog / llm / render / write 耗时分解）
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+# 文档生成的阶段：目录查询、LLM 推断、Markdown 渲染、文件写入
+DOC_STAGES = ('catalog', 'llm', 'render', 'write')
+
+
+def percentile(values, pct):
+    """线性插值百分位数，values 为空时返回 0.0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    if len(ordered) == 1:
+        return ordered[0]
+    rank = (len(ordered) - 1) * pct / 100.0
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+class StageTimer:
+    """
+    按表、按阶段累计耗时。
+
+    with timer.stage('llm', table_name):
+        ...
+    不指定表时（如批量预取目录）只计入阶段总耗时。
+    """
+
+    def __init__(self, stages=DOC_STAGES):
+        self.stages = tuple(stages)
+        self._lock = threading.Lock()
+        self._started = time.perf_counter()
+        self._stage_totals = {s: 0.0 for s in self.stages}
+        self._tables = {}
+
+    @contextmanager
+    def stage(self, name, table=None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start, table)
+
+    def add(self, name, seconds, table=None):
+        with self._lock:
+            self._stage_totals[name] = self._stage_totals.get(name, 0.0) + seconds
+            if table is not None:
+                per_table = self._tables.setdefault(table, {})
+                per_table[name] = per_table.get(name, 0.0) + seconds
+
+    def table_summary(self, table):
+        """单表的各阶段耗时（秒）"""
+        with self._lock:
+            per_table = dict(self._tables.get(table, {}))
+        return {
+            "table": table,
+            "seconds": round(sum(per_table.values()), 4),
+            "stages": {s: round(per_table.get(s, 0.0), 4) for s in self.stages},
+        }
+
+    def summary(self, slowest=10):
+        """汇总：各阶段总耗时与按表分布的 p50/p95/max，以及最慢的若干张表"""
+        with self._lock:
+            tables = {t: dict(v) for t, v in self._tables.items()}
+            stage_totals = dict(self._stage_totals)
+
+        stages = {}
+        for name in self.stages:
+            samples = [v.get(name, 0.0) for v in tables.values()]
+            stages[name] = {
+                "total": round(stage_totals.get(name, 0.0), 4),
+                "p50": round(percentile(samples, 50), 4),
+                "p95": round(percentile(samples, 95), 4),
+                "max": round(max(samples), 4) if samples else 0.0,
+            }
+
+        ranked = sorted(tables, key=lambda t: sum(tables[t].values()), reverse=True)
+        return {
+            "elapsed_seconds": round(time.perf_counter() - self._started, 4),
+            "tables_count": len(tables),
+            "stages": stages,
+            "table_seconds": {
+                "p50": round(percentile([sum(v.values()) for v in tables.values()], 50), 4),
+                "p95": round(percentile([sum(v.values()) for v in tables.values()], 95), 4),
+            },
+            "slowest_tables": [self.table_summary(t) for t in ranked[:slowest]],
+        }
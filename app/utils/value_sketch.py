@@ -0,0 +1,267 @@
+"""
+列取值草图（MinHash + HyperLogLog）
+
+大规模关联发现时，对每个 ID 类列只扫描一次有上限的样本，构建紧凑的草图并缓存到本地草图存储
+（共享任务存储的 kv_cache，命名空间 sketch）。候选列对的包含率在内存中用 NumPy 向量化估计，
+不再为每个候选对查询数据库：
+
+    J = |A∩B| / |A∪B|            MinHash 签名逐位相等的比例
+    |A∩B| ≈ J / (1 + J) · (|A| + |B|)   |A|、|B| 由 HyperLogLog 估计
+    containment(A ⊆ B) = |A∩B| / |A|
+"""
+
+import base64
+import hashlib
+import time
+
+import numpy as np
+
+from .database import track_operation
+from .inclusion_probe import (
+    quote_identifier, apply_evidence, discovery_pairs, edges_from_evidence, PROBE_DB_TYPES
+)
+from .job_store import get_job_store
+from .metrics import record_cache
+
+SKETCH_NAMESPACE = 'sketch'
+
+DEFAULT_NUM_PERM = 256
+DEFAULT_HLL_P = 12
+DEFAULT_SAMPLE_ROWS = 20000
+
+_U64 = np.uint64
+
+
+def _canonical(value):
+    """取值规范化：整数值的浮点数/数字字符串与整数一致"""
+    if isinstance(value, bytes):
+        return value
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    text = str(value).strip()
+    if text.lstrip('-').isdigit():
+        text = str(int(text))
+    return text.encode('utf-8')
+
+
+def hash_values(values):
+    """将取值映射为 64 位哈希（去重）"""
+    hashes = {
+        int.from_bytes(hashlib.blake2b(_canonical(v), digest_size=8).digest(), 'little')
+        for v in values if v is not None
+    }
+    return np.fromiter(hashes, dtype=_U64, count=len(hashes))
+
+
+def _permutations(num_perm, seed=1):
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, 2 ** 63, size=num_perm, dtype=np.uint64) | _U64(1)
+    b = rng.integers(0, 2 ** 63, size=num_perm, dtype=np.uint64)
+    return a, b
+
+
+def _bit_length(values):
+    """uint64 数组的位长（向量化）"""
+    length = np.zeros(values.shape, dtype=np.int64)
+    v = values.copy()
+    for shift in (32, 16, 8, 4, 2, 1):
+        mask = v >= (_U64(1) << _U64(shift))
+        length[mask] += shift
+        v[mask] >>= _U64(shift)
+    length += (v > 0)
+    return length
+
+
+class ColumnSketch:
+    """单列草图：MinHash 签名、HyperLogLog 寄存器与样本行数"""
+
+    def __init__(self, signature, registers, rows):
+        self.signature = signature
+        self.registers = registers
+        self.rows = rows
+
+    @classmethod
+    def build(cls, values, num_perm=DEFAULT_NUM_PERM, p=DEFAULT_HLL_P, chunk=2048):
+        hashes = hash_values(values)
+        a, b = _permutations(num_perm)
+        signature = np.full(num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        with np.errstate(over='ignore'):
+            for start in range(0, len(hashes), chunk):
+                block = hashes[start:start + chunk]
+                signature = np.minimum(signature, (a[:, None] * block[None, :] + b[:, None]).min(axis=1))
+
+        registers = np.zeros(1 << p, dtype=np.uint8)
+        if len(hashes):
+            index = (hashes >> _U64(64 - p)).astype(np.int64)
+            with np.errstate(over='ignore'):
+                rest = (hashes << _U64(p)) | (_U64(1) << _U64(p - 1))
+            rank = (64 - _bit_length(rest) + 1).astype(np.uint8)
+            np.maximum.at(registers, index, rank)
+        return cls(signature, registers, len(values))
+
+    def cardinality(self):
+        """HyperLogLog 基数估计（含小基数修正）"""
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return float(estimate)
+
+    def to_dict(self):
+        return {
+            "signature": base64.b64encode(self.signature.astype('<u8').tobytes()).decode('ascii'),
+            "registers": base64.b64encode(self.registers.tobytes()).decode('ascii'),
+            "rows": self.rows,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            np.frombuffer(base64.b64decode(data["signature"]), dtype='<u8').astype(np.uint64),
+            np.frombuffer(base64.b64decode(data["registers"]), dtype=np.uint8).copy(),
+            data["rows"],
+        )
+
+
+def estimate_containment(child_signatures, parent_signatures, child_cards, parent_cards):
+    """
+    向量化估计包含率：各参数为按候选对对齐的数组（签名形状 [n, num_perm]）
+    """
+    jaccard = np.mean(child_signatures == parent_signatures, axis=1)
+    intersection = jaccard / (1.0 + jaccard) * (child_cards + parent_cards)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        containment = np.where(child_cards > 0, intersection / child_cards, 0.0)
+    return np.clip(containment, 0.0, 1.0)
+
+
+@track_operation
+def scan_column_sample(connection, db_type, table, column, limit=DEFAULT_SAMPLE_ROWS):
+    """扫描列的有上限样本（非空值）"""
+    col = quote_identifier(column, db_type)
+    tbl = quote_identifier(table, db_type)
+    if db_type == 'sqlserver':
+        query = f"SELECT TOP {int(limit)} {col} FROM {tbl} WHERE {col} IS NOT NULL"
+    else:
+        query = f"SELECT {col} FROM {tbl} WHERE {col} IS NOT NULL LIMIT {int(limit)}"
+    cursor = connection.cursor()
+    cursor.execute(query)
+    return [r[0] for r in cursor.fetchall()]
+
+
+class SketchEvidence:
+    """
+    基于草图的数据证据（接口与 InclusionProbe 一致：score / discover / report）
+
+    scope: 草图缓存键前缀，用于区分数据库（如 "mysql:host:3306:db"）
+    """
+
+    def __init__(self, connection, db_type, scope, num_perm=DEFAULT_NUM_PERM, sample_rows=DEFAULT_SAMPLE_ROWS,
+                 ttl=24 * 3600, min_rows=5, max_columns=2000, store=None):
+        if db_type not in PROBE_DB_TYPES:
+            raise ValueError(f"值草图不支持的数据库类型: {db_type}")
+        self.connection = connection
+        self.db_type = db_type
+        self.scope = scope
+        self.num_perm = num_perm
+        self.sample_rows = sample_rows
+        self.ttl = ttl
+        self.min_rows = min_rows
+        self.max_columns = max_columns
+        self.store = store or get_job_store()
+        self.sketches = {}
+        self.stats = {"scanned": 0, "cached": 0, "skipped": 0, "scan_seconds": 0.0, "pairs": 0}
+
+    def _key(self, table, column):
+        return f"{self.scope}:{self.num_perm}:{self.sample_rows}:{table}.{column}"
+
+    def ensure(self, columns):
+        """确保列草图已就绪：优先读取草图存储，否则扫描一次样本并写回"""
+        for table, column in dict.fromkeys(columns):
+            if (table, column) in self.sketches:
+                continue
+            cached = self.store.cache_get(SKETCH_NAMESPACE, self._key(table, column))
+            record_cache(SKETCH_NAMESPACE, cached is not None)
+            if cached is not None:
+                self.sketches[(table, column)] = ColumnSketch.from_dict(cached)
+                self.stats["cached"] += 1
+                continue
+            if self.stats["scanned"] >= self.max_columns:
+                self.sketches[(table, column)] = None
+                self.stats["skipped"] += 1
+                continue
+            start = time.perf_counter()
+            try:
+                values = scan_column_sample(self.connection, self.db_type, table, column, self.sample_rows)
+            except Exception as e:
+                print(f"[值草图] 扫描 {table}.{column} 失败: {e}")
+                self.sketches[(table, column)] = None
+                continue
+            finally:
+                self.stats["scan_seconds"] += time.perf_counter() - start
+            sketch = ColumnSketch.build(values, self.num_perm)
+            self.sketches[(table, column)] = sketch
+            self.stats["scanned"] += 1
+            self.store.cache_set(SKETCH_NAMESPACE, self._key(table, column), sketch.to_dict(), ttl=self.ttl)
+
+    def containment(self, pairs):
+        """批量估计 [(child_table, child_column, parent_table, parent_column)] 的包含率证据"""
+        pairs = list(dict.fromkeys(pairs))
+        self.ensure([(p[0], p[1]) for p in pairs] + [(p[2], p[3]) for p in pairs])
+        usable = [
+            p for p in pairs
+            if self.sketches.get((p[0], p[1])) is not None and self.sketches.get((p[2], p[3])) is not None
+            and self.sketches[(p[0], p[1])].rows >= self.min_rows
+        ]
+        evidence = {p: None for p in pairs}
+        if not usable:
+            return evidence
+        self.stats["pairs"] += len(usable)
+
+        # 每列只取一次签名与基数，按候选对索引对齐后一次性比较
+        keys = list(dict.fromkeys([(p[0], p[1]) for p in usable] + [(p[2], p[3]) for p in usable]))
+        position = {k: i for i, k in enumerate(keys)}
+        signatures = np.stack([self.sketches[k].signature for k in keys])
+        cards = np.array([self.sketches[k].cardinality() for k in keys])
+        child_idx = np.array([position[(p[0], p[1])] for p in usable])
+        parent_idx = np.array([position[(p[2], p[3])] for p in usable])
+
+        result = np.empty(len(usable))
+        chunk = 4096
+        for start in range(0, len(usable), chunk):
+            c = child_idx[start:start + chunk]
+            q = parent_idx[start:start + chunk]
+            result[start:start + chunk] = estimate_containment(signatures[c], signatures[q], cards[c], cards[q])
+
+        for i, p in enumerate(usable):
+            evidence[p] = {
+                "method": 'sketch',
+                "sampled": int(round(cards[child_idx[i]])),
+                "matched": int(round(cards[child_idx[i]] * result[i])),
+                "containment": round(float(result[i]), 4),
+            }
+        return evidence
+
+    def score(self, candidates):
+        """按草图包含率更新候选置信度（与 InclusionProbe.score 相同的融合方式）"""
+        to_score = [c for c in candidates if c.get("to_column") and c.get("from_column")]
+        evidence = self.containment((c["source"], c["from_column"], c["target"], c["to_column"]) for c in to_score)
+        for c in to_score:
+            ev = evidence.get((c["source"], c["from_column"], c["target"], c["to_column"]))
+            if ev is not None:
+                apply_evidence(c, ev)
+        result = list(candidates)
+        result.sort(key=lambda x: -x["confidence"])
+        return result
+
+    def discover(self, cols_by_table, candidates, min_containment=0.9):
+        """对所有同类型族的（子列, 父表 id）对在内存中估计包含率，不再逐对查询"""
+        evidence = self.containment(discovery_pairs(cols_by_table, candidates))
+        return edges_from_evidence(evidence, min_containment)
+
+    def report(self):
+        return {**self.stats, "scan_seconds": round(self.stats["scan_seconds"], 4), "sketches": len(self.sketches)}
+
+    def close(self):
+        """草图使用调用方的连接，无需关闭"""
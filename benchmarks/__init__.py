@@ -0,0 +1,8 @@
+"""
+DB2Doc 性能基准测试
+
+- schema_generator: 合成大规模 Schema（宽表、分表族、外键式命名、中文注释）
+- fake_llm: 进程内的确定性 LLM 客户端替身
+- mock_llm_server: 本地 OpenAI 兼容模拟服务（延迟分布、并发上限、错误注入）
+- run_benchmarks: 基准测试入口，输出机器可读的 JSON 结果
+"""
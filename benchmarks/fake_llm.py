@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+确定性 LLM 客户端替身
+
+与 openai.OpenAI 客户端的 chat.completions.create 接口兼容，
+根据提示词内容生成固定格式的回答（字段含义 JSON / 关系复核 JSON），
+用于基准测试中排除真实模型的延迟与随机性。
+"""
+
+import json
+import re
+import time
+import zlib
+from types import SimpleNamespace
+
+# 常见字段词根的中文含义
+WORD_MEANINGS = {
+    'id': '标识符', 'name': '名称', 'code': '编码', 'no': '编号', 'status': '状态',
+    'type': '类型', 'amount': '金额', 'remark': '备注', 'created': '创建', 'updated': '更新',
+    'at': '时间', 'by': '人', 'time': '时间', 'date': '日期', 'ext': '扩展', 'field': '字段',
+    'user': '用户', 'order': '订单', 'customer': '客户', 'cust': '客户', 'product': '商品',
+    'dept': '部门', 'department': '部门', 'org': '组织', 'organization': '组织', 'emp': '员工',
+    'employee': '员工', 'role': '角色', 'shop': '店铺', 'member': '会员', 'account': '账户',
+}
+
+_FIELDS_PATTERN = re.compile(r'中字段 (.*?) 的中文含义')
+_CANDIDATE_PATTERN = re.compile(r'^(\d+)\. (\S+?)\.(\S+) -> (\S+)$', re.MULTILINE)
+_TABLE_PATTERN = re.compile(r'请给出表 (\S+) 的中文说明')
+
+
+def _stable_hash(text):
+    return zlib.crc32(text.encode('utf-8'))
+
+
+def _split_words(name):
+    words = re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+    return [w for w in re.split(r'[_\W]+', words) if w]
+
+
+def mock_meaning(column_name):
+    """根据字段名生成确定性的中文含义（不超过10个字符）"""
+    parts = []
+    for word in _split_words(column_name):
+        if word.isdigit():
+            parts.append(word)
+        else:
+            parts.append(WORD_MEANINGS.get(word, word[:4]))
+    return (''.join(parts) or column_name)[:10]
+
+
+def mock_answer(prompt):
+    """根据提示词内容生成确定性回答"""
+    fields_match = _FIELDS_PATTERN.search(prompt)
+    if fields_match:
+        fields = [f.strip() for f in fields_match.group(1).split(',') if f.strip()]
+        return json.dumps({f: mock_meaning(f) for f in fields}, ensure_ascii=False)
+
+    candidates = _CANDIDATE_PATTERN.findall(prompt)
+    if candidates:
+        results = []
+        for index, source, column, target in candidates:
+            score = round(0.3 + (_stable_hash(f"{source}.{column}->{target}") % 70) / 100, 2)
+            results.append({"index": int(index), "score": score, "reason": f"{column} 指向 {target}"})
+        return json.dumps({"results": results}, ensure_ascii=False)
+
+    table_match = _TABLE_PATTERN.search(prompt)
+    if table_match:
+        return f"{mock_meaning(table_match.group(1))}表，用于记录相关业务数据"
+
+    return json.dumps({}, ensure_ascii=False)
+
+
+def estimate_tokens(text):
+    """粗略估算 token 数（中文按字计，其余按 4 字符计）"""
+    cjk = sum(1 for ch in text if '一' <= ch <= '鿿')
+    return cjk + max(1, (len(text) - cjk) // 4)
+
+
+def build_completion(messages, model='mock-model'):
+    """构造与 OpenAI chat.completions 返回结构一致的对象"""
+    prompt = messages[-1]["content"] if messages else ''
+    content = mock_answer(prompt)
+    prompt_tokens = sum(estimate_tokens(m.get("content", '')) for m in messages)
+    completion_tokens = estimate_tokens(content)
+    return SimpleNamespace(
+        model=model,
+        choices=[SimpleNamespace(index=0, finish_reason='stop',
+                                 message=SimpleNamespace(role='assistant', content=content))],
+        usage=SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens,
+                              total_tokens=prompt_tokens + completion_tokens),
+    )
+
+
+class _Completions:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def create(self, model=None, messages=None, **kwargs):
+        owner = self._owner
+        owner.calls += 1
+        if owner.latency:
+            time.sleep(owner.latency)
+        return build_completion(messages or [], model or 'mock-model')
+
+
+class FakeLLMClient:
+    """进程内 LLM 客户端替身，latency 为每次调用的固定延迟（秒）"""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_Completions(self))
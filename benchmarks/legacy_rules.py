@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+规则关系推断的原始实现（预编译引擎之前的版本）
+
+仅用于基准对比与等价性测试：app.utils.relationship_inference.RuleInferenceEngine
+的输出必须与此实现完全一致。
+"""
+
+import re
+
+
+def _normalize_name(name):
+    """标准化名称：去除下划线、转小写"""
+    return (name or '').lower().replace('_', '').replace('-', '').replace('.', '')
+
+
+def _is_id_like_type(data_type):
+    """判断数据类型是否适合作为外键"""
+    if not data_type:
+        return False
+    dt = data_type.lower()
+    # 整数类型、UUID、常见字符串ID类型
+    id_types = ['int', 'bigint', 'smallint', 'tinyint', 'uuid', 'char', 'varchar']
+    return any(t in dt for t in id_types)
+
+
+def _extract_entity_name(column_name):
+    """
+    从列名中提取可能的实体名
+    支持模式：xxx_id, xxxId, id_xxx, xxx_code, xxxCode, xxx_no, xxxNo
+    """
+    col = (column_name or '').strip()
+    if not col:
+        return None
+    
+    lower = col.lower()
+    
+    # 跳过纯 id / code / no
+    if lower in ('id', 'code', 'no', 'number', 'num'):
+        return None
+    
+    patterns = [
+        # xxx_id -> xxx
+        (r'^(.+)_id$', 1),
+        # xxxId / xxxID -> xxx
+        (r'^(.+?)(Id|ID)$', 1),
+        # id_xxx -> xxx
+        (r'^id_(.+)$', 1),
+        # xxx_code -> xxx
+        (r'^(.+)_code$', 1),
+        # xxxCode -> xxx
+        (r'^(.+?)Code$', 1),
+        # xxx_no -> xxx
+        (r'^(.+)_no$', 1),
+        # xxxNo -> xxx  
+        (r'^(.+?)No$', 1),
+        # xxx_key -> xxx
+        (r'^(.+)_key$', 1),
+        # fk_xxx -> xxx
+        (r'^fk_(.+)$', 1),
+    ]
+    
+    for pattern, group in patterns:
+        match = re.match(pattern, col, re.IGNORECASE)
+        if match:
+            return match.group(group)
+    
+    return None
+
+
+def infer_relationships_by_rules(cols_by_table, table_names, fk_pairs=None, threshold=0.5):
+    """
+    第一层 + 第二层：基于命名规则和类型兼容性推断关系
+    
+    Args:
+        cols_by_table: {table_name: [(col_name, data_type), ...]}
+        table_names: 表名集合
+        fk_pairs: 已有的外键对集合 {(from_table, to_table), ...}
+        threshold: 置信度阈值
+    
+    Returns:
+        list of {source, target, confidence, reason, from_column, to_column}
+    """
+    table_set = set(table_names or [])
+    fk_pairs = fk_pairs or set()
+    
+    # 构建表名映射（标准化名称 -> 原始表名列表）
+    # 支持多种匹配方式：完整表名、去前缀后的表名
+    norm_to_tables = {}
+    for t in table_set:
+        # 完整标准化名称
+        norm = _normalize_name(t)
+        norm_to_tables.setdefault(norm, []).append(t)
+        
+        # 单复数兜底
+        if norm.endswith('s') and len(norm) > 1:
+            norm_to_tables.setdefault(norm[:-1], []).append(t)
+        if norm.endswith('es') and len(norm) > 2:
+            norm_to_tables.setdefault(norm[:-2], []).append(t)
+        
+        # 提取表名的各个部分（按下划线分割），支持 sys_role -> role, data_device -> device
+        parts = t.lower().split('_')
+        if len(parts) > 1:
+            # 最后一个部分（如 sys_role -> role）
+            last_part = _normalize_name(parts[-1])
+            if last_part and len(last_part) > 2:
+                norm_to_tables.setdefault(last_part, []).append(t)
+                # 单复数
+                if last_part.endswith('s') and len(last_part) > 1:
+                    norm_to_tables.setdefault(last_part[:-1], []).append(t)
+            
+            # 最后两个部分（如 sys_user_role -> userrole, user_role）
+            if len(parts) > 2:
+                last_two = _normalize_name('_'.join(parts[-2:]))
+                if last_two and len(last_two) > 3:
+                    norm_to_tables.setdefault(last_two, []).append(t)
+    
+    # 构建表列集合（用于检查目标表是否有 id 列）
+    table_cols_map = {}
+    for table_name, cols in cols_by_table.items():
+        table_cols_map[table_name] = {(c or '').lower(): dt for c, dt in cols}
+    
+    inferred = []
+    seen_pairs = set()  # 避免重复
+    
+    for table_name, cols in cols_by_table.items():
+        if table_name not in table_set:
+            continue
+        
+        for col_name, data_type in cols:
+            # 提取可能的实体名
+            entity = _extract_entity_name(col_name)
+            if not entity:
+                continue
+            
+            entity_norm = _normalize_name(entity)
+            if not entity_norm:
+                continue
+            
+            # 查找候选目标表
+            candidates = norm_to_tables.get(entity_norm, [])
+            candidates = [c for c in candidates if c != table_name]
+            
+            # 去重
+            seen = set()
+            candidates = [c for c in candidates if not (c in seen or seen.add(c))]
+            
+            if not candidates:
+                continue
+            
+            # 计算置信度
+            for target in candidates:
+                pair = (table_name, target)
+                if pair in fk_pairs or pair in seen_pairs:
+                    continue
+                
+                confidence = 0.5  # 基础置信度
+                reasons = [f"字段 {col_name} 匹配表名 {target}"]
+                
+                # 类型兼容性加分
+                if _is_id_like_type(data_type):
+                    confidence += 0.1
+                    reasons.append("数据类型适合作为外键")
+                
+                # 目标表有 id 列加分
+                target_cols = table_cols_map.get(target, {})
+                if 'id' in target_cols:
+                    confidence += 0.15
+                    reasons.append("目标表存在 id 列")
+                
+                # 表名精确匹配加分（如 role_id -> sys_role 比 role_id -> sys_user_role 更可能）
+                target_lower = target.lower()
+                entity_lower = entity.lower()
+                if target_lower.endswith('_' + entity_lower) or target_lower == entity_lower:
+                    confidence += 0.15
+                    reasons.append("表名精确匹配字段实体名")
+                elif entity_lower in target_lower.split('_'):
+                    confidence += 0.1
+                    reasons.append("表名包含字段实体名")
+                
+                # 唯一候选加分
+                if len(candidates) == 1:
+                    confidence += 0.1
+                    reasons.append("唯一匹配的候选表")
+                elif len(candidates) <= 3:
+                    # 多候选但不太多，轻微降分
+                    confidence -= 0.05
+                    reasons.append(f"存在 {len(candidates)} 个候选表")
+                else:
+                    confidence -= 0.15  # 太多候选，大幅降分
+                    reasons.append(f"存在 {len(candidates)} 个候选表（较多）")
+                
+                # 限制置信度范围
+                confidence = max(0.1, min(1.0, confidence))
+                
+                if confidence >= threshold:
+                    seen_pairs.add(pair)
+                    inferred.append({
+                        "source": table_name,
+                        "target": target,
+                        "confidence": round(confidence, 2),
+                        "reason": "；".join(reasons),
+                        "from_column": col_name,
+                        "to_column": "id" if 'id' in target_cols else None,
+                        "infer_type": "rule"
+                    })
+    
+    # 按置信度降序排序
+    inferred.sort(key=lambda x: -x["confidence"])
+    return inferred
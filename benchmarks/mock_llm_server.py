@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+本地 OpenAI 兼容模拟服务（用于吞吐与重试测试，无需真实模型）
+
+- POST /v1/chat/completions：根据提示词中的字段列表返回确定性的 JSON 回答
+- GET  /v1/models：返回模拟模型列表
+- GET  /stats：返回请求计数、并发峰值、延迟统计
+
+可配置：
+- 延迟分布：fixed / uniform / normal / lognormal / exponential
+- 并发上限：超出后排队（queue）或直接返回 429（reject）
+- 错误注入：按比例返回 5xx、429、超时挂起或非 JSON 内容（随机种子可复现）
+
+运行：
+    python benchmarks/mock_llm_server.py --port 18080 --latency lognormal --latency-mean 0.8 --max-concurrency 4
+    OPENAI_BASE_URL=http://127.0.0.1:18080/v1 python main.py
+"""
+
+import argparse
+import json
+import math
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# 确保可以导入 benchmarks 模块
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from benchmarks.fake_llm import mock_answer, estimate_tokens
+
+LATENCY_DISTRIBUTIONS = ('fixed', 'uniform', 'normal', 'lognormal', 'exponential')
+
+
+class MockLLMConfig:
+    """模拟服务配置"""
+
+    def __init__(self, latency='fixed', latency_mean=0.0, latency_stddev=0.0,
+                 latency_min=0.0, latency_max=None, max_concurrency=0, overload='queue',
+                 error_rate=0.0, error_status=500, rate_limit_rate=0.0,
+                 timeout_rate=0.0, timeout_seconds=60.0, malformed_rate=0.0,
+                 seed=None, model='mock-model'):
+        if latency not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"不支持的延迟分布: {latency}")
+        if overload not in ('queue', 'reject'):
+            raise ValueError(f"不支持的过载策略: {overload}")
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_stddev = latency_stddev
+        self.latency_min = latency_min
+        self.latency_max = latency_max
+        self.max_concurrency = max_concurrency
+        self.overload = overload
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rate_limit_rate = rate_limit_rate
+        self.timeout_rate = timeout_rate
+        self.timeout_seconds = timeout_seconds
+        self.malformed_rate = malformed_rate
+        self.seed = seed
+        self.model = model
+
+
+class MockLLMServer:
+    """OpenAI 兼容模拟服务，可在后台线程中启动（port=0 时自动分配端口）"""
+
+    def __init__(self, config=None, host='127.0.0.1', port=0):
+        self.config = config or MockLLMConfig()
+        self._rng = random.Random(self.config.seed)
+        self._rng_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._slots = threading.Semaphore(self.config.max_concurrency) if self.config.max_concurrency > 0 else None
+        self._thread = None
+        self.reset_stats()
+        self.httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self.httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def reset_stats(self):
+        with self._stats_lock:
+            self.stats = {
+                "requests": 0,
+                "completed": 0,
+                "errors": 0,
+                "rate_limited": 0,
+                "rejected": 0,
+                "timeouts": 0,
+                "malformed": 0,
+                "in_flight": 0,
+                "max_in_flight": 0,
+                "latency_total_s": 0.0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+            }
+
+    def _bump(self, key, value=1):
+        with self._stats_lock:
+            self.stats[key] += value
+            if key == 'in_flight':
+                self.stats["max_in_flight"] = max(self.stats["max_in_flight"], self.stats["in_flight"])
+
+    def snapshot_stats(self):
+        with self._stats_lock:
+            stats = dict(self.stats)
+        stats["avg_latency_s"] = round(stats["latency_total_s"] / stats["completed"], 4) if stats["completed"] else 0.0
+        return stats
+
+    def sample_latency(self):
+        """按配置的分布抽取一次延迟（秒）"""
+        cfg = self.config
+        with self._rng_lock:
+            if cfg.latency == 'fixed':
+                value = cfg.latency_mean
+            elif cfg.latency == 'uniform':
+                value = self._rng.uniform(cfg.latency_min, cfg.latency_max if cfg.latency_max is not None else cfg.latency_mean * 2)
+            elif cfg.latency == 'normal':
+                value = self._rng.gauss(cfg.latency_mean, cfg.latency_stddev)
+            elif cfg.latency == 'lognormal':
+                # 以均值/标准差参数化，得到长尾延迟
+                mean = max(cfg.latency_mean, 1e-6)
+                sigma2 = math.log(1 + (cfg.latency_stddev / mean) ** 2) if cfg.latency_stddev else 0.25
+                value = self._rng.lognormvariate(math.log(mean) - sigma2 / 2, math.sqrt(sigma2))
+            else:
+                value = self._rng.expovariate(1 / cfg.latency_mean) if cfg.latency_mean > 0 else 0.0
+        value = max(cfg.latency_min, value)
+        if cfg.latency_max is not None:
+            value = min(cfg.latency_max, value)
+        return value
+
+    def pick_fault(self):
+        """按比例抽取本次请求要注入的故障类型（None 表示正常）"""
+        cfg = self.config
+        with self._rng_lock:
+            roll = self._rng.random()
+        for fault, rate in (('error', cfg.error_rate), ('rate_limit', cfg.rate_limit_rate),
+                            ('timeout', cfg.timeout_rate), ('malformed', cfg.malformed_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def completion_payload(self, body):
+        """构造 chat.completions 响应体"""
+        messages = body.get("messages") or []
+        prompt = messages[-1].get("content", '') if messages else ''
+        content = mock_answer(str(prompt))
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ''))) for m in messages)
+        completion_tokens = estimate_tokens(content)
+        self._bump('prompt_tokens', prompt_tokens)
+        self._bump('completion_tokens', completion_tokens)
+        return {
+            "id": f"chatcmpl-mock-{self.stats['requests']}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model") or self.config.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+            },
+        }
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                # 压测时不输出访问日志
+                pass
+
+            def _send_json(self, status, payload, headers=None):
+                data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json; charset=utf-8')
+                self.send_header('Content-Length', str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _send_error(self, status, message, error_type, headers=None):
+                self._send_json(status, {"error": {"message": message, "type": error_type, "code": status}}, headers)
+
+            def do_GET(self):
+                path = self.path.split('?')[0].rstrip('/')
+                if path in ('/v1/models', '/models'):
+                    self._send_json(200, {"object": "list", "data": [
+                        {"id": server.config.model, "object": "model", "owned_by": "mock"}
+                    ]})
+                elif path == '/stats':
+                    self._send_json(200, server.snapshot_stats())
+                else:
+                    self._send_error(404, f"未知路径: {self.path}", 'not_found')
+
+            def do_POST(self):
+                path = self.path.split('?')[0].rstrip('/')
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                if path == '/stats/reset':
+                    server.reset_stats()
+                    self._send_json(200, {"success": True})
+                    return
+                if path not in ('/v1/chat/completions', '/chat/completions'):
+                    self._send_error(404, f"未知路径: {self.path}", 'not_found')
+                    return
+                try:
+                    body = json.loads(raw.decode('utf-8') or '{}')
+                except ValueError:
+                    self._send_error(400, "请求体不是合法的 JSON", 'invalid_request_error')
+                    return
+
+                server._bump('requests')
+                slots = server._slots
+                if slots is not None:
+                    if server.config.overload == 'reject':
+                        if not slots.acquire(blocking=False):
+                            server._bump('rejected')
+                            self._send_error(429, "并发超出上限", 'rate_limit_error', {"Retry-After": "1"})
+                            return
+                    else:
+                        slots.acquire()
+                server._bump('in_flight')
+                start = time.perf_counter()
+                try:
+                    self._handle_completion(body)
+                finally:
+                    server._bump('in_flight', -1)
+                    if slots is not None:
+                        slots.release()
+                    server._bump('latency_total_s', time.perf_counter() - start)
+
+            def _handle_completion(self, body):
+                fault = server.pick_fault()
+                latency = server.sample_latency()
+
+                if fault == 'timeout':
+                    server._bump('timeouts')
+                    time.sleep(server.config.timeout_seconds)
+                    self._send_error(504, "模拟超时", 'timeout')
+                    return
+                if latency > 0:
+                    time.sleep(latency)
+                if fault == 'error':
+                    server._bump('errors')
+                    self._send_error(server.config.error_status, "模拟服务错误", 'server_error')
+                    return
+                if fault == 'rate_limit':
+                    server._bump('rate_limited')
+                    self._send_error(429, "模拟限流", 'rate_limit_error', {"Retry-After": "1"})
+                    return
+
+                payload = server.completion_payload(body)
+                if fault == 'malformed':
+                    server._bump('malformed')
+                    payload["choices"][0]["message"]["content"] = "抱歉，我无法给出 JSON 结果。"
+                server._bump('completed')
+                self._send_json(200, payload)
+
+        return Handler
+
+    def start(self):
+        """在后台线程中启动服务"""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenAI 兼容模拟服务')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--model', default='mock-model')
+    parser.add_argument('--latency', choices=LATENCY_DISTRIBUTIONS, default='fixed', help='延迟分布')
+    parser.add_argument('--latency-mean', type=float, default=0.0, help='平均延迟（秒）')
+    parser.add_argument('--latency-stddev', type=float, default=0.0, help='延迟标准差（秒）')
+    parser.add_argument('--latency-min', type=float, default=0.0)
+    parser.add_argument('--latency-max', type=float, default=None)
+    parser.add_argument('--max-concurrency', type=int, default=0, help='并发上限，0 表示不限制')
+    parser.add_argument('--overload', choices=('queue', 'reject'), default='queue', help='超出并发上限时排队或返回 429')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='返回服务错误的比例')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--rate-limit-rate', type=float, default=0.0, help='返回 429 的比例')
+    parser.add_argument('--timeout-rate', type=float, default=0.0, help='挂起至超时的比例')
+    parser.add_argument('--timeout-seconds', type=float, default=60.0)
+    parser.add_argument('--malformed-rate', type=float, default=0.0, help='返回非 JSON 内容的比例')
+    parser.add_argument('--seed', type=int, default=None, help='随机种子（故障注入与延迟可复现）')
+    args = parser.parse_args()
+
+    config = MockLLMConfig(
+        latency=args.latency, latency_mean=args.latency_mean, latency_stddev=args.latency_stddev,
+        latency_min=args.latency_min, latency_max=args.latency_max,
+        max_concurrency=args.max_concurrency, overload=args.overload,
+        error_rate=args.error_rate, error_status=args.error_status,
+        rate_limit_rate=args.rate_limit_rate, timeout_rate=args.timeout_rate,
+        timeout_seconds=args.timeout_seconds, malformed_rate=args.malformed_rate,
+        seed=args.seed, model=args.model,
+    )
+    server = MockLLMServer(config, args.host, args.port)
+    print(f"模拟 LLM 服务已启动: {server.url}（Ctrl+C 退出）")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        print(json.dumps(server.snapshot_stats(), ensure_ascii=False, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+DB2Doc 基准测试入口
+
+基于合成 Schema（SQLite 文件 / 离线快照）与确定性 LLM 替身，测量：
+- generate_markdown            Markdown 表格渲染
+- infer_relationships_by_rules 规则关系推断（含引擎构建）
+- rule_engine_infer            预构建 RuleInferenceEngine 上的推断
+- infer_relationships_legacy   原始规则实现（对照，结果附 speedup）
+- rule_incremental_update      增量规则推断：每次修改一张表后 IncrementalRuleEngine.update
+- graph_dsl                    关系汇总、核心表分组与 Mermaid DSL 构建
+- catalog_sqlite / catalog_snapshot  目录读取（表、列、外键）
+- graph_endpoint               /api/graph 端到端
+- generate_docs                /api/generate_docs 端到端（后台线程 + 日志队列；
+                               --llm-server 时经由 mock_llm_server 走真实 HTTP 客户端）
+
+运行：
+    python benchmarks/run_benchmarks.py --tables 1000 --output data/bench/result.json
+    python benchmarks/run_benchmarks.py --tables 1000 --compare data/bench/baseline.json --fail-on-regression
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from unittest.mock import patch
+
+# 确保可以导入 app 与 benchmarks 模块
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from benchmarks.schema_generator import generate_schema
+from benchmarks.fake_llm import FakeLLMClient
+
+RESULT_FORMAT = "db2doc-benchmark"
+
+
+@contextlib.contextmanager
+def _quiet(enabled=True):
+    """屏蔽被测代码中的 print 输出"""
+    if not enabled:
+        yield
+        return
+    with open(os.devnull, 'w', encoding='utf-8') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def time_case(fn, repeat=3, items=1, warmup=True, quiet=True):
+    """多次运行 fn 并统计耗时（秒）"""
+    with _quiet(quiet):
+        if warmup:
+            fn()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            samples.append(time.perf_counter() - start)
+    median = statistics.median(samples)
+    return {
+        "repeat": repeat,
+        "items": items,
+        "median_s": round(median, 6),
+        "mean_s": round(statistics.mean(samples), 6),
+        "min_s": round(min(samples), 6),
+        "max_s": round(max(samples), 6),
+        "items_per_s": round(items / median, 2) if median > 0 else None,
+    }
+
+
+def bench_generate_markdown(schema, repeat):
+    from app.utils.ai_helper import generate_markdown
+
+    tables = [(cols, {c[0]: c[4] for c in cols if c[4]}) for cols in schema.columns.values()]
+
+    def run():
+        for cols, meanings in tables:
+            generate_markdown(cols, meanings)
+
+    return time_case(run, repeat, items=len(tables))
+
+
+def bench_rule_inference(schema, repeat, impl='engine'):
+    """
+    impl: engine（infer_relationships_by_rules，含引擎构建）/ prebuilt（复用已构建的引擎）/ legacy（原始实现）
+          / incremental（增量引擎，每次交替为一张表增删一列后更新）
+    """
+    from app.utils.relationship_inference import (
+        infer_relationships_by_rules, RuleInferenceEngine, IncrementalRuleEngine
+    )
+    from benchmarks import legacy_rules
+
+    cols_by_table = schema.cols_by_table()
+    table_names = set(schema.table_names)
+    fk_pairs = {(fk["from_table"], fk["to_table"]) for fk in schema.foreign_keys}
+
+    if impl == 'prebuilt':
+        engine = RuleInferenceEngine(cols_by_table, table_names)
+        infer = lambda: engine.infer(fk_pairs, threshold=0.3)
+    elif impl == 'incremental':
+        engine = IncrementalRuleEngine()
+        engine.update(cols_by_table, table_names, fk_pairs, threshold=0.3)
+        altered = schema.table_names[len(schema.table_names) // 2]
+        original = cols_by_table[altered]
+        state = {"extra": False}
+
+        def infer():
+            state["extra"] = not state["extra"]
+            cols_by_table[altered] = original + [('owner_user_id', 'bigint')] if state["extra"] else original
+            return engine.update(cols_by_table, table_names, fk_pairs, threshold=0.3)
+    elif impl == 'legacy':
+        infer = lambda: legacy_rules.infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, threshold=0.3)
+    else:
+        infer = lambda: infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, threshold=0.3)
+
+    return time_case(infer, repeat, items=len(table_names))
+
+
+def bench_graph_dsl(schema, repeat):
+    from app.routes.api_graph_mermaid import (
+        build_relationships, classify_tables, build_mermaid_dsl, apply_grouping
+    )
+    from app.utils.relationship_inference import infer_relationships_by_rules
+
+    table_names = schema.table_names
+    cols_by_table = schema.cols_by_table()
+    fk_pairs = {(fk["from_table"], fk["to_table"]) for fk in schema.foreign_keys}
+    with _quiet():
+        inferred = infer_relationships_by_rules(cols_by_table, set(table_names), fk_pairs, threshold=0.3)
+
+    def run():
+        relationships = build_relationships(
+            table_names, schema.foreign_keys, inferred,
+            include_fk=True, include_inferred=True, threshold=0.6
+        )
+        grouping = classify_tables(table_names, relationships)
+        build_mermaid_dsl(grouping["sorted_table_names"], cols_by_table, relationships, grouping["core_tables"])
+        tables_data = {t: {"type": 'BASE TABLE', "comment": ''} for t in table_names}
+        apply_grouping(tables_data, table_names, grouping)
+
+    return time_case(run, repeat, items=len(table_names))
+
+
+def _catalog_reads(connection, database, db_type):
+    from app.utils.database import get_tables_and_views, get_all_columns, get_foreign_keys
+
+    tables = [t[0] for t in get_tables_and_views(connection, database, db_type)]
+    get_all_columns(connection, database, db_type, tables=tables)
+    get_foreign_keys(connection, database, db_type, tables=tables)
+
+
+def bench_catalog(db_path, db_type, num_tables, repeat):
+    from app.utils.database import connect_db
+
+    def run():
+        connection = connect_db(None, None, None, 0, db_path, db_type)
+        try:
+            _catalog_reads(connection, db_path, db_type)
+        finally:
+            connection.close()
+
+    return time_case(run, repeat, items=num_tables)
+
+
+def bench_graph_endpoint(client, snapshot_path, num_tables, repeat):
+    def run():
+        resp = client.post('/api/graph', json={
+            "db_type": 'snapshot',
+            "database": snapshot_path,
+            "options": {"include_fk": True, "include_inferred": True, "threshold": 0.6},
+        })
+        result = resp.get_json()
+        if not result.get("success"):
+            raise RuntimeError(result.get("message"))
+
+    return time_case(run, repeat, items=num_tables)
+
+
+def bench_generate_docs(client, db_path, tables, output_dir, repeat, llm_latency, llm_server=False, timeout=600):
+    from app.utils.job_store import get_job_store
+    from app.config import config
+
+    def run():
+        resp = client.post('/api/generate_docs', json={
+            "db_type": 'sqlite',
+            "database": db_path,
+            "tables": tables,
+            "output_path": output_dir,
+            "file_name": 'bench.md',
+        })
+        body = resp.get_json()
+        if not body.get("success"):
+            raise RuntimeError(body.get("message"))
+        deadline = time.time() + timeout
+        for event in get_job_store().iter_events(body["job_id"], poll_interval=0.05, timeout=1):
+            if event is not None:
+                message = event[1]
+                if message.startswith("GENERATION_COMPLETE:"):
+                    return
+                if message.startswith("GENERATION_ERROR:"):
+                    raise RuntimeError(message)
+            if time.time() > deadline:
+                break
+        raise TimeoutError("generate_docs 超时")
+
+    if llm_server:
+        # 经由 HTTP 调用本地模拟服务，覆盖真实的 OpenAI 客户端路径
+        from benchmarks.mock_llm_server import MockLLMServer, MockLLMConfig
+
+        with MockLLMServer(MockLLMConfig(latency_mean=llm_latency)) as server, \
+                patch.dict(config['ai']['openai'], {"base_url": server.url}):
+            result = time_case(run, repeat, items=len(tables))
+            result["llm_calls"] = server.snapshot_stats()["requests"]
+        return result
+
+    fake_llm = FakeLLMClient(latency=llm_latency)
+    with patch('app.utils.ai_helper.get_openai_client', return_value=fake_llm):
+        result = time_case(run, repeat, items=len(tables))
+    result["llm_calls"] = fake_llm.calls
+    return result
+
+
+def run_all(args):
+    """运行全部基准测试，返回结果字典"""
+    work_dir = tempfile.mkdtemp(prefix='db2doc_bench_')
+    try:
+        schema = generate_schema(args.tables, seed=args.seed)
+        num_tables = len(schema.tables)
+        db_path = schema.write_sqlite(os.path.join(work_dir, 'bench.db'))
+
+        from app.utils.snapshot import save_snapshot
+        snapshot_path = save_snapshot(schema.to_snapshot_data(), os.path.join(work_dir, 'bench'))
+
+        selected = set(args.only.split(',')) if args.only else None
+        cases = {}
+
+        def should_run(name):
+            return selected is None or name in selected
+
+        def record(name, fn):
+            if not should_run(name):
+                return
+            print(f"[bench] {name} ...", flush=True)
+            cases[name] = fn()
+            print(f"[bench] {name}: median {cases[name]['median_s']:.4f}s", flush=True)
+
+        record('generate_markdown', lambda: bench_generate_markdown(schema, args.repeat))
+        record('infer_relationships_by_rules', lambda: bench_rule_inference(schema, args.repeat))
+        record('rule_engine_infer', lambda: bench_rule_inference(schema, args.repeat, 'prebuilt'))
+        record('infer_relationships_legacy', lambda: bench_rule_inference(schema, args.repeat, 'legacy'))
+        record('rule_incremental_update', lambda: bench_rule_inference(schema, args.repeat, 'incremental'))
+        legacy = cases.get('infer_relationships_legacy')
+        if legacy:
+            for name in ('infer_relationships_by_rules', 'rule_engine_infer', 'rule_incremental_update'):
+                if name in cases and cases[name]["median_s"] > 0:
+                    cases[name]["speedup_vs_legacy"] = round(legacy["median_s"] / cases[name]["median_s"], 2)
+        record('graph_dsl', lambda: bench_graph_dsl(schema, args.repeat))
+        record('catalog_sqlite', lambda: bench_catalog(db_path, 'sqlite', num_tables, args.repeat))
+        record('catalog_snapshot', lambda: bench_catalog(snapshot_path, 'snapshot', num_tables, args.repeat))
+
+        if should_run('graph_endpoint') or should_run('generate_docs'):
+            from app.main import create_app
+            client = create_app().test_client()
+            record('graph_endpoint', lambda: bench_graph_endpoint(client, snapshot_path, num_tables, args.repeat))
+            doc_tables = schema.table_names[:args.doc_tables]
+            record('generate_docs', lambda: bench_generate_docs(
+                client, db_path, doc_tables, os.path.join(work_dir, 'output'),
+                args.repeat, args.llm_latency, args.llm_server
+            ))
+
+        return {
+            "format": RESULT_FORMAT,
+            "created_at": datetime.now().isoformat(timespec='seconds'),
+            "environment": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+            },
+            "params": {
+                "tables": num_tables,
+                "columns": sum(len(c) for c in schema.columns.values()),
+                "foreign_keys": len(schema.foreign_keys),
+                "seed": args.seed,
+                "repeat": args.repeat,
+                "doc_tables": min(args.doc_tables, num_tables),
+                "llm_latency": args.llm_latency,
+                "llm_server": args.llm_server,
+            },
+            "results": cases,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare_results(current, baseline, tolerance):
+    """与基线结果比较，返回 [(name, baseline_s, current_s, ratio, regressed)]"""
+    rows = []
+    base_results = baseline.get("results", {})
+    for name, result in current.get("results", {}).items():
+        base = base_results.get(name)
+        if not base or not base.get("median_s"):
+            continue
+        ratio = result["median_s"] / base["median_s"]
+        rows.append((name, base["median_s"], result["median_s"], ratio, ratio > 1 + tolerance))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='DB2Doc 基准测试')
+    parser.add_argument('--tables', type=int, default=1000, help='合成表数量')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--repeat', type=int, default=3, help='每项重复次数（另有一次预热）')
+    parser.add_argument('--doc-tables', type=int, default=200, help='generate_docs 处理的表数量')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='LLM 替身每次调用的延迟（秒）')
+    parser.add_argument('--llm-server', action='store_true', help='generate_docs 经由本地 OpenAI 兼容模拟服务调用 LLM')
+    parser.add_argument('--only', default='', help='仅运行指定项，逗号分隔')
+    parser.add_argument('--output', default='', help='结果 JSON 输出路径')
+    parser.add_argument('--compare', default='', help='基线结果 JSON 路径')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='回归判定阈值（相对基线的变慢比例）')
+    parser.add_argument('--fail-on-regression', action='store_true', help='存在回归时以非零状态码退出')
+    args = parser.parse_args()
+
+    result = run_all(args)
+    text = json.dumps(result, ensure_ascii=False, indent=2)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(text, encoding='utf-8')
+        print(f"结果已保存到: {args.output}")
+    else:
+        print(text)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding='utf-8'))
+        rows = compare_results(result, baseline, args.tolerance)
+        regressions = [r for r in rows if r[4]]
+        print(f"\n{'项目':<32}{'基线(s)':>12}{'当前(s)':>12}{'比例':>8}")
+        for name, base_s, cur_s, ratio, regressed in rows:
+            flag = '  回归' if regressed else ''
+            print(f"{name:<32}{base_s:>12.4f}{cur_s:>12.4f}{ratio:>8.2f}{flag}")
+        if regressions and args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+合成 Schema 生成器（用于基准测试，无需真实数据库）
+
+特征：
+- N 张表，按业务前缀（sys_/crm_/erp_ ...）与实体名组合命名
+- 少量宽表（上百列）
+- 分表族（如 log_event_00 ... log_event_15）
+- 外键式命名（user_id / customerCode / dept_no），部分声明为真实外键
+- 中文注释（按比例缺失，用于触发 AI 推断路径）
+
+运行：python benchmarks/schema_generator.py --tables 1000 --sqlite data/bench/schema.db
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+# 确保可以导入 app 模块
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from app.utils.database import SQLITE_COMMENTS_TABLE, connect_db
+from app.utils.snapshot import SNAPSHOT_FORMAT, SNAPSHOT_VERSION
+
+PREFIXES = ['sys', 'crm', 'erp', 'oms', 'wms', 'fin', 'hr', 'log', 'data', 'cfg']
+
+ENTITIES = [
+    ('user', '用户'), ('customer', '客户'), ('order', '订单'), ('product', '商品'),
+    ('department', '部门'), ('organization', '组织'), ('employee', '员工'), ('role', '角色'),
+    ('menu', '菜单'), ('device', '设备'), ('warehouse', '仓库'), ('supplier', '供应商'),
+    ('invoice', '发票'), ('payment', '支付'), ('contract', '合同'), ('project', '项目'),
+    ('task', '任务'), ('account', '账户'), ('region', '区域'), ('category', '分类'),
+    ('brand', '品牌'), ('coupon', '优惠券'), ('shop', '店铺'), ('member', '会员'),
+    ('address', '地址'), ('message', '消息'), ('notice', '公告'), ('ticket', '工单'),
+    ('vehicle', '车辆'), ('driver', '司机'), ('route', '线路'), ('station', '站点'),
+    ('sensor', '传感器'), ('alarm', '告警'), ('batch', '批次'), ('material', '物料'),
+    ('position', '岗位'), ('salary', '薪资'), ('budget', '预算'), ('voucher', '凭证'),
+]
+
+SUFFIXES = [
+    ('', ''), ('_item', '明细'), ('_detail', '详情'), ('_log', '日志'), ('_history', '历史'),
+    ('_record', '记录'), ('_config', '配置'), ('_stat', '统计'), ('_rel', '关联'), ('_snapshot', '快照'),
+]
+
+# 通用字段：(name, data_type, char_len, precision, scale, nullable, default, comment)
+COMMON_COLUMNS = [
+    ('name', 'varchar', 64, None, None, 'YES', None, '名称'),
+    ('status', 'tinyint', None, 3, 0, 'NO', '1', '状态:1有效,0无效'),
+    ('amount', 'decimal', None, 12, 2, 'YES', '0.00', '金额'),
+    ('remark', 'varchar', 255, None, None, 'YES', None, '备注'),
+    ('created_by', 'varchar', 64, None, None, 'YES', None, '创建人'),
+    ('created_at', 'datetime', None, None, None, 'NO', 'CURRENT_TIMESTAMP', '创建时间'),
+    ('updated_at', 'datetime', None, None, None, 'YES', None, '更新时间'),
+]
+
+# 外键式命名模式：(列名模板, data_type, char_len, 注释模板)
+FK_PATTERNS = [
+    ('{e}_id', 'bigint', None, '{c}ID'),
+    ('{e}_id', 'bigint', None, '{c}ID'),
+    ('{e}Code', 'varchar', 32, '{c}编码'),
+    ('{e}_no', 'varchar', 32, '{c}编号'),
+]
+
+ABBREVIATIONS = {'customer': 'cust', 'department': 'dept', 'organization': 'org', 'employee': 'emp'}
+
+
+class SyntheticSchema:
+    """合成 Schema：形状与 database.py 各读取函数的返回值一致"""
+
+    def __init__(self, tables, columns, foreign_keys, indexes):
+        self.tables = tables            # [(table_name, table_type, table_comment)]
+        self.columns = columns          # {table_name: [(8 元组列信息)]}
+        self.foreign_keys = foreign_keys
+        self.indexes = indexes
+
+    @property
+    def table_names(self):
+        return [t[0] for t in self.tables]
+
+    def cols_by_table(self):
+        """关系推断输入：{table_name: [(col_name, data_type), ...]}"""
+        return {t: [(c[0], c[1]) for c in cols] for t, cols in self.columns.items()}
+
+    def all_columns(self):
+        """get_all_columns 形状：[(table_name, column_name, data_type, column_comment)]"""
+        return [(t, c[0], c[1], c[4] or '') for t, cols in self.columns.items() for c in cols]
+
+    def to_snapshot_data(self, database='bench'):
+        """转换为离线快照数据（可用 save_snapshot 写文件）"""
+        return {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "created_at": '',
+            "source": {"db_type": 'synthetic', "database": database},
+            "tables": [list(t) for t in self.tables],
+            "columns": {t: [list(c) for c in cols] for t, cols in self.columns.items()},
+            "foreign_keys": self.foreign_keys,
+            "indexes": self.indexes,
+        }
+
+    def write_sqlite(self, path):
+        """写入 SQLite 数据库文件（含外键与旁路注释表），返回路径"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists():
+            path.unlink()
+
+        fk_targets = {}
+        for fk in self.foreign_keys:
+            for col in fk["columns"]:
+                fk_targets[(fk["from_table"], col["from_column"])] = (fk["to_table"], col["to_column"])
+
+        connection = connect_db(None, None, None, 0, str(path), 'sqlite')
+        try:
+            statements = []
+            for table_name, _, _ in self.tables:
+                col_defs = []
+                for name, data_type, nullable, default, _, char_len, precision, scale in self.columns[table_name]:
+                    sql_type = data_type.upper()
+                    if char_len:
+                        sql_type += f"({char_len})"
+                    elif precision and scale is not None and data_type == 'decimal':
+                        sql_type += f"({precision},{scale})"
+                    col_def = f'"{name}" {sql_type}'
+                    if name == 'id':
+                        col_def += ' PRIMARY KEY'
+                    elif nullable == 'NO':
+                        col_def += ' NOT NULL'
+                    target = fk_targets.get((table_name, name))
+                    if target:
+                        col_def += f' REFERENCES "{target[0]}"("{target[1]}")'
+                    col_defs.append(col_def)
+                statements.append(f'CREATE TABLE "{table_name}" ({", ".join(col_defs)});')
+            connection.executescript("BEGIN;\n" + "\n".join(statements) + "\nCOMMIT;")
+
+            comments = [(t, '', comment) for t, _, comment in self.tables if comment]
+            for table_name, cols in self.columns.items():
+                comments.extend((table_name, c[0], c[4]) for c in cols if c[4])
+            connection.executemany(
+                f"INSERT OR REPLACE INTO {SQLITE_COMMENTS_TABLE} (table_name, column_name, comment) VALUES (?, ?, ?)",
+                comments
+            )
+            connection.commit()
+        finally:
+            connection.close()
+        return str(path)
+
+
+def _table_names(num_tables, rng, shard_families, shard_count):
+    """生成唯一表名；分表族在末尾追加 _00.._NN 序号"""
+    names = []
+    seen = set()
+
+    families = []
+    for _ in range(shard_families):
+        prefix = rng.choice(PREFIXES)
+        entity, entity_cn = rng.choice(ENTITIES)
+        families.append((f"{prefix}_{entity}_shard", f"{entity_cn}分表"))
+    for base, comment in families:
+        for i in range(shard_count):
+            name = f"{base}_{i:02d}"
+            if name not in seen and len(names) < num_tables:
+                seen.add(name)
+                names.append((name, comment, base))
+
+    combos = [(p, e, s) for p in PREFIXES for e in ENTITIES for s in SUFFIXES]
+    rng.shuffle(combos)
+    # 优先生成主实体表（无后缀），保证外键式命名有可匹配的目标表
+    combos.sort(key=lambda c: c[2][0] != '')
+    round_no = 0
+    while len(names) < num_tables:
+        for prefix, (entity, entity_cn), (suffix, suffix_cn) in combos:
+            if len(names) >= num_tables:
+                break
+            name = f"{prefix}_{entity}{suffix}" + (f"_v{round_no}" if round_no else '')
+            if name in seen:
+                continue
+            seen.add(name)
+            names.append((name, f"{entity_cn}{suffix_cn}", None))
+        round_no += 1
+    return names
+
+
+def generate_schema(num_tables=1000, seed=42, wide_ratio=0.02, wide_columns=200,
+                    shard_families=3, shard_count=16, comment_ratio=0.6, fk_ratio=0.3):
+    """
+    生成合成 Schema
+
+    Args:
+        num_tables: 表数量
+        seed: 随机种子（相同参数生成完全相同的 Schema）
+        wide_ratio: 宽表比例
+        wide_columns: 宽表的额外列数
+        shard_families: 分表族数量
+        shard_count: 每个分表族的分表数
+        comment_ratio: 字段有注释的比例
+        fk_ratio: 外键式字段中声明为真实外键的比例
+    """
+    rng = random.Random(seed)
+    names = _table_names(num_tables, rng, shard_families, shard_count)
+
+    # 实体 -> 主表（prefix_entity），用于声明外键
+    entity_tables = {}
+    for name, _, _ in names:
+        parts = name.split('_')
+        if len(parts) == 2:
+            entity_tables.setdefault(parts[1], name)
+
+    shard_columns = {}
+    tables = []
+    columns = {}
+    foreign_keys = []
+    indexes = []
+
+    for name, table_comment, family in names:
+        table_comment = table_comment if rng.random() < comment_ratio else ''
+        tables.append((name, 'BASE TABLE', table_comment))
+
+        if family and family in shard_columns:
+            # 同一分表族共享列结构
+            columns[name] = list(shard_columns[family])
+        else:
+            cols = [('id', 'bigint', 'NO', None, '主键ID', None, 19, 0)]
+            own_entity = name.split('_')[1] if '_' in name else name
+            for entity, entity_cn in rng.sample(ENTITIES, rng.randint(1, 5)):
+                if entity == own_entity:
+                    continue
+                col_tpl, data_type, char_len, comment_tpl = rng.choice(FK_PATTERNS)
+                col_entity = ABBREVIATIONS.get(entity, entity) if rng.random() < 0.1 else entity
+                col_name = col_tpl.format(e=col_entity)
+                if any(c[0] == col_name for c in cols):
+                    continue
+                comment = comment_tpl.format(c=entity_cn) if rng.random() < comment_ratio else ''
+                precision = 19 if data_type == 'bigint' else None
+                cols.append((col_name, data_type, 'YES', None, comment, char_len, precision, 0 if precision else None))
+
+                target = entity_tables.get(entity)
+                if target and target != name and col_name.endswith('_id') and rng.random() < fk_ratio:
+                    foreign_keys.append({
+                        "from_table": name,
+                        "to_table": target,
+                        "constraint_name": f"fk_{name}_{col_name}",
+                        "columns": [{"from_column": col_name, "to_column": 'id', "ordinal_position": 1}],
+                    })
+
+            for col_name, data_type, char_len, precision, scale, nullable, default, comment in COMMON_COLUMNS:
+                if rng.random() < 0.7:
+                    comment = comment if rng.random() < comment_ratio else ''
+                    cols.append((col_name, data_type, nullable, default, comment, char_len, precision, scale))
+
+            if rng.random() < wide_ratio:
+                for i in range(wide_columns):
+                    comment = f"扩展字段{i}" if rng.random() < comment_ratio else ''
+                    cols.append((f"ext_field_{i}", 'varchar', 128, None, comment, 128, None, None))
+
+            columns[name] = cols
+            if family:
+                shard_columns[family] = cols
+
+        indexes.append({
+            "table_name": name, "index_name": 'PRIMARY',
+            "is_primary": True, "is_unique": True, "columns": ['id'],
+        })
+
+    return SyntheticSchema(tables, columns, foreign_keys, indexes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='生成合成 Schema')
+    parser.add_argument('--tables', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--sqlite', default=None, help='写入 SQLite 数据库文件')
+    parser.add_argument('--snapshot', default=None, help='写入离线快照文件')
+    args = parser.parse_args()
+
+    schema = generate_schema(args.tables, seed=args.seed)
+    total_columns = sum(len(c) for c in schema.columns.values())
+    print(f"生成 {len(schema.tables)} 张表，{total_columns} 列，{len(schema.foreign_keys)} 个外键")
+
+    if args.sqlite:
+        print(f"SQLite: {schema.write_sqlite(args.sqlite)}")
+    if args.snapshot:
+        from app.utils.snapshot import save_snapshot
+        print(f"快照: {save_snapshot(schema.to_snapshot_data(), args.snapshot)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -11,6 +11,8 @@ from datetime import datetime
 import logging
 from pathlib import Path
 
+from app.utils.metrics import parse_metrics
+
 class SystemMonitor:
     def __init__(self, config_file='config/config.json'):
         self.config = self.load_config(config_file)
@@ -79,15 +81,78 @@ class SystemMonitor:
         return stats
     
     def get_app_stats(self):
-        """获取应用统计信息"""
+        """获取应用统计信息（内部指标来自应用的 /metrics 端点）"""
+        metrics = self.get_app_metrics()
         stats = {
             "timestamp": datetime.now().isoformat(),
-            "app_running": self.check_app_health(),
-            "log_file_size": self.get_log_file_size(),
+            "app_running": metrics is not None or self.check_app_health(),
+            "metrics": metrics,
             "temp_files_count": self.get_temp_files_count(),
             "python_processes": self.get_python_processes()
         }
         return stats
+
+    def get_app_metrics(self):
+        """读取并汇总应用 /metrics 指标，应用不可达时返回 None"""
+        try:
+            response = requests.get(f"{self.app_url}/metrics", timeout=10)
+            response.raise_for_status()
+        except requests.RequestException as e:
+            self.logger.warning(f"读取应用指标失败: {str(e)}")
+            return None
+        return self.summarize_metrics(parse_metrics(response.text))
+
+    @staticmethod
+    def summarize_metrics(samples):
+        """将 Prometheus 样本汇总为监控报告使用的字典"""
+        def values(name):
+            return samples.get(name, [])
+
+        def total(name, **match):
+            return sum(v for labels, v in values(name) if all(labels.get(k) == m for k, m in match.items()))
+
+        # API 请求：总数、5xx 数，按路由的平均延迟
+        requests_total = total('db2doc_http_requests_total')
+        server_errors = sum(
+            v for labels, v in values('db2doc_http_requests_total') if labels.get('status', '').startswith('5')
+        )
+        endpoints = {}
+        for labels, v in values('db2doc_http_request_duration_seconds_sum'):
+            endpoints.setdefault(labels.get('endpoint'), {})["sum"] = v
+        for labels, v in values('db2doc_http_request_duration_seconds_count'):
+            endpoints.setdefault(labels.get('endpoint'), {})["count"] = v
+        endpoint_latency = {
+            name: round(e.get("sum", 0) / e["count"], 4)
+            for name, e in endpoints.items() if e.get("count")
+        }
+
+        llm_count = total('db2doc_llm_request_duration_seconds_count')
+        llm_sum = total('db2doc_llm_request_duration_seconds_sum')
+
+        cache_hit_rates = {}
+        for labels, _ in values('db2doc_cache_requests_total'):
+            cache = labels.get('cache')
+            hits = total('db2doc_cache_requests_total', cache=cache, result='hit')
+            lookups = total('db2doc_cache_requests_total', cache=cache)
+            cache_hit_rates[cache] = round(hits / lookups, 4) if lookups else 0.0
+
+        return {
+            "api_requests": int(requests_total),
+            "api_server_errors": int(server_errors),
+            "api_avg_latency_seconds": endpoint_latency,
+            "active_jobs": {labels.get('kind'): int(v) for labels, v in values('db2doc_active_jobs')},
+            "db_connections_open": int(total('db2doc_db_connections_open')),
+            "db_statements": int(total('db2doc_db_statements_total')),
+            "llm_in_flight": int(total('db2doc_llm_requests_in_flight')),
+            "llm_requests": int(total('db2doc_llm_requests_total')),
+            "llm_errors": int(total('db2doc_llm_requests_total', outcome='error')),
+            "llm_avg_latency_seconds": round(llm_sum / llm_count, 4) if llm_count else 0.0,
+            "llm_tokens": {
+                "prompt": int(total('db2doc_llm_tokens_total', type='prompt')),
+                "completion": int(total('db2doc_llm_tokens_total', type='completion')),
+            },
+            "cache_hit_rates": cache_hit_rates,
+        }
     
     def get_log_file_size(self):
         """获取日志文件大小"""
@@ -178,9 +243,19 @@ class SystemMonitor:
         print("数据库文档生成器 - 系统监控")
         print("="*50)
         
-        # 应用状态
-        app_healthy = self.check_app_health()
+        # 应用状态与内部指标
+        metrics = self.get_app_metrics()
+        app_healthy = metrics is not None or self.check_app_health()
         print(f"应用状态: {'✓ 运行中' if app_healthy else '✗ 未运行'}")
+        if metrics:
+            jobs = sum(metrics['active_jobs'].values())
+            print(f"API请求数: {metrics['api_requests']}（5xx: {metrics['api_server_errors']}）")
+            print(f"进行中任务: {jobs}，数据库连接: {metrics['db_connections_open']}")
+            print(f"LLM请求: {metrics['llm_requests']}（进行中 {metrics['llm_in_flight']}，"
+                  f"平均 {metrics['llm_avg_latency_seconds']:.2f}s，"
+                  f"token {metrics['llm_tokens']['prompt']}/{metrics['llm_tokens']['completion']}）")
+            for cache, rate in metrics['cache_hit_rates'].items():
+                print(f"缓存命中率[{cache}]: {rate:.1%}")
         
         # 系统资源
         cpu_percent = psutil.cpu_percent(interval=1)
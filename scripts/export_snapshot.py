@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+导出离线 Schema 快照（表、列、注释、外键、索引）
+运行：python scripts/export_snapshot.py --host 127.0.0.1 --user root --password *** --database demo
+输出：data/snapshots/<database>_snapshot_<时间戳>.json.gz
+
+之后在连接参数中使用 db_type=snapshot、database=<快照路径> 即可离线生成文档与关系图。
+"""
+
+import argparse
+import sys
+from datetime import datetime
+from pathlib import Path
+
+# 确保可以导入 app 模块
+ROOT = Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.append(str(ROOT))
+
+from app.utils.database import connect_db
+from app.utils.snapshot import export_snapshot, save_snapshot
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='导出 DB2Doc 离线 Schema 快照')
+    parser.add_argument('--db-type', default='mysql', choices=['mysql', 'sqlserver'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=None)
+    parser.add_argument('--user', default='root')
+    parser.add_argument('--password', default='')
+    parser.add_argument('--database', required=True)
+    parser.add_argument('--tables', nargs='*', default=None, help='仅导出指定的表（默认全部）')
+    parser.add_argument('--output', default=None, help='快照文件路径（默认 data/snapshots/ 下自动命名）')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    port = args.port or (3306 if args.db_type == 'mysql' else 1433)
+    output = args.output or str(
+        ROOT / 'data' / 'snapshots' / f'{args.database}_snapshot_{datetime.now().strftime("%Y%m%d_%H%M%S")}'
+    )
+
+    connection = connect_db(args.host, args.user, args.password, port, args.database, args.db_type)
+    try:
+        snapshot_data = export_snapshot(connection, args.database, args.db_type, tables=args.tables)
+    finally:
+        connection.close()
+
+    file_path = save_snapshot(snapshot_data, output)
+    print(f"✅ 快照已导出: {file_path}（{len(snapshot_data['tables'])} 张表）")
+
+
+if __name__ == '__main__':
+    main()
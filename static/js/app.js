@@ -1268,8 +1268,9 @@ class DatabaseDocGenerator {
             this.totalTables = 0;
             this.completedTables = 0;
             
-            // 启动日志流，接收实时进度
-            this.startLogStreaming();
+            // 预先生成任务 ID 并启动日志流，接收实时进度
+            const jobId = this.createJobId();
+            this.startLogStreaming(jobId);
             
             const response = await fetch('/api/generate_all_tables_description', {
                 method: 'POST',
@@ -1278,7 +1279,8 @@ class DatabaseDocGenerator {
                 },
                 body: JSON.stringify({
                     ...this.currentConnection,
-                    db_description: dbDescription
+                    db_description: dbDescription,
+                    job_id: jobId
                 })
             });
 
@@ -1912,7 +1914,7 @@ class DatabaseDocGenerator {
             
             if (result.success) {
                 this.showProgressSection();
-                this.startLogStreaming();
+                this.startLogStreaming(result.job_id);
                 if (this.incrementalMode) {
                     this.showMessage('开始增量更新文档...', 'info');
                 } else {
@@ -1988,13 +1990,22 @@ class DatabaseDocGenerator {
         }
     }
 
-    // 开始日志流
-    startLogStreaming() {
+    // 生成任务 ID（一键生成时由客户端预先生成，便于先订阅日志流）
+    createJobId() {
+        if (window.crypto && window.crypto.randomUUID) {
+            return window.crypto.randomUUID().replace(/-/g, '');
+        }
+        return Date.now().toString(16) + Math.random().toString(16).slice(2);
+    }
+
+    // 开始日志流（按任务 ID 订阅，任意服务进程均可提供；断线后浏览器按 Last-Event-ID 自动续传）
+    startLogStreaming(jobId) {
         if (this.eventSource) {
             this.eventSource.close();
         }
 
-        this.eventSource = new EventSource('/api/logs');
+        const url = jobId ? `/api/logs?job_id=${encodeURIComponent(jobId)}` : '/api/logs';
+        this.eventSource = new EventSource(url);
         const logsContainer = document.getElementById('logsContainer');
         let processedTables = 0;
         const totalTables = this.selectedTables.size;
@@ -2014,6 +2025,29 @@ class DatabaseDocGenerator {
             } else if (data.type === 'progress') {
                 // 更新进度
                 this.updateProgress(data.completed, data.total, data.current_table);
+            } else if (data.type === 'timing') {
+                // 分阶段耗时：逐表事件仅记录，汇总事件写入日志面板
+                if (data.scope === 'summary') {
+                    this.lastTimingSummary = data;
+                    const stages = Object.entries(data.stages || {})
+                        .map(([name, s]) => `${name} ${s.total.toFixed(2)}s (p50 ${s.p50.toFixed(3)}s / p95 ${s.p95.toFixed(3)}s)`)
+                        .join('，');
+                    const slowest = (data.slowest_tables || []).slice(0, 3)
+                        .map(t => `${t.table} ${t.seconds.toFixed(2)}s`)
+                        .join('，');
+                    const logEntry = document.createElement('div');
+                    logEntry.className = 'log-entry';
+                    logEntry.textContent = `阶段耗时: ${stages}${slowest ? `；最慢的表: ${slowest}` : ''}`;
+                    logsContainer.appendChild(logEntry);
+                    logsContainer.scrollTop = logsContainer.scrollHeight;
+                } else {
+                    this.tableTimings = this.tableTimings || {};
+                    this.tableTimings[data.table] = data;
+                }
+            } else if (data.type === 'query_stats') {
+                // 数据库查询统计（随任务报告保存，便于排查逐表查询）
+                this.lastQueryStats = data.stats;
+                console.info('数据库查询统计:', data.stats);
             } else if (data.type === 'complete') {
                 // 生成完成
                 this.generatedFilePath = data.file_path;
@@ -2024,6 +2058,10 @@ class DatabaseDocGenerator {
                 
                 // 发送完成通知
                 this.notifyGenerationComplete(data.file_path);
+            } else if (data.type === 'end') {
+                // 任务已结束（无完成/错误事件的任务，如一键生成）
+                this.eventSource.close();
+                this.eventSource = null;
             } else if (data.type === 'error') {
                 // 生成错误
                 const logEntry = document.createElement('div');
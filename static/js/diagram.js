@@ -6,6 +6,12 @@ class DatabaseDiagram {
         this.relationships = null;
         this.insights = null;  // 数据洞察
         this.currentOptions = null;  // 当前配置选项
+        // 本地过滤所需数据：推断候选（置信度不低于 candidateFloor）与外键关系
+        this.tableNames = null;
+        this.candidates = null;
+        this.candidateFloor = null;
+        this.fkRelationships = null;
+        this.previewLimit = 8;
         // 缩放和平移状态
         this.zoom = 1;
         this.panX = 0;
@@ -69,11 +75,14 @@ class DatabaseDiagram {
         if (search) search.addEventListener('input', () => this.applySearch(search.value));
 
         const showInferred = document.getElementById('diagramShowInferred');
-        if (showInferred) showInferred.addEventListener('change', () => this.loadGraph());
+        if (showInferred) showInferred.addEventListener('change', () => this.applyThreshold());
 
         const useLLM = document.getElementById('diagramUseLLM');
         if (useLLM) useLLM.addEventListener('change', () => this.loadGraph());
 
+        const dataEvidence = document.getElementById('diagramDataEvidence');
+        if (dataEvidence) dataEvidence.addEventListener('change', () => this.loadGraph());
+
         const threshold = document.getElementById('diagramThreshold');
         const thresholdValue = document.getElementById('diagramThresholdValue');
         if (threshold && thresholdValue) {
@@ -82,7 +91,7 @@ class DatabaseDiagram {
                 thresholdValue.textContent = v.toFixed(2);
             };
             threshold.addEventListener('input', update);
-            threshold.addEventListener('change', () => this.loadGraph());
+            threshold.addEventListener('change', () => this.applyThreshold());
             update();
         }
 
@@ -208,6 +217,7 @@ class DatabaseDiagram {
 
         const showInferred = document.getElementById('diagramShowInferred');
         const useLLM = document.getElementById('diagramUseLLM');
+        const dataEvidence = document.getElementById('diagramDataEvidence');
         const thresholdEl = document.getElementById('diagramThreshold');
 
         // 从 sessionStorage 读取选中的表列表
@@ -227,6 +237,8 @@ class DatabaseDiagram {
                 include_fk: true,
                 include_inferred: !!(showInferred && showInferred.checked),
                 use_llm: !!(useLLM && useLLM.checked),
+                data_evidence: !!(dataEvidence && dataEvidence.checked),
+                data_discover: !!(dataEvidence && dataEvidence.checked),
                 threshold: thresholdEl ? Number(thresholdEl.value || 0.6) : 0.6,
                 tables: selectedTables,  // 传递选中的表列表
             }
@@ -252,9 +264,154 @@ class DatabaseDiagram {
         this.relationships = result.relationships;
         this.insights = result.insights;  // 保存洞察数据
         this.currentOptions = payload.options;  // 保存当前配置
+        this.tableNames = result.table_names || Object.keys(result.tables || {});
+        this.candidates = payload.options.include_inferred ? (result.candidates || null) : null;
+        this.candidateFloor = result.candidate_floor;
+        this.fkRelationships = (result.relationships || []).filter(r => r.kind === 'fk');
+        this.previewLimit = result.columns_preview_limit || 8;
         this.renderGraph(result.mermaid, result.stats);
     }
 
+    /**
+     * 阈值或“显示推断”开关变化：已有候选覆盖所需范围时本地重新过滤渲染，否则重新请求
+     */
+    applyThreshold() {
+        const showInferred = document.getElementById('diagramShowInferred');
+        const thresholdEl = document.getElementById('diagramThreshold');
+        const includeInferred = !!(showInferred && showInferred.checked);
+        const threshold = thresholdEl ? Number(thresholdEl.value || 0.6) : 0.6;
+
+        if (!this.tablesData || !this.tableNames || !this.fkRelationships) {
+            this.loadGraph();
+            return;
+        }
+        if (includeInferred && (!this.candidates || threshold < this.candidateFloor)) {
+            this.loadGraph();
+            return;
+        }
+
+        const inferred = includeInferred ? this.candidates.filter(r => r.confidence >= threshold) : [];
+        const relationships = this.fkRelationships.concat(inferred);
+        const grouping = this.classifyTables(this.tableNames, relationships);
+        this.applyGrouping(grouping);
+
+        this.relationships = relationships;
+        this.mermaidData = this.buildMermaidDsl(grouping.sortedTableNames, relationships, grouping.coreTables);
+        this.insights = {
+            core_tables: grouping.coreTables,
+            isolated_tables: grouping.isolatedTables,
+            prefix_groups: grouping.prefixGroups,
+            max_relations: grouping.maxRelations
+        };
+        this.currentOptions = { ...(this.currentOptions || {}), include_inferred: includeInferred, threshold };
+        this.renderGraph(this.mermaidData, {
+            tables_count: this.tableNames.length,
+            relationships_count: relationships.length,
+            isolated_count: grouping.isolatedTables.length,
+            core_count: grouping.coreTables.length
+        });
+    }
+
+    static extractPrefix(name) {
+        const parts = name.split('_');
+        return parts.length >= 2 ? parts[0] : 'other';
+    }
+
+    static safeName(name) {
+        return name.replace(/-/g, '_').replace(/\./g, '_').replace(/ /g, '_');
+    }
+
+    /**
+     * 按关系数将表分为核心表 / 普通表 / 孤立表（与服务端 classify_tables 一致）
+     */
+    classifyTables(tableNames, relationships) {
+        const inDegree = {};
+        const outDegree = {};
+        tableNames.forEach(t => { inDegree[t] = 0; outDegree[t] = 0; });
+        relationships.forEach(rel => {
+            if (rel.source in outDegree) outDegree[rel.source] += 1;
+            if (rel.target in inDegree) inDegree[rel.target] += 1;
+        });
+
+        const relationCounts = {};
+        tableNames.forEach(t => { relationCounts[t] = inDegree[t] + outDegree[t]; });
+        const maxRelations = tableNames.reduce((m, t) => Math.max(m, relationCounts[t]), 0);
+        const coreThreshold = Math.max(3, maxRelations * 0.5);
+
+        const coreTables = [];
+        const normalTables = [];
+        const isolatedTables = [];
+        tableNames.forEach(t => {
+            const count = relationCounts[t];
+            if (count >= coreThreshold) coreTables.push(t);
+            else if (count === 0) isolatedTables.push(t);
+            else normalTables.push(t);
+        });
+        coreTables.sort((a, b) => relationCounts[b] - relationCounts[a]);
+        normalTables.sort((a, b) => relationCounts[b] - relationCounts[a]);
+        isolatedTables.sort();
+
+        const prefixGroups = {};
+        tableNames.forEach(t => {
+            const prefix = DatabaseDiagram.extractPrefix(t);
+            (prefixGroups[prefix] = prefixGroups[prefix] || []).push(t);
+        });
+
+        return {
+            inDegree, outDegree, relationCounts, maxRelations, coreThreshold,
+            coreTables, normalTables, isolatedTables, prefixGroups,
+            sortedTableNames: coreTables.concat(normalTables, isolatedTables)
+        };
+    }
+
+    applyGrouping(grouping) {
+        this.tableNames.forEach(t => {
+            const data = this.tablesData[t];
+            if (!data) return;
+            const count = grouping.relationCounts[t] || 0;
+            data.in_degree = grouping.inDegree[t] || 0;
+            data.out_degree = grouping.outDegree[t] || 0;
+            data.relation_count = count;
+            data.prefix = DatabaseDiagram.extractPrefix(t);
+            data.is_isolated = count === 0;
+            data.is_core = count >= grouping.coreThreshold;
+        });
+    }
+
+    /**
+     * 构造 Mermaid erDiagram DSL（与服务端 build_mermaid_dsl 一致）
+     */
+    buildMermaidDsl(sortedTableNames, relationships, coreTables) {
+        const lines = ['erDiagram'];
+        const limit = this.previewLimit;
+        sortedTableNames.forEach(t => {
+            const cols = (this.tablesData[t] && this.tablesData[t].columns) || [];
+            lines.push(`    ${DatabaseDiagram.safeName(t)} {`);
+            cols.slice(0, limit).forEach(col => {
+                const c = String(col[0] || '').trim();
+                const dt = String(col[1] || '').trim();
+                if (c) lines.push(`        ${dt} ${DatabaseDiagram.safeName(c)}`);
+            });
+            if (cols.length > limit) {
+                lines.push(`        string more "...(${cols.length - limit} more)"`);
+            }
+            lines.push('    }');
+        });
+
+        const coreSet = new Set(coreTables);
+        const isCore = r => coreSet.has(r.source) || coreSet.has(r.target);
+        relationships.filter(isCore).concat(relationships.filter(r => !isCore(r))).forEach(rel => {
+            const src = DatabaseDiagram.safeName(rel.source);
+            const tgt = DatabaseDiagram.safeName(rel.target);
+            if (rel.kind === 'fk') {
+                lines.push(`    ${src} ||--o{ ${tgt} : "FK"`);
+            } else {
+                lines.push(`    ${src} }o..o{ ${tgt} : "inferred(${Number(rel.confidence || 0).toFixed(2)})"`);
+            }
+        });
+        return lines.join('\n');
+    }
+
     async renderGraph(mermaidDSL, stats) {
         const container = document.getElementById('cy');
         if (!container) return;
@@ -1027,6 +1184,10 @@ class DatabaseDiagram {
         this.relationships = entry.relationships;
         this.insights = entry.insights;
         this.currentOptions = entry.options;
+        // 历史记录不含候选集，阈值变化时重新请求
+        this.tableNames = null;
+        this.candidates = null;
+        this.fkRelationships = null;
 
         // 恢复配置选项
         const showInferred = document.getElementById('diagramShowInferred');
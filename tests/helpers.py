@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试辅助工具
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.database import get_query_stats
+
+
+class QueryBudgetMixin:
+    """
+    查询预算断言（用于 unittest.TestCase），防止逐表查询（N+1）回归。
+
+    用法：
+        with self.assertMaxQueries(connection, 3):
+            get_columns_info_batch(connection, db, 'sqlite', tables)
+    """
+
+    def assertQueryBudget(self, stats, max_statements, msg=None):
+        """断言查询统计（QueryStats 或 to_dict() 报告）中的语句数不超过预算"""
+        report = stats.to_dict() if hasattr(stats, 'to_dict') else stats
+        if report["statements"] > max_statements:
+            detail = ', '.join(
+                f"{name}={entry['statements']}" for name, entry in report["operations"].items() if entry["statements"]
+            )
+            self.fail(self._formatMessage(
+                msg, f"执行了 {report['statements']} 条语句，超出预算 {max_statements}（{detail}）"
+            ))
+
+    @contextmanager
+    def assertMaxQueries(self, connection, max_statements, msg=None):
+        """断言代码块内在该连接上执行的语句数不超过预算"""
+        stats = get_query_stats(connection)
+        if stats is None:
+            raise ValueError("连接未启用查询统计")
+        stats.reset()
+        yield stats
+        self.assertQueryBudget(stats, max_statements, msg)
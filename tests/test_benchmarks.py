@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基准测试工具测试
+验证合成 Schema 生成器、LLM 替身与 OpenAI 兼容模拟服务
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from benchmarks.schema_generator import generate_schema
+from benchmarks.fake_llm import FakeLLMClient
+from benchmarks.mock_llm_server import MockLLMServer, MockLLMConfig
+from app.utils.database import connect_db, get_tables_and_views, get_columns_info, get_foreign_keys
+
+
+class TestSchemaGenerator(unittest.TestCase):
+    """测试合成 Schema 生成器"""
+
+    def test_deterministic(self):
+        """测试相同参数生成相同 Schema，且包含分表族与宽表"""
+        a = generate_schema(200, seed=7, wide_ratio=0.1, shard_families=2, shard_count=4)
+        b = generate_schema(200, seed=7, wide_ratio=0.1, shard_families=2, shard_count=4)
+        self.assertEqual(a.tables, b.tables)
+        self.assertEqual(a.columns, b.columns)
+        self.assertEqual(len(set(a.table_names)), 200)
+        self.assertEqual(len([t for t in a.table_names if '_shard_' in t]), 8)
+        self.assertTrue(any(len(cols) > 100 for cols in a.columns.values()))
+
+    def test_write_sqlite(self):
+        """测试写入 SQLite 后可通过读取函数读回"""
+        temp_dir = tempfile.mkdtemp()
+        try:
+            schema = generate_schema(50, seed=1)
+            path = schema.write_sqlite(os.path.join(temp_dir, 'bench.db'))
+            connection = connect_db(None, None, None, 0, path, 'sqlite')
+            try:
+                self.assertEqual(
+                    sorted(t[0] for t in get_tables_and_views(connection, path, 'sqlite')),
+                    sorted(schema.table_names)
+                )
+                name = schema.table_names[0]
+                columns = get_columns_info(connection, name, path, 'sqlite')
+                self.assertEqual([c[0] for c in columns], [c[0] for c in schema.columns[name]])
+                self.assertEqual([c[4] for c in columns], [c[4] for c in schema.columns[name]])
+                self.assertEqual(len(get_foreign_keys(connection, path, 'sqlite')), len(schema.foreign_keys))
+            finally:
+                connection.close()
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestFakeLLM(unittest.TestCase):
+    """测试 LLM 替身"""
+
+    def test_field_meanings(self):
+        """测试字段含义回答可被 infer_chinese_meaning 解析"""
+        from app.utils.ai_helper import infer_chinese_meaning
+
+        client = FakeLLMClient()
+        columns = [('user_id', 'bigint', 'YES', None, ''), ('created_at', 'datetime', 'NO', None, '')]
+        with patch('app.utils.ai_helper.get_openai_client', return_value=client):
+            meanings = infer_chinese_meaning(columns, 'sys_order')
+        self.assertEqual(meanings, {'user_id': '用户标识符', 'created_at': '创建时间'})
+        self.assertEqual(client.calls, 1)
+
+
+class TestMockLLMServer(unittest.TestCase):
+    """测试 OpenAI 兼容模拟服务"""
+
+    def test_chat_completion_via_app_client(self):
+        """测试应用的 OpenAI 客户端可直接对接模拟服务"""
+        from app.config import config
+        from app.utils.ai_helper import infer_chinese_meaning
+
+        columns = [('customerCode', 'varchar', 'YES', None, ''), ('status', 'tinyint', 'NO', None, '')]
+        with MockLLMServer(MockLLMConfig(seed=1)) as server, \
+                patch.dict(config['ai']['openai'], {"base_url": server.url}):
+            meanings = infer_chinese_meaning(columns, 'crm_order')
+            stats = server.snapshot_stats()
+        self.assertEqual(meanings, {'customerCode': '客户编码', 'status': '状态'})
+        self.assertEqual(stats["completed"], 1)
+        self.assertGreater(stats["prompt_tokens"], 0)
+
+    def test_error_injection_and_concurrency_limit(self):
+        """测试错误注入与并发上限（reject 模式返回 429）"""
+        import threading
+        from openai import OpenAI, APIStatusError
+
+        messages = [{"role": "user", "content": "hello"}]
+        with MockLLMServer(MockLLMConfig(error_rate=1.0, error_status=503)) as server:
+            client = OpenAI(base_url=server.url, api_key='test', max_retries=0)
+            with self.assertRaises(APIStatusError) as ctx:
+                client.chat.completions.create(model='mock-model', messages=messages)
+            self.assertEqual(ctx.exception.status_code, 503)
+
+        config = MockLLMConfig(latency_mean=0.3, max_concurrency=1, overload='reject')
+        with MockLLMServer(config) as server:
+            client = OpenAI(base_url=server.url, api_key='test', max_retries=0)
+            errors = []
+
+            def call():
+                try:
+                    client.chat.completions.create(model='mock-model', messages=messages)
+                except APIStatusError as e:
+                    errors.append(e.status_code)
+
+            threads = [threading.Thread(target=call) for _ in range(3)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            stats = server.snapshot_stats()
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(errors, [429, 429])
+        self.assertEqual(stats["max_in_flight"], 1)
+
+    def test_latency_distribution_reproducible(self):
+        """测试相同种子下延迟抽样可复现"""
+        config = MockLLMConfig(latency='lognormal', latency_mean=0.5, latency_stddev=0.3, seed=42)
+        a = MockLLMServer(config)
+        b = MockLLMServer(MockLLMConfig(latency='lognormal', latency_mean=0.5, latency_stddev=0.3, seed=42))
+        try:
+            samples = [a.sample_latency() for _ in range(5)]
+            self.assertEqual(samples, [b.sample_latency() for _ in range(5)])
+            self.assertTrue(all(s >= 0 for s in samples))
+        finally:
+            a.httpd.server_close()
+            b.httpd.server_close()
+
+
+if __name__ == '__main__':
+    unittest.main()
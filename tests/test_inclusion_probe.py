@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+抽样包含依赖检查测试
+验证包含率证据、置信度更新、按数据发现关系、预算与语句超时
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.database import connect_db, get_query_stats
+from app.utils.inclusion_probe import InclusionProbe, ProbeBudget, statement_timeout, type_family
+from app.utils.relationship_inference import infer_relationships
+
+
+def _make_db(path):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+    CREATE TABLE users (id INTEGER PRIMARY KEY, name VARCHAR(50));
+    CREATE TABLE products (id INTEGER PRIMARY KEY, title VARCHAR(50));
+    CREATE TABLE status (id INTEGER PRIMARY KEY, label VARCHAR(20));
+    CREATE TABLE orders (id INTEGER PRIMARY KEY, user_id INTEGER, buyer INTEGER, status_code VARCHAR(8));
+    """)
+    conn.executemany("INSERT INTO users VALUES (?, ?)", [(i, f"u{i}") for i in range(1, 61)])
+    conn.executemany("INSERT INTO products VALUES (?, ?)", [(i, f"p{i}") for i in range(100, 111)])
+    conn.executemany("INSERT INTO status VALUES (?, ?)", [(i, f"s{i}") for i in range(1, 4)])
+    conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?)", [
+        (i, (i % 50) + 1, (i % 40) + 1, f"S{i % 7}") for i in range(1, 201)
+    ])
+    conn.commit()
+    conn.close()
+
+
+COLS_BY_TABLE = {
+    'users': [('id', 'INTEGER'), ('name', 'VARCHAR(50)')],
+    'products': [('id', 'INTEGER'), ('title', 'VARCHAR(50)')],
+    'status': [('id', 'INTEGER'), ('label', 'VARCHAR(20)')],
+    'orders': [('id', 'INTEGER'), ('user_id', 'INTEGER'), ('buyer', 'INTEGER'), ('status_code', 'VARCHAR(8)')],
+}
+
+
+class TestInclusionProbe(unittest.TestCase):
+    """测试抽样包含依赖检查"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'probe.db')
+        _make_db(self.path)
+        self.opened = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _probe(self, **kwargs):
+        def connect():
+            conn = connect_db(None, None, None, 0, self.path, 'sqlite')
+            self.opened.append(conn)
+            return conn
+        return InclusionProbe(connect, 'sqlite', sample_size=30, max_workers=3, **kwargs)
+
+    def test_containment(self):
+        probe = self._probe()
+        try:
+            ev = probe.containment('orders', 'user_id', 'users', 'id')
+            self.assertEqual(ev["sampled"], 30)
+            self.assertEqual(ev["containment"], 1.0)
+            self.assertEqual(probe.containment('orders', 'buyer', 'products', 'id')["matched"], 0)
+        finally:
+            probe.close()
+        self.assertLessEqual(len(self.opened), 3)
+        self.assertTrue(all(get_query_stats(c).statements > 0 for c in self.opened))
+
+    def test_infer_with_data_evidence(self):
+        """测试证据提升真实关系、压低 *_code 误报，并发现 buyer -> users"""
+        probe = self._probe()
+        try:
+            result = infer_relationships(
+                COLS_BY_TABLE, set(COLS_BY_TABLE), threshold=0.0, data_probe=probe, data_discover=True
+            )
+        finally:
+            probe.close()
+        by_column = {(r["from_column"], r["target"]): r for r in result}
+
+        user_edge = by_column[('user_id', 'users')]
+        self.assertEqual(user_edge["infer_type"], 'rule+data')
+        self.assertEqual(user_edge["evidence"]["containment"], 1.0)
+        self.assertGreaterEqual(user_edge["confidence"], 0.9)
+
+        status_edge = by_column[('status_code', 'status')]
+        self.assertEqual(status_edge["evidence"]["matched"], 0)
+        self.assertLess(status_edge["confidence"], 0.5)
+
+        buyer_edge = by_column[('buyer', 'users')]
+        self.assertEqual(buyer_edge["infer_type"], 'data')
+        self.assertEqual(buyer_edge["confidence"], 0.7)
+        self.assertNotIn(('buyer', 'products'), by_column)
+
+    def test_graph_endpoint_option(self):
+        from app.main import create_app
+
+        client = create_app().test_client()
+        resp = client.post('/api/graph', json={
+            "db_type": 'sqlite',
+            "database": self.path,
+            "options": {"include_inferred": True, "data_evidence": True, "data_discover": True,
+                        "threshold": 0.6, "evidence_max_queries": 50},
+        })
+        body = resp.get_json()
+        self.assertTrue(body["success"], body.get("message"))
+        self.assertLessEqual(body["stats"]["evidence_budget"]["queries"], 50)
+        edges = {(r["source"], r["target"]) for r in body["relationships"]}
+        self.assertIn(('orders', 'users'), edges)
+        self.assertNotIn(('orders', 'status'), edges)
+
+    def test_budget_limits_queries(self):
+        probe = self._probe(budget=ProbeBudget(max_queries=1))
+        try:
+            self.assertIsNone(probe.containment('orders', 'user_id', 'users', 'id'))
+            self.assertIsNone(probe.containment('orders', 'buyer', 'users', 'id'))
+        finally:
+            probe.close()
+        self.assertEqual(probe.budget.to_dict()["queries"], 1)
+        self.assertTrue(probe.budget.exhausted)
+
+    def test_statement_timeout(self):
+        conn = connect_db(None, None, None, 0, self.path, 'sqlite')
+        try:
+            with self.assertRaises(sqlite3.OperationalError):
+                with statement_timeout(conn, 'sqlite', 0.01):
+                    cursor = conn.cursor()
+                    cursor.execute(
+                        "WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000) "
+                        "SELECT COUNT(*) FROM n"
+                    )
+            # 超时后连接仍可用
+            cursor = conn.cursor()
+            cursor.execute("SELECT COUNT(*) FROM users")
+            self.assertEqual(cursor.fetchone()[0], 60)
+        finally:
+            conn.close()
+
+    def test_type_family(self):
+        self.assertEqual(type_family('bigint(20)'), 'int')
+        self.assertEqual(type_family('VARCHAR(32)'), 'str')
+        self.assertIsNone(type_family('datetime'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+共享任务存储测试
+验证任务/事件/缓存读写、跨实例（模拟多个 worker）可见，以及 /api/logs 按 job_id 与 Last-Event-ID 续传
+"""
+
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.job_store import JobStore, bind_job, current_job_id, JOB_COMPLETE, JOB_RUNNING
+
+
+class TestJobStore(unittest.TestCase):
+    """测试 JobStore"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'jobs.db')
+        self.store = JobStore(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_events_visible_across_instances(self):
+        """另一个实例（模拟其他 worker）可读取任务与事件"""
+        job_id = self.store.create_job('generate_docs')
+        self.store.append_event(job_id, 'a')
+        second_id = self.store.append_event(job_id, 'b')
+
+        other = JobStore(self.path)
+        self.assertEqual(other.get_job(job_id)["status"], JOB_RUNNING)
+        self.assertEqual([m for _, m in other.read_events(job_id)], ['a', 'b'])
+        self.assertEqual(other.read_events(job_id, after_id=second_id), [])
+
+        other.finish_job(job_id, JOB_COMPLETE, {"file_path": 'x.md'})
+        self.assertEqual(self.store.get_job(job_id)["result"], {"file_path": 'x.md'})
+
+    def test_iter_events_stops_after_job_finished(self):
+        job_id = self.store.create_job('describe_all')
+
+        def worker():
+            for i in range(3):
+                self.store.append_event(job_id, f"m{i}")
+                time.sleep(0.01)
+            self.store.finish_job(job_id)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        messages = [e[1] for e in self.store.iter_events(job_id, poll_interval=0.01) if e is not None]
+        thread.join()
+        self.assertEqual(messages, ['m0', 'm1', 'm2'])
+
+    def test_latest_job(self):
+        self.store.create_job('generate_docs', 'old')
+        self.store.finish_job('old')
+        self.assertIsNone(self.store.latest_job(since=time.time() + 1))
+        self.store.create_job('generate_docs', 'new')
+        self.assertEqual(self.store.latest_job(since=time.time() + 1)["id"], 'new')
+
+    def test_cache(self):
+        self.store.cache_set('ns', 'k', {"v": [1, 2]})
+        self.assertEqual(self.store.cache_get('ns', 'k'), {"v": [1, 2]})
+        self.store.cache_set('ns', 'expired', 1, ttl=-1)
+        self.assertIsNone(self.store.cache_get('ns', 'expired'))
+        self.store.cache_delete('ns')
+        self.assertEqual(self.store.cache_get('ns', 'k', 'missing'), 'missing')
+
+    def test_bind_job(self):
+        self.assertIsNone(current_job_id())
+        with bind_job('j1'):
+            self.assertEqual(current_job_id(), 'j1')
+        self.assertIsNone(current_job_id())
+
+
+class TestLogsEndpoint(unittest.TestCase):
+    """测试 /api/logs 读取共享存储"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.temp_dir, 'jobs.db'))
+        self.patcher = patch('app.routes.api.get_job_store', return_value=self.store)
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _read_stream(self, url, headers=None):
+        from app.main import create_app
+        client = create_app().test_client()
+        resp = client.get(url, headers=headers or {})
+        chunks = [c for c in resp.response]
+        text = ''.join(c.decode('utf-8') if isinstance(c, bytes) else c for c in chunks)
+        events = []
+        for block in text.strip().split('\n\n'):
+            event = {}
+            for line in block.split('\n'):
+                key, _, value = line.partition(': ')
+                event[key] = value
+            events.append((event.get('id'), json.loads(event['data'])))
+        return events
+
+    def test_stream_and_resume(self):
+        from app.routes.api import publish_event
+
+        job_id = self.store.create_job('generate_docs')
+        publish_event("[t] 开始", job_id)
+        publish_event("PROGRESS:1:2:users", job_id)
+        publish_event("GENERATION_COMPLETE:/tmp/doc.md", job_id)
+        self.assertEqual(self.store.get_job(job_id)["status"], JOB_COMPLETE)
+
+        events = self._read_stream(f'/api/logs?job_id={job_id}')
+        self.assertEqual([e[1]["type"] for e in events], ['log', 'progress', 'complete'])
+        self.assertEqual(events[-1][1]["file_path"], '/tmp/doc.md')
+
+        # 断线重连：只补发 Last-Event-ID 之后的事件
+        resumed = self._read_stream(f'/api/logs?job_id={job_id}', {'Last-Event-ID': events[0][0]})
+        self.assertEqual([e[1]["type"] for e in resumed], ['progress', 'complete'])
+
+    def test_finished_job_without_terminal_event(self):
+        job_id = self.store.create_job('describe_all')
+        self.store.append_event(job_id, '[t] 完成')
+        self.store.finish_job(job_id)
+        events = self._read_stream(f'/api/logs?job_id={job_id}')
+        self.assertEqual([e[1]["type"] for e in events], ['log', 'end'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+应用指标测试
+验证 Prometheus 文本输出、/metrics 端点以及 LLM / 数据库连接 / 缓存指标
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import metrics
+from app.utils.metrics import MetricsRegistry, parse_metrics
+from benchmarks.fake_llm import FakeLLMClient
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """测试指标注册表"""
+
+    def test_render_and_parse(self):
+        registry = MetricsRegistry()
+        counter = registry.counter('demo_total', '示例计数', ('kind',))
+        histogram = registry.histogram('demo_seconds', '示例延迟', ('op',), buckets=(0.1, 1.0))
+        counter.inc(kind='a')
+        counter.inc(2, kind='b"x')
+        histogram.observe(0.05, op='read')
+        histogram.observe(0.5, op='read')
+        histogram.observe(5, op='read')
+
+        text = registry.render()
+        self.assertIn('# TYPE demo_seconds histogram', text)
+        self.assertIn('demo_seconds_bucket{op="read",le="0.1"} 1', text)
+        self.assertIn('demo_seconds_bucket{op="read",le="+Inf"} 3', text)
+
+        samples = parse_metrics(text)
+        self.assertIn(({"kind": 'b"x'}, 2.0), samples['demo_total'])
+        self.assertEqual(samples['demo_seconds_count'], [({"op": 'read'}, 3.0)])
+        with self.assertRaises(ValueError):
+            counter.inc(other='x')
+
+
+class TestAppMetrics(unittest.TestCase):
+    """测试应用指标采集"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_metrics_endpoint_records_api_latency(self):
+        from app.main import create_app
+
+        client = create_app().test_client()
+        client.get('/api/default_path')
+        resp = client.get('/metrics')
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith('text/plain'))
+        samples = parse_metrics(resp.get_data(as_text=True))
+        endpoints = {labels["endpoint"] for labels, _ in samples['db2doc_http_request_duration_seconds_count']}
+        self.assertIn('/api/default_path', endpoints)
+        # /metrics 本身不计入 API 请求
+        self.assertNotIn('/metrics', endpoints)
+
+    def test_llm_and_connection_metrics(self):
+        from app.utils.database import connect_db
+
+        before_calls = metrics.LLM_REQUESTS.value(operation='field_meaning', outcome='success')
+        before_tokens = metrics.LLM_TOKENS.value(operation='field_meaning', type='prompt')
+        response = metrics.metered_chat_completion(
+            FakeLLMClient(), 'field_meaning',
+            model='mock-model', messages=[{"role": "user", "content": "请给出表 t 中字段 id 的中文含义"}]
+        )
+        self.assertIn('"id"', response.choices[0].message.content)
+        self.assertEqual(metrics.LLM_REQUESTS.value(operation='field_meaning', outcome='success'), before_calls + 1)
+        self.assertGreater(metrics.LLM_TOKENS.value(operation='field_meaning', type='prompt'), before_tokens)
+        self.assertEqual(metrics.LLM_IN_FLIGHT.value(), 0)
+
+        before_open = metrics.DB_CONNECTIONS_OPEN.value(db_type='sqlite')
+        connection = connect_db(None, None, None, 0, os.path.join(self.temp_dir, 'demo.db'), 'sqlite')
+        self.assertEqual(metrics.DB_CONNECTIONS_OPEN.value(db_type='sqlite'), before_open + 1)
+        connection.close()
+        connection.close()
+        self.assertEqual(metrics.DB_CONNECTIONS_OPEN.value(db_type='sqlite'), before_open)
+
+    def test_monitor_summary(self):
+        """测试 monitor.py 对指标的汇总"""
+        from monitor import SystemMonitor
+
+        registry = MetricsRegistry()
+        cache = registry.counter('db2doc_cache_requests_total', '缓存', ('cache', 'result'))
+        jobs = registry.gauge('db2doc_active_jobs', '任务', ('kind',))
+        cache.inc(3, cache='graph', result='hit')
+        cache.inc(1, cache='graph', result='miss')
+        jobs.set(2, kind='generate_docs')
+
+        summary = SystemMonitor.summarize_metrics(parse_metrics(registry.render()))
+        self.assertEqual(summary["cache_hit_rates"], {'graph': 0.75})
+        self.assertEqual(summary["active_jobs"], {'generate_docs': 2})
+        self.assertEqual(summary["llm_requests"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
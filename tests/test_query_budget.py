@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+查询预算测试
+验证查询统计的归类，以及文档生成的语句数不随表数量增长（N+1 回归防护）
+"""
+
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from helpers import QueryBudgetMixin
+from benchmarks.schema_generator import generate_schema
+from benchmarks.fake_llm import FakeLLMClient
+from app.utils.database import (
+    connect_db,
+    get_tables_and_views,
+    get_columns_info,
+    get_columns_info_batch,
+    get_table_comments,
+    get_foreign_keys,
+)
+
+
+class TestQueryBudget(QueryBudgetMixin, unittest.TestCase):
+    """测试查询统计与查询预算"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_db(self, num_tables):
+        schema = generate_schema(num_tables, seed=3, shard_families=1, shard_count=4)
+        path = schema.write_sqlite(os.path.join(self.temp_dir, f'bench_{num_tables}.db'))
+        return schema, path
+
+    def test_stats_by_operation(self):
+        """测试语句按逻辑操作归类"""
+        schema, path = self._make_db(12)
+        connection = connect_db(None, None, None, 0, path, 'sqlite')
+        try:
+            for table_name in schema.table_names:
+                get_columns_info(connection, table_name, path, 'sqlite')
+            report = connection.query_stats.to_dict()
+            entry = report["operations"]["get_columns_info"]
+            self.assertEqual(entry["calls"], 12)
+            self.assertEqual(entry["statements"], 12)
+            self.assertEqual(entry["rows"], sum(len(c) for c in schema.columns.values()))
+        finally:
+            connection.close()
+
+    def test_batch_reads_match_per_table_reads(self):
+        """测试批量读取与逐表读取结果一致，且语句数为常数"""
+        schema, path = self._make_db(30)
+        connection = connect_db(None, None, None, 0, path, 'sqlite')
+        try:
+            names = schema.table_names[:20]
+            with self.assertMaxQueries(connection, 2):
+                columns = get_columns_info_batch(connection, path, 'sqlite', tables=names)
+                comments = get_table_comments(connection, path, 'sqlite', tables=names)
+            self.assertEqual(sorted(columns), sorted(names))
+            for name in names:
+                self.assertEqual(columns[name], get_columns_info(connection, name, path, 'sqlite'))
+            self.assertEqual(comments, {t: c for t, _, c in schema.tables if t in names})
+
+            with self.assertMaxQueries(connection, 2):
+                get_tables_and_views(connection, path, 'sqlite')
+                get_foreign_keys(connection, path, 'sqlite')
+        finally:
+            connection.close()
+
+    def _generate_docs_stats(self, path, tables):
+        from app.main import create_app
+        from app.utils.job_store import get_job_store
+
+        client = create_app().test_client()
+        with patch('app.utils.ai_helper.get_openai_client', return_value=FakeLLMClient()):
+            resp = client.post('/api/generate_docs', json={
+                "db_type": 'sqlite',
+                "database": path,
+                "tables": tables,
+                "output_path": self.temp_dir,
+                "file_name": 'doc.md',
+            })
+            body = resp.get_json()
+            self.assertTrue(body["success"])
+            stats = None
+            for _, message in get_job_store().iter_events(body["job_id"], poll_interval=0.05):
+                if message.startswith("QUERY_STATS:"):
+                    stats = json.loads(message.split(":", 1)[1])
+                elif message.startswith("GENERATION_COMPLETE:"):
+                    break
+                elif message.startswith("GENERATION_ERROR:"):
+                    self.fail(message)
+        return stats
+
+    def test_generate_docs_query_budget(self):
+        """测试文档生成的语句数与表数量无关"""
+        for num_tables in (10, 60):
+            schema, path = self._make_db(num_tables)
+            stats = self._generate_docs_stats(path, schema.table_names)
+            self.assertIsNotNone(stats)
+            self.assertQueryBudget(stats, 3, f"{num_tables} 张表")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+规则关系推断测试
+验证预编译的 RuleInferenceEngine 与原始实现输出完全一致，以及按 Schema 指纹的推断缓存
+"""
+
+import unittest
+from unittest.mock import patch
+import json
+import os
+import random
+import sys
+import shutil
+import tempfile
+import threading
+import time
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.job_store import JobStore
+from app.utils.relationship_inference import (
+    RuleInferenceEngine, IncrementalRuleEngine, infer_relationships_by_rules, infer_relationships_by_llm, cached_infer_relationships,
+    schema_fingerprint, batch_review_entries
+)
+from benchmarks import legacy_rules
+from benchmarks.schema_generator import generate_schema
+
+
+class TestRuleInferenceEngine(unittest.TestCase):
+    """测试规则推断引擎"""
+
+    def test_matches_legacy_on_synthetic_schema(self):
+        """测试合成 Schema 上与原始实现逐项一致（含顺序、置信度与理由）"""
+        for seed, shard_families in ((3, 3), (11, 0)):
+            schema = generate_schema(400, seed=seed, shard_families=shard_families, shard_count=6)
+            cols_by_table = schema.cols_by_table()
+            table_names = set(schema.table_names)
+            fk_pairs = {(fk["from_table"], fk["to_table"]) for fk in schema.foreign_keys}
+            for threshold in (0.3, 0.6, 0.8):
+                with self.subTest(seed=seed, threshold=threshold):
+                    expected = legacy_rules.infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, threshold)
+                    self.assertEqual(infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, threshold), expected)
+
+    def test_matches_legacy_on_naming_patterns(self):
+        """测试各类列名模式、单复数与多候选场景"""
+        cols_by_table = {
+            'orders': [('id', 'int'), ('user_id', 'bigint'), ('customerId', 'varchar(32)'),
+                       ('id_product', 'int'), ('status_code', 'varchar(8)'), ('fk_role', 'text')],
+            'users': [('id', 'int'), ('name', 'varchar(50)')],
+            'customer': [('customer_no', 'varchar(20)')],
+            'products': [('id', 'int')],
+            'sys_role': [('id', 'int')],
+            'sys_user_role': [('id', 'int'), ('role_id', 'int'), ('user_id', 'int')],
+            'status': [('code', 'varchar(8)')],
+            'ods_status': [('id', 'int')],
+            'dwd_status': [('id', 'int')],
+        }
+        table_names = set(cols_by_table) | {'no_columns_table'}
+        for fk_pairs in (None, {('orders', 'users')}):
+            with self.subTest(fk_pairs=fk_pairs):
+                expected = legacy_rules.infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, 0.1)
+                self.assertTrue(expected)
+                self.assertEqual(infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, 0.1), expected)
+
+    def test_engine_reusable(self):
+        """测试同一引擎可按不同阈值与外键集合重复推断"""
+        schema = generate_schema(200, seed=5)
+        cols_by_table = schema.cols_by_table()
+        table_names = set(schema.table_names)
+        engine = RuleInferenceEngine(cols_by_table, table_names)
+        for threshold in (0.7, 0.3):
+            self.assertEqual(
+                engine.infer(None, threshold),
+                legacy_rules.infer_relationships_by_rules(cols_by_table, table_names, None, threshold)
+            )
+
+
+class TestIncrementalRuleEngine(unittest.TestCase):
+    """测试增量规则推断"""
+
+    def assertSameEdges(self, actual, expected):
+        """逐项比较（含顺序）；不一致时只报告首个差异，避免对上千条关系做完整 diff"""
+        self.assertEqual(len(actual), len(expected))
+        for i, (a, e) in enumerate(zip(actual, expected)):
+            if a != e:
+                self.fail(f"第 {i} 项不一致: {a} != {e}")
+
+    def test_matches_full_inference_after_changes(self):
+        """测试随机增删表、修改列与外键后，增量结果与全量推断逐项一致"""
+        rng = random.Random(7)
+        schema = generate_schema(400, seed=3, shard_families=2, shard_count=4)
+        cols_by_table = schema.cols_by_table()
+        table_names = list(schema.table_names)
+        fk_pairs = {(fk["from_table"], fk["to_table"]) for fk in schema.foreign_keys}
+        engine = IncrementalRuleEngine()
+
+        for step in range(40):
+            op = rng.choice(('add', 'drop', 'alter', 'fk'))
+            if step and op == 'add':
+                name = rng.choice(('user', 'order_item', 'sys_role', 'status')) + f'_{step}'
+                cols_by_table[name] = [('id', 'int'), (rng.choice(table_names).split('_')[-1] + '_id', 'int')]
+                table_names.append(name)
+            elif step and op == 'drop':
+                name = rng.choice(table_names)
+                table_names.remove(name)
+                cols_by_table.pop(name, None)
+            elif step and op == 'alter':
+                name = rng.choice(list(cols_by_table))
+                if rng.random() < 0.3:
+                    cols_by_table[name] = [c for c in cols_by_table[name] if c[0] != 'id']
+                else:
+                    cols_by_table[name] = cols_by_table[name] + [(rng.choice(table_names) + '_id', 'bigint')]
+            elif step:
+                fk_pairs = fk_pairs | {(rng.choice(table_names), rng.choice(table_names))}
+
+            with self.subTest(step=step, op=op):
+                expected = infer_relationships_by_rules(cols_by_table, table_names, fk_pairs, 0.3)
+                self.assertSameEdges(engine.update(cols_by_table, table_names, fk_pairs, 0.3), expected)
+                if step:
+                    self.assertLess(engine.last_stats["recomputed"], len(cols_by_table) // 4)
+
+    def test_threshold_change_recomputes_all(self):
+        schema = generate_schema(100, seed=5)
+        cols_by_table = schema.cols_by_table()
+        engine = IncrementalRuleEngine()
+        engine.update(cols_by_table, schema.table_names, None, 0.3)
+        result = engine.update(cols_by_table, schema.table_names, None, 0.7)
+        self.assertEqual(engine.last_stats["recomputed"], len(cols_by_table))
+        self.assertSameEdges(result, infer_relationships_by_rules(cols_by_table, schema.table_names, None, 0.7))
+
+    def test_results_are_copies(self):
+        """测试下游修改返回的候选不会污染引擎中保存的结果"""
+        cols_by_table = {'orders': [('id', 'int'), ('user_id', 'int')], 'users': [('id', 'int')]}
+        engine = IncrementalRuleEngine()
+        engine.update(cols_by_table, list(cols_by_table), None, 0.3)[0]["confidence"] = 0.0
+        self.assertGreater(engine.update(cols_by_table, list(cols_by_table), None, 0.3)[0]["confidence"], 0.5)
+
+
+class _FakeResponse:
+    def __init__(self, content):
+        message = type('Message', (), {'content': content})()
+        self.choices = [type('Choice', (), {'message': message})()]
+
+
+class TestInferenceCache(unittest.TestCase):
+    """测试推断结果缓存与 LLM 按候选复核缓存"""
+
+    COLS = {
+        'orders': [('id', 'int'), ('user_id', 'int'), ('product_id', 'int')],
+        'users': [('id', 'int'), ('name', 'varchar(50)')],
+        'products': [('id', 'int')],
+    }
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.temp_dir, 'jobs.db'))
+        self.prompts = []
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _fake_completion(self, client, operation, **kwargs):
+        prompt = kwargs["messages"][-1]["content"]
+        self.prompts.append(prompt)
+        count = sum(1 for line in prompt.splitlines() if ' -> ' in line and line[:1].isdigit())
+        return _FakeResponse(json.dumps({"results": [
+            {"index": i, "score": 0.9, "reason": f"复核 {i}"} for i in range(1, count + 1)
+        ]}, ensure_ascii=False))
+
+    def _infer(self, cols, **kwargs):
+        return cached_infer_relationships(self.store, cols, set(cols), threshold=0.3, **kwargs)
+
+    def test_result_cache_hit_and_invalidation(self):
+        first, info = self._infer(self.COLS)
+        self.assertFalse(info["hit"])
+        second, info = self._infer(self.COLS)
+        self.assertTrue(info["hit"])
+        self.assertEqual(second, first)
+
+        # 列变化、选项变化或 refresh 时重新推断
+        changed = dict(self.COLS, orders=self.COLS['orders'] + [('coupon_id', 'int')])
+        self.assertFalse(self._infer(changed)[1]["hit"])
+        self.assertFalse(self._infer(self.COLS, data_discover=True, scope='other')[1]["hit"])
+        self.assertFalse(self._infer(self.COLS, refresh=True)[1]["hit"])
+
+    def test_fingerprint_ignores_unselected_tables(self):
+        extra = dict(self.COLS, audit_log=[('id', 'int')])
+        self.assertEqual(schema_fingerprint(extra, set(self.COLS)), schema_fingerprint(self.COLS, set(self.COLS)))
+        self.assertNotEqual(
+            schema_fingerprint(self.COLS, set(self.COLS), tables_data={'users': {'comment': '用户'}}),
+            schema_fingerprint(self.COLS, set(self.COLS))
+        )
+
+    def test_llm_review_reused_per_pair(self):
+        tables_data = {'orders': {'comment': '订单'}}
+        with patch('app.utils.relationship_inference.get_openai_client', return_value=object()), \
+                patch('app.utils.relationship_inference.metered_chat_completion', side_effect=self._fake_completion):
+            first, info = self._infer(self.COLS, tables_data=tables_data, use_llm=True)
+            self.assertEqual(info["llm_review"]["reviewed"], 2)
+            self.assertTrue(all(r["infer_type"] == 'rule+llm' for r in first))
+
+            # 新增一张表：结果缓存失效，但未变化的候选复用 LLM 评分，只复核新候选
+            changed = dict(self.COLS, coupon=[('id', 'int')], coupon_use=[('id', 'int'), ('coupon_id', 'int')])
+            second, info = self._infer(changed, tables_data=tables_data, use_llm=True)
+            self.assertFalse(info["hit"])
+            self.assertEqual((info["llm_review"]["reviewed"], info["llm_review"]["cached"]), (1, 2))
+            self.assertFalse(info["llm_review"]["failed"])
+            self.assertEqual(len(self.prompts), 2)
+            self.assertIn('coupon_use.coupon_id -> coupon', self.prompts[-1])
+            self.assertNotIn('orders.user_id', self.prompts[-1])
+
+    def test_failed_llm_review_not_cached(self):
+        with patch('app.utils.relationship_inference.get_openai_client', return_value=None):
+            _, info = self._infer(self.COLS, use_llm=True)
+            self.assertTrue(info["llm_review"]["failed"])
+            self.assertFalse(self._infer(self.COLS, use_llm=True)[1]["hit"])
+
+
+class TestBatchedLLMReview(unittest.TestCase):
+    """测试分批并发的 LLM 复核"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = JobStore(os.path.join(self.temp_dir, 'jobs.db'))
+        self.lock = threading.Lock()
+        self.active = 0
+        self.max_active = 0
+        self.calls = 0
+        self.fail_first = False
+        # 120 个子表各引用一个父表，共 120 个候选
+        self.cols = {f'item_{i}': [('id', 'int'), (f'owner_{i}_id', 'int')] for i in range(120)}
+        self.cols.update({f'owner_{i}': [('id', 'int')] for i in range(120)})
+        self.candidates = infer_relationships_by_rules(self.cols, set(self.cols), threshold=0.3)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _fake_completion(self, client, operation, **kwargs):
+        with self.lock:
+            self.calls += 1
+            call = self.calls
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(0.05)
+            if self.fail_first and call == 1:
+                raise RuntimeError('rate limited')
+            prompt = kwargs["messages"][-1]["content"]
+            count = sum(1 for line in prompt.splitlines() if ' -> ' in line and line[:1].isdigit())
+            return _FakeResponse(json.dumps({"results": [
+                {"index": i, "score": 0.8, "reason": "ok"} for i in range(1, count + 1)
+            ]}))
+        finally:
+            with self.lock:
+                self.active -= 1
+
+    def _review(self, **kwargs):
+        stats = {}
+        with patch('app.utils.relationship_inference.get_openai_client', return_value=object()), \
+                patch('app.utils.relationship_inference.metered_chat_completion', side_effect=self._fake_completion):
+            result = infer_relationships_by_llm(
+                [dict(c) for c in self.candidates], self.cols, {}, review_store=self.store,
+                review_stats=stats, batch_tokens=600, **kwargs
+            )
+        return result, stats
+
+    def test_batches_respect_token_budget(self):
+        entries = [(i, 'x' * 400) for i in range(20)]
+        batches = batch_review_entries(entries, batch_tokens=600)
+        self.assertEqual(sum(len(b) for b in batches), 20)
+        self.assertTrue(all(len(b) >= 1 for b in batches))
+        self.assertGreater(len(batches), 1)
+        self.assertEqual([item for b in batches for item, _ in b], list(range(20)))
+
+    def test_all_candidates_reviewed_concurrently(self):
+        result, stats = self._review(concurrency=3)
+        self.assertEqual(len(result), 120)
+        self.assertTrue(all(r["infer_type"] == 'rule+llm' for r in result))
+        self.assertEqual(stats["reviewed"], 120)
+        self.assertGreater(stats["batches"], 3)
+        self.assertEqual(self.calls, stats["batches"])
+        self.assertLessEqual(self.max_active, 3)
+        self.assertGreater(self.max_active, 1)
+
+    def test_failed_batch_retried_from_cache(self):
+        self.fail_first = True
+        _, stats = self._review(concurrency=1)
+        self.assertTrue(stats["failed"])
+        self.assertEqual(stats["failed_batches"], 1)
+        failed = 120 - stats["reviewed"]
+        self.assertGreater(failed, 0)
+
+        # 再次复核：成功批次命中缓存，只请求失败的候选
+        self.fail_first = False
+        self.calls = 0
+        result, stats = self._review(concurrency=2)
+        self.assertEqual((stats["cached"], stats["reviewed"]), (120 - failed, failed))
+        self.assertFalse(stats["failed"])
+        self.assertTrue(all(r["infer_type"] == 'rule+llm' for r in result))
+
+
+if __name__ == '__main__':
+    unittest.main()
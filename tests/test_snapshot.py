@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+离线 Schema 快照测试
+验证快照导出/读取，以及基于快照的读取函数与关系图接口
+"""
+
+import unittest
+from unittest.mock import patch
+import os
+import sys
+import shutil
+import tempfile
+from decimal import Decimal
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils import snapshot as snapshot_module
+from app.utils.database import (
+    connect_db,
+    get_tables_and_views,
+    get_tables_with_missing_stats,
+    get_table_comment,
+    get_columns_info,
+    get_all_columns,
+    get_foreign_keys,
+    get_indexes,
+    update_table_comment,
+)
+
+
+class TestSchemaSnapshot(unittest.TestCase):
+    """测试快照导出与读取"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.tables = [
+            ('sys_user', 'BASE TABLE', '用户表'),
+            ('sys_order', 'BASE TABLE', ''),
+        ]
+        self.columns = {
+            'sys_user': [
+                ('id', 'bigint', 'NO', None, '主键', None, Decimal('19'), Decimal('0')),
+                ('name', 'varchar', 'YES', None, '', 64, None, None),
+            ],
+            'sys_order': [
+                ('id', 'bigint', 'NO', None, '', None, 19, 0),
+                ('user_id', 'bigint', 'NO', None, '下单用户', None, 19, 0),
+            ],
+        }
+        self.fks = [{
+            "from_table": 'sys_order',
+            "to_table": 'sys_user',
+            "constraint_name": 'fk_order_user',
+            "columns": [{"from_column": 'user_id', "to_column": 'id', "ordinal_position": 1}],
+        }]
+        self.indexes = [{
+            "table_name": 'sys_user', "index_name": 'PRIMARY',
+            "is_primary": True, "is_unique": True, "columns": ['id'],
+        }]
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _export(self):
+        with patch.object(snapshot_module, 'get_tables_and_views', return_value=self.tables), \
+                patch.object(snapshot_module, 'get_columns_info', side_effect=lambda c, t, d, dt: self.columns[t]), \
+                patch.object(snapshot_module, 'get_foreign_keys', return_value=self.fks), \
+                patch.object(snapshot_module, 'get_indexes', return_value=self.indexes):
+            data = snapshot_module.export_snapshot(object(), 'demo', 'mysql')
+        return snapshot_module.save_snapshot(data, os.path.join(self.temp_dir, 'demo'))
+
+    def test_roundtrip(self):
+        """测试导出后读取内容一致且文件为压缩格式"""
+        path = self._export()
+        self.assertTrue(path.endswith('.json.gz'))
+
+        snap = connect_db(None, None, None, 0, path, 'snapshot')
+        self.assertEqual(snap.database, 'demo')
+        self.assertEqual(get_tables_and_views(snap, 'demo', 'snapshot'), self.tables)
+        self.assertEqual(
+            get_columns_info(snap, 'sys_user', 'demo', 'snapshot')[0],
+            ('id', 'bigint', 'NO', None, '主键', None, 19, 0)
+        )
+        self.assertEqual(get_table_comment(snap, 'sys_user', 'demo', 'snapshot'), '用户表')
+        self.assertEqual(get_foreign_keys(snap, 'demo', 'snapshot', tables=['sys_order']), self.fks)
+        self.assertEqual(get_indexes(snap, 'demo', 'snapshot'), self.indexes)
+        self.assertEqual(
+            get_all_columns(snap, 'demo', 'snapshot', tables=['sys_order']),
+            [('sys_order', 'id', 'bigint', ''), ('sys_order', 'user_id', 'bigint', '下单用户')]
+        )
+
+        stats = {s["table_name"]: s for s in get_tables_with_missing_stats(snap, 'demo', 'snapshot')}
+        self.assertEqual(stats['sys_user']["missing_total"], 1)
+        self.assertEqual(stats['sys_order']["missing_total"], 2)
+
+    def test_snapshot_is_read_only(self):
+        """测试快照不允许写入注释"""
+        snap = snapshot_module.load_snapshot(self._export())
+        with self.assertRaises(ValueError):
+            update_table_comment(snap, 'sys_user', 'demo', '新注释', 'snapshot')
+
+    def test_invalid_snapshot(self):
+        """测试读取不存在或格式不正确的快照"""
+        with self.assertRaises(ValueError):
+            snapshot_module.load_snapshot(os.path.join(self.temp_dir, 'missing.json.gz'))
+        with self.assertRaises(ValueError):
+            snapshot_module.SchemaSnapshot({"format": "other"})
+
+    def test_graph_from_snapshot(self):
+        """测试关系图接口可直接基于快照运行"""
+        from app.main import create_app
+
+        path = self._export()
+        client = create_app().test_client()
+        resp = client.post('/api/graph', json={
+            "db_type": 'snapshot',
+            "database": path,
+            "options": {"include_fk": True, "include_inferred": True, "threshold": 0.5},
+        })
+        result = resp.get_json()
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual(result["stats"]["tables_count"], 2)
+        kinds = {(r["source"], r["target"], r["kind"]) for r in result["relationships"]}
+        self.assertIn(('sys_order', 'sys_user', 'fk'), kinds)
+
+    def test_graph_returns_candidates_below_threshold(self):
+        """测试关系图接口返回候选下限之上的全部推断候选，供前端本地过滤"""
+        from app.main import create_app
+
+        path = self._export()
+        client = create_app().test_client()
+        result = client.post('/api/graph', json={
+            "db_type": 'snapshot',
+            "database": path,
+            "options": {"include_fk": False, "include_inferred": True, "threshold": 0.99, "candidate_floor": 0.3},
+        }).get_json()
+        self.assertTrue(result["success"], result.get("message"))
+        self.assertEqual(result["candidate_floor"], 0.3)
+        self.assertTrue(result["candidates"])
+        self.assertTrue(all(c["confidence"] >= 0.3 for c in result["candidates"]))
+        self.assertEqual(result["relationships"], [c for c in result["candidates"] if c["confidence"] >= 0.99])
+        self.assertEqual(sorted(result["table_names"]), sorted(result["tables"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
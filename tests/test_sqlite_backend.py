@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite 后端测试
+验证 db_type='sqlite' 下的表、列、外键、索引读取与注释写入（旁路注释表）
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.database import (
+    SQLITE_COMMENTS_TABLE,
+    connect_db,
+    get_tables_and_views,
+    get_tables_with_missing_stats,
+    get_table_comment,
+    get_columns_info,
+    get_all_columns,
+    get_foreign_keys,
+    get_indexes,
+    get_databases,
+    update_table_comment,
+    update_column_comment,
+)
+
+
+class TestSQLiteBackend(unittest.TestCase):
+    """测试 SQLite 数据库适配"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.temp_dir, 'demo.db')
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript("""
+        CREATE TABLE sys_user (
+            id INTEGER PRIMARY KEY,
+            name VARCHAR(64) NOT NULL,
+            balance DECIMAL(10,2) DEFAULT 0
+        );
+        CREATE TABLE sys_order (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER REFERENCES sys_user(id),
+            order_no VARCHAR(32) UNIQUE
+        );
+        CREATE VIEW v_user AS SELECT id, name FROM sys_user;
+        """)
+        conn.close()
+        self.connection = connect_db(None, None, None, 0, self.db_path, 'sqlite')
+
+    def tearDown(self):
+        self.connection.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_tables_and_views(self):
+        """测试表/视图列表，注释旁路表不应出现"""
+        tables = get_tables_and_views(self.connection, 'demo', 'sqlite')
+        self.assertEqual(
+            tables,
+            [('sys_order', 'BASE TABLE', ''), ('sys_user', 'BASE TABLE', ''), ('v_user', 'VIEW', '')]
+        )
+        self.assertNotIn(SQLITE_COMMENTS_TABLE, [t[0] for t in tables])
+
+    def test_columns_info_shape(self):
+        """测试列信息与 MySQL information_schema 形状一致"""
+        columns = get_columns_info(self.connection, 'sys_user', 'demo', 'sqlite')
+        self.assertEqual(columns[0], ('id', 'integer', 'YES', None, '', None, None, None))
+        self.assertEqual(columns[1], ('name', 'varchar', 'NO', None, '', 64, None, None))
+        self.assertEqual(columns[2], ('balance', 'decimal', 'YES', '0', '', None, 10, 2))
+
+    def test_comment_writers(self):
+        """测试表/字段注释写入旁路表并能被各读取函数读到"""
+        update_table_comment(self.connection, 'sys_user', 'demo', '用户表', 'sqlite')
+        update_column_comment(self.connection, 'sys_user', 'demo', 'name', '用户名', 'sqlite')
+        update_column_comment(self.connection, 'sys_user', 'demo', 'name', '姓名', 'sqlite')
+
+        self.assertEqual(get_table_comment(self.connection, 'sys_user', 'demo', 'sqlite'), '用户表')
+        columns = get_columns_info(self.connection, 'sys_user', 'demo', 'sqlite')
+        self.assertEqual(columns[1][4], '姓名')
+        self.assertIn(('sys_user', 'name', 'varchar', '姓名'), get_all_columns(self.connection, 'demo', 'sqlite'))
+
+        stats = {s["table_name"]: s for s in get_tables_with_missing_stats(self.connection, 'demo', 'sqlite')}
+        self.assertFalse(stats['sys_user']["missing_table_comment"])
+        self.assertEqual(stats['sys_user']["missing_columns_count"], 2)
+        self.assertEqual(stats['sys_order']["missing_total"], 4)
+
+    def test_foreign_keys_and_indexes(self):
+        """测试外键与索引（含 rowid 主键）"""
+        fks = get_foreign_keys(self.connection, 'demo', 'sqlite')
+        self.assertEqual(len(fks), 1)
+        self.assertEqual(fks[0]["from_table"], 'sys_order')
+        self.assertEqual(fks[0]["to_table"], 'sys_user')
+        self.assertEqual(fks[0]["columns"][0]["from_column"], 'user_id')
+        self.assertEqual(fks[0]["columns"][0]["to_column"], 'id')
+
+        indexes = get_indexes(self.connection, 'demo', 'sqlite', tables=['sys_order'])
+        primary = [i for i in indexes if i["is_primary"]]
+        unique = [i for i in indexes if i["is_unique"] and not i["is_primary"]]
+        self.assertEqual(primary[0]["columns"], ['id'])
+        self.assertEqual(unique[0]["columns"], ['order_no'])
+
+    def test_list_databases(self):
+        """测试以目录列出 SQLite 数据库文件"""
+        self.assertEqual(get_databases(self.temp_dir, None, None, 0, 'sqlite'), [self.db_path])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分阶段计时测试
+验证 StageTimer 汇总，以及文档生成推送 TIMING 事件并写出 JSON 报告
+"""
+
+import unittest
+from unittest.mock import patch
+import json
+import os
+import sys
+import shutil
+import tempfile
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.timing import StageTimer, percentile
+from benchmarks.schema_generator import generate_schema
+from benchmarks.fake_llm import FakeLLMClient
+
+
+class TestStageTimer(unittest.TestCase):
+    """测试计时汇总"""
+
+    def test_percentile(self):
+        self.assertEqual(percentile([], 50), 0.0)
+        self.assertEqual(percentile([3.0], 95), 3.0)
+        self.assertAlmostEqual(percentile([1, 2, 3, 4], 50), 2.5)
+        self.assertAlmostEqual(percentile(list(range(101)), 95), 95.0)
+
+    def test_summary(self):
+        timer = StageTimer()
+        timer.add('catalog', 0.5)
+        timer.add('llm', 1.0, 'a')
+        timer.add('render', 0.1, 'a')
+        timer.add('llm', 3.0, 'b')
+        timer.add('write', 0.2, 'b')
+
+        self.assertEqual(timer.table_summary('a')["stages"]["llm"], 1.0)
+        summary = timer.summary(slowest=1)
+        self.assertEqual(summary["tables_count"], 2)
+        self.assertEqual(summary["stages"]["catalog"]["total"], 0.5)
+        self.assertEqual(summary["stages"]["llm"]["total"], 4.0)
+        self.assertEqual(summary["stages"]["llm"]["max"], 3.0)
+        self.assertEqual(summary["stages"]["llm"]["p50"], 2.0)
+        self.assertEqual([t["table"] for t in summary["slowest_tables"]], ['b'])
+
+
+class TestGenerateDocsTiming(unittest.TestCase):
+    """测试文档生成的耗时事件与报告"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_timing_events_and_report(self):
+        from app.main import create_app
+        from app.utils.job_store import get_job_store
+
+        schema = generate_schema(8, seed=5, shard_families=0)
+        path = schema.write_sqlite(os.path.join(self.temp_dir, 'demo.db'))
+        client = create_app().test_client()
+        with patch('app.utils.ai_helper.get_openai_client', return_value=FakeLLMClient()):
+            resp = client.post('/api/generate_docs', json={
+                "db_type": 'sqlite',
+                "database": path,
+                "tables": schema.table_names,
+                "output_path": self.temp_dir,
+                "file_name": 'doc.md',
+            })
+            body = resp.get_json()
+            self.assertTrue(body["success"])
+            events = []
+            for _, message in get_job_store().iter_events(body["job_id"], poll_interval=0.05):
+                if message.startswith("TIMING:"):
+                    events.append(json.loads(message.split(":", 1)[1]))
+                elif message.startswith("GENERATION_COMPLETE:"):
+                    break
+                elif message.startswith("GENERATION_ERROR:"):
+                    self.fail(message)
+
+        table_events = [e for e in events if e["scope"] == 'table']
+        self.assertEqual(sorted(e["table"] for e in table_events), sorted(schema.table_names))
+        self.assertEqual(set(table_events[0]["stages"]), {'catalog', 'llm', 'render', 'write'})
+        self.assertEqual(events[-1]["scope"], 'summary')
+
+        with open(os.path.join(self.temp_dir, 'doc.report.json'), encoding='utf-8') as f:
+            report = json.load(f)
+        self.assertEqual(report["completed_tables"], 8)
+        self.assertEqual(report["timing"]["tables_count"], 8)
+        self.assertIn('p95', report["timing"]["stages"]["llm"])
+        self.assertGreater(report["query_stats"]["statements"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
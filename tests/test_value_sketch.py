@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+列取值草图测试
+验证 MinHash/HyperLogLog 估计精度、草图缓存复用、按草图更新置信度与发现关系
+"""
+
+import unittest
+import os
+import sys
+import shutil
+import sqlite3
+import tempfile
+
+import numpy as np
+
+# 添加项目根目录到Python路径
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from app.utils.database import connect_db, get_query_stats
+from app.utils.job_store import JobStore
+from app.utils.relationship_inference import infer_relationships
+from app.utils.value_sketch import ColumnSketch, SketchEvidence, estimate_containment
+from test_inclusion_probe import COLS_BY_TABLE, _make_db
+
+
+class TestColumnSketch(unittest.TestCase):
+    """测试单列草图"""
+
+    def test_cardinality_estimate(self):
+        for n in (50, 3000, 50000):
+            with self.subTest(n=n):
+                estimate = ColumnSketch.build(list(range(n))).cardinality()
+                self.assertLess(abs(estimate - n) / n, 0.05)
+
+    def test_containment_estimate(self):
+        parent = ColumnSketch.build(list(range(10000)))
+        cases = (
+            (list(range(2000, 4000)), 1.0),
+            (list(range(9000, 11000)), 0.5),
+            (list(range(20000, 22000)), 0.0),
+        )
+        for values, expected in cases:
+            with self.subTest(expected=expected):
+                child = ColumnSketch.build(values)
+                result = estimate_containment(
+                    child.signature[None, :], parent.signature[None, :],
+                    np.array([child.cardinality()]), np.array([parent.cardinality()])
+                )[0]
+                self.assertAlmostEqual(result, expected, delta=0.15)
+
+    def test_canonical_values_and_roundtrip(self):
+        """测试整数、整数值浮点与数字字符串视为同一取值，序列化后一致"""
+        a = ColumnSketch.build([1, 2, 3])
+        b = ColumnSketch.build([1.0, '2', ' 3 '])
+        self.assertTrue(np.array_equal(a.signature, b.signature))
+        restored = ColumnSketch.from_dict(a.to_dict())
+        self.assertTrue(np.array_equal(restored.signature, a.signature))
+        self.assertTrue(np.array_equal(restored.registers, a.registers))
+        self.assertEqual(restored.rows, 3)
+
+
+class TestSketchEvidence(unittest.TestCase):
+    """测试基于草图的数据证据"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, 'sketch.db')
+        _make_db(self.path)
+        self.store = JobStore(os.path.join(self.temp_dir, 'jobs.db'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _infer(self):
+        conn = connect_db(None, None, None, 0, self.path, 'sqlite')
+        try:
+            sketch = SketchEvidence(conn, 'sqlite', scope=self.path, store=self.store)
+            result = infer_relationships(
+                COLS_BY_TABLE, set(COLS_BY_TABLE), threshold=0.0, data_probe=sketch, data_discover=True
+            )
+            return result, sketch.report(), get_query_stats(conn).statements
+        finally:
+            conn.close()
+
+    def test_infer_with_sketch_evidence(self):
+        """测试每列只扫描一次，草图证据与抽样检查给出相同结论"""
+        result, report, statements = self._infer()
+        by_column = {(r["from_column"], r["target"]): r for r in result}
+
+        user_edge = by_column[('user_id', 'users')]
+        self.assertEqual(user_edge["infer_type"], 'rule+data')
+        self.assertEqual(user_edge["evidence"]["method"], 'sketch')
+        self.assertGreaterEqual(user_edge["confidence"], 0.9)
+        self.assertLess(by_column[('status_code', 'status')]["confidence"], 0.5)
+
+        buyer_edge = by_column[('buyer', 'users')]
+        self.assertEqual(buyer_edge["infer_type"], 'data')
+        self.assertNotIn(('buyer', 'products'), by_column)
+
+        self.assertEqual(statements, report["scanned"])
+        self.assertLessEqual(report["scanned"], sum(len(cols) for cols in COLS_BY_TABLE.values()))
+
+    def test_sketch_store_reused(self):
+        """测试第二次推断直接读取草图存储，不再查询数据库"""
+        first, _, _ = self._infer()
+        second, report, statements = self._infer()
+        self.assertEqual(statements, 0)
+        self.assertEqual(report["scanned"], 0)
+        self.assertGreater(report["cached"], 0)
+        self.assertEqual(second, first)
+
+    def test_graph_endpoint_option(self):
+        from app.main import create_app
+
+        client = create_app().test_client()
+        resp = client.post('/api/graph', json={
+            "db_type": 'sqlite',
+            "database": self.path,
+            "options": {"include_inferred": True, "data_evidence": True, "data_discover": True,
+                        "evidence_method": 'sketch', "threshold": 0.6},
+        })
+        body = resp.get_json()
+        self.assertTrue(body["success"], body.get("message"))
+        self.assertIn("sketches", body["stats"]["evidence_budget"])
+        edges = {(r["source"], r["target"]) for r in body["relationships"]}
+        self.assertIn(('orders', 'users'), edges)
+        self.assertNotIn(('orders', 'status'), edges)
+
+
+if __name__ == '__main__':
+    unittest.main()